@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+'''
+Exercises the job queue of tkperfd without a real device: the jobs are run
+by a fake tkperf starting a fake fio, the devices are regular files. Checks
+submitting, the lock of a device, cancelling and a restart of the daemon.
+At last a job runs the real tkperf of the source tree with a fake fio.
+
+Run it from the source tree, it exits with 1 if a check fails:
+
+python3 examples/tkperfd-check.py
+'''
+import argparse
+import os
+import stat
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),'..','src'))
+from perfTest.Daemon import JobQueue
+
+## The fake tkperf: it claims the device with a marker file, a second test
+## of the device fails. A SIGTERM is handled slowly, like tkperf stopping fio.
+fakeTkperf = '''
+import os, signal, subprocess, sys, time
+runtime,stopDelay = float(sys.argv[1]),float(sys.argv[2])
+mode,testname,device = sys.argv[3:6]
+marker = device + '.busy'
+try:
+    os.close(os.open(marker,os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+except OSError:
+    print("device " + device + " is used by another test")
+    sys.exit(1)
+def stop(signum,frame):
+    time.sleep(stopDelay)
+    os.remove(marker)
+    sys.exit(1)
+signal.signal(signal.SIGTERM,stop)
+sys.stdin.readline()
+open(testname + '.checkpoint.xml','w').close()
+#the fake fio, it runs in the session of the job
+subprocess.call([sys.executable,'-c','import time; time.sleep(' + str(runtime) + ')'])
+open(testname + '.xml','w').write('<' + testname + '/>')
+os.remove(testname + '.checkpoint.xml')
+os.remove(marker)
+'''
+
+## The fake fio of the real tkperf: it knows the engines and writes a terse
+## result of every run.
+fakeFio = '''#!/usr/bin/env python3
+import sys
+args = sys.argv[1:]
+if '--version' in args:
+    print('fio-3.33')
+elif '--enghelp' in args:
+    print('Available IO engines:\\n\\tlibaio\\n\\tpsync\\n\\tsync')
+elif '--help' in args:
+    print('--output-format=type  Output format (terse,json,json+,normal)')
+else:
+    f = ['0'] * 130
+    name = [a.split('=',1)[1] for a in args if a.startswith('--name=')]
+    f[0],f[1],f[2] = '3','fio-3.33',name[0] if len(name) > 0 else 'x'
+    f[5],f[6],f[7],f[8] = '1000','2000','1000','1000'
+    f[46],f[47],f[48],f[49] = '1000','2000','1000','1000'
+    for p in (13,37,54,78):
+        f[p:p + 4] = ['10.0','500.0','50.0','5.0']
+    for p in (17,58):
+        f[p:p + 20] = ['%.6f%%=%d' % (pc,20 + 10 * k) for k,pc in enumerate([1,5,10,20,30,40,50,60,70,80,90,95,99,99.5,99.9,99.95,99.99])] + ['0%=0'] * 3
+    f[87],f[88] = '12.5%','20.0%'
+    print(';'.join(f))
+'''
+
+def check(cond,msg):
+    ''' Print a check, exit if it failed. '''
+    print(("ok     " if cond else "FAILED ") + msg)
+    if not cond:
+        sys.exit(1)
+
+def waitFor(queue,cond,timeout):
+    '''
+    Update the queue until a condition holds.
+    @return True if it holds, False after timeout seconds.
+    '''
+    end = time.time() + timeout
+    while time.time() < end:
+        queue.update()
+        if cond():
+            return True
+        time.sleep(0.1)
+    return False
+
+def firstDaemon(workdir,tkperf,spec,devs,stopDelay):
+    '''
+    Submit jobs a and b of the first device and c of the second one, cancel
+    a and c. A failed check exits the process.
+    '''
+    queue = JobQueue(workdir,tkperf)
+    a = queue.submit(spec('a',devs[0]))
+    b = queue.submit(spec('b',devs[0]))
+    c = queue.submit(spec('c',devs[1]))
+    check(a.getState() == 'queued' and b.getState() == 'queued','submitted jobs are queued')
+    queue.update()
+    check(a.getState() == 'running' and c.getState() == 'running','jobs of different devices run concurrently')
+    check(b.getState() == 'queued','a device runs one job at a time')
+    check(queue.devices()[JobQueue.devKey(devs[0])]['queued'] == [b.getId()],'the device lists its queued job')
+    queue.cancel(a)
+    queue.update()
+    check(a.getState() == 'cancelled','a running job is cancelled')
+    check(b.getState() == 'queued','the device stays locked while the cancelled job stops')
+    check(waitFor(queue,lambda: b.getState() == 'running',stopDelay + 5),'the next job starts once the cancelled one exited')
+    queue.cancel(c)
+    for args in [[devs[1]],['--desc','x'],['-ft']]:
+        try:
+            queue.submit(dict(spec('e',devs[0]),args=args))
+            check(False,'a job with the args ' + ' '.join(args) + ' is rejected')
+        except RuntimeError:
+            check(True,'a job with the args ' + ' '.join(args) + ' is rejected')
+
+def run(workdir,runtime,stopDelay):
+    '''
+    Run the checks in a working directory.
+    @param runtime Seconds a fake test runs.
+    @param stopDelay Seconds the fake tkperf needs to stop.
+    '''
+    tkperfPath = os.path.join(workdir,'fake-tkperf.py')
+    with open(tkperfPath,'w') as f:
+        f.write(fakeTkperf)
+    devs = []
+    for name in ['dev1','dev2']:
+        devs.append(os.path.join(workdir,name))
+        with open(devs[-1],'wb') as f:
+            f.truncate(1024 * 1024)
+    #the fake tkperf gets the runtimes as arguments before the ones of tkperf
+    tkperf = [sys.executable,tkperfPath,str(runtime),str(stopDelay)]
+    def spec(testname,dev):
+        return {'mode':'ssd','testname':testname,'device':dev}
+
+    #the first daemon runs in its own process, its exit leaves the jobs running
+    pid = os.fork()
+    if pid == 0:
+        code = 0
+        try:
+            firstDaemon(workdir,tkperf,spec,devs,stopDelay)
+        except SystemExit as e:
+            code = e.code
+        sys.stdout.flush()
+        os._exit(code)
+    check(os.waitpid(pid,0)[1] == 0,'the first daemon exited')
+
+    #the daemon is restarted while b runs and c is stopping
+    queue = JobQueue(workdir,tkperf)
+    a,b,c = queue.getJobs()
+    d = queue.submit(spec('d',devs[1]))
+    queue.update()
+    check(b.getState() == 'running','a restarted daemon watches the running job again')
+    check(d.getState() == 'queued','a restarted daemon keeps the device of a stopping job locked')
+    check(waitFor(queue,lambda: b.isFinished(),runtime + 5),'the watched job finishes')
+    check(b.getState() == 'done','a job without exit code is done if its results are complete')
+    check(waitFor(queue,lambda: d.isFinished(),runtime + stopDelay + 5),'the job queued after the restart runs')
+    check(d.getState() == 'done' and d.getReturncode() == 0,'the job queued after the restart is done')
+
+    queue = JobQueue(workdir,tkperf)
+    check([j.getState() for j in queue.getJobs()] == ['cancelled','done','cancelled','done'],'the states are kept in the state file')
+    realTkperf(workdir,devs[0])
+
+def realTkperf(workdir,dev):
+    '''
+    Run a short write saturation test of a file with the tkperf of the source
+    tree and a fake fio.
+    '''
+    binDir = os.path.join(workdir,'bin')
+    os.mkdir(binDir)
+    fio = os.path.join(binDir,'fio')
+    with open(fio,'w') as f:
+        f.write(fakeFio)
+    os.chmod(fio,os.stat(fio).st_mode | stat.S_IXUSR)
+    src = os.path.join(os.path.dirname(os.path.abspath(__file__)),'..')
+    os.environ['PATH'] = binDir + os.pathsep + os.environ['PATH']
+    os.environ['PYTHONPATH'] = os.path.join(src,'src') + os.pathsep + os.environ.get('PYTHONPATH','')
+    os.mkdir(os.path.join(workdir,'real'))
+    queue = JobQueue(os.path.join(workdir,'real'),[sys.executable,os.path.join(src,'scripts','tkperf')])
+    job = queue.submit({'mode':'ssd','testname':'real','device':dev,'desc':'Model Number: FAKE 1\n',
+                        'args':['-ssdt','writesat','-rt','1','-tr','5','-qh','0']})
+    check(waitFor(queue,lambda: job.isFinished(),120),'the tkperf job finishes')
+    check(job.getState() == 'done','the tkperf job is done ' + job.getMessage())
+    with open(os.path.join(queue.getJobDir(job),'real.log')) as f:
+        errors = [l.strip() for l in f if 'ERROR' in l]
+    check(len(errors) == 0,'tkperf logs no errors ' + ' '.join(errors))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-rt","--runtime",help="seconds a fake test runs (default 3)",type=float,default=3)
+    parser.add_argument("-sd","--stop_delay",help="seconds a cancelled fake test needs to stop (default 2)",type=float,default=2)
+    parser.add_argument("-k","--keep",help="keep the working directory",action='store_true')
+    args = parser.parse_args()
+    workdir = tempfile.mkdtemp(prefix='tkperfd-check-')
+    try:
+        run(workdir,args.runtime,args.stop_delay)
+    finally:
+        if args.keep:
+            print("Working directory: " + workdir)
+        else:
+            shutil.rmtree(workdir)
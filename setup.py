@@ -11,6 +11,6 @@ setup(name='TKperf',
 	package_dir = {'': 'src'},
 	packages = ['fio', 'perfTest','plots','reports','system'],
 	package_data  = {'reports':['pics/TKperf_logo.png']},
-	scripts = ["scripts/tkperf","scripts/tkperf-cmp"],
+	scripts = ["scripts/tkperf","scripts/tkperf-cmp","scripts/tkperfd"],
 	license = 'GPL'
 	)
@@ -0,0 +1,112 @@
+''' @package AdaptiveRuntime
+A module stopping a fio job as soon as its throughput has converged.
+'''
+import asyncio
+import json
+import logging
+import numpy as np
+
+from fio import FioParser
+
+class AdaptiveRuntime(object):
+    '''
+    Watches the status records fio prints every second (--status-interval)
+    and interrupts the job once the coefficient of variation of the
+    throughput in the last window is below a threshold and a minimum
+    runtime has passed. The status records are cumulative, therefore a
+    sample is the IO done between two records divided by their time delta.
+    '''
+    ## Seconds between two status records of fio.
+    statusInterval = 1
+
+    def __init__(self,minRuntime,window,cv,records=1):
+        '''
+        Constructor
+        @param minRuntime Minimum runtime of the job in seconds.
+        @param window Number of seconds the coefficient of variation is calculated over.
+        @param cv Coefficient of variation (std/mean) below which the job is stopped.
+        @param records Number of terse records of one status output, the
+        number of jobs if fio reports every job on its own.
+        '''
+        ## Minimum runtime in seconds
+        self.__minRuntime = minRuntime
+        ## Window in seconds
+        self.__window = window
+        ## Convergence threshold
+        self.__cv = cv
+        ## Throughput samples in KB/ms
+        self.__samples = []
+        ## [io in KB,runtime in ms] of the previous status record
+        self.__last = None
+        ## Lines of a json status document being received
+        self.__doc = None
+        ## True if the job has converged
+        self.__converged = False
+        ## Terse records per status output
+        self.__records = records
+        ## Parsed terse records of a status output being received
+        self.__terse = []
+
+    def getSamples(self): return self.__samples
+    def isConverged(self): return self.__converged
+
+    def getCV(self):
+        ''' Return the coefficient of variation of the last window, None if not enough samples. '''
+        n = int(self.__window / AdaptiveRuntime.statusInterval)
+        if n < 2 or len(self.__samples) < n:
+            return None
+        win = np.array(self.__samples[-n:])
+        if win.mean() <= 0:
+            return None
+        return float(win.std() / win.mean())
+
+    def feed(self,line):
+        '''
+        Feed a line of the fio standard output.
+        @param line A line of the standard output, passed as onStdout callback.
+        '''
+        if self.__doc != None:
+            self.__doc.append(line)
+            if line.rstrip('\n') == '}':
+                rows = FioParser.parseJson([json.loads(''.join(self.__doc))])
+                self.__doc = None
+                self.addRecord(rows)
+            return
+        if line.rstrip('\n') == '{':
+            self.__doc = [line]
+            return
+        rows = FioParser.parseStream([line])
+        if len(rows) == 0:
+            return
+        self.__terse.append(rows)
+        if len(self.__terse) == self.__records:
+            rows = np.concatenate(self.__terse)
+            self.__terse = []
+            self.addRecord(rows)
+
+    def addRecord(self,rows):
+        '''
+        Add a cumulative status record and check for convergence.
+        @param rows The parsed records of one status output.
+        '''
+        io = float((rows['io_r'] + rows['io_w']).sum())
+        runtime = float(np.maximum(rows['runtime_r'],rows['runtime_w']).max())
+        if self.__last != None and runtime > self.__last[1]:
+            self.__samples.append((io - self.__last[0]) / (runtime - self.__last[1]))
+        self.__last = [io,runtime]
+        cv = self.getCV()
+        if cv != None and runtime / 1000.0 >= self.__minRuntime and cv <= self.__cv:
+            if not self.__converged:
+                logging.info("# Throughput converged after " + str(runtime / 1000.0)
+                             + "s, coefficient of variation " + str(round(cv,4)))
+            self.__converged = True
+
+    async def watch(self,runner):
+        '''
+        Interrupt the fio job of a runner once it has converged, used as
+        sampler of AsyncFioRunner.run.
+        @param runner The AsyncFioRunner of the job.
+        '''
+        while not self.__converged:
+            await asyncio.sleep(0.1)
+        runner.interrupt()
@@ -0,0 +1,174 @@
+''' @package AsyncFioRunner
+A module running a fio process with asyncio.
+'''
+import asyncio
+import logging
+import re
+import signal
+
+class AsyncFioRunner(object):
+    '''
+    Runs one fio process and streams its standard output and error line by
+    line. A job exceeding its deadline is considered hung and killed. The
+    standard error is classified into warnings and errors, the exit code
+    tells if the run failed. Sampler coroutines can be run concurrently to
+    the fio process.
+    '''
+    ## Seconds to wait for fio to exit after SIGTERM before killing it.
+    killTimeout = 10
+
+    ## Maximum line length of the streamed output.
+    streamLimit = 2 ** 24
+
+    ## Standard error lines indicating a real error, all others are warnings.
+    errRegex = re.compile(r'err=|error|failed|fatal|no such|permission denied|'
+                          r'not supported|invalid|unknown|bad ',re.IGNORECASE)
+
+    def __init__(self,args,deadline=None,onStdout=None):
+        '''
+        Constructor
+        @param args The complete fio argument list.
+        @param deadline Maximum seconds the job may run, None for no limit.
+        @param onStdout A function called with every line of the standard
+        output as soon as fio prints it.
+        '''
+        ## Fio argument list
+        self.__args = args
+        ## Deadline in seconds
+        self.__deadline = deadline
+        ## Standard output line callback
+        self.__onStdout = onStdout
+        ## The running fio process
+        self.__proc = None
+        ## Lines of the standard output
+        self.__stdout = []
+        ## Warnings fio printed to standard error
+        self.__warnings = []
+        ## Errors fio printed to standard error
+        self.__errors = []
+        ## True if the job was killed because of its deadline
+        self.__timedOut = False
+        ## True if the job was interrupted to end it early
+        self.__interrupted = False
+
+    def getProc(self): return self.__proc
+    def getDeadline(self): return self.__deadline
+    def getStdout(self): return ''.join(self.__stdout)
+    def getWarnings(self): return self.__warnings
+    def getErrors(self): return self.__errors
+    def isTimedOut(self): return self.__timedOut
+    def isInterrupted(self): return self.__interrupted
+
+    def getReturnCode(self):
+        ''' Return the exit code of fio, None if it is still running. '''
+        if self.__proc == None:
+            return None
+        return self.__proc.returncode
+
+    @staticmethod
+    def isWarning(line):
+        '''
+        Classify a line fio printed to standard error, only lines matching
+        errRegex are errors.
+        @param line The line of the standard error.
+        @return True if the line is a warning, False if it is an error.
+        '''
+        return AsyncFioRunner.errRegex.search(line) == None
+
+    async def __readStdout(self):
+        ''' Collect the standard output and pass every line to the callback. '''
+        while True:
+            line = await self.__proc.stdout.readline()
+            if line == b'':
+                break
+            line = line.decode(errors='replace')
+            self.__stdout.append(line)
+            if self.__onStdout != None:
+                self.__onStdout(line)
+
+    async def __readStderr(self):
+        ''' Collect and classify the standard error. '''
+        while True:
+            line = await self.__proc.stderr.readline()
+            if line == b'':
+                break
+            line = line.decode(errors='replace').rstrip('\n')
+            if line.strip() == '':
+                continue
+            if AsyncFioRunner.isWarning(line):
+                logging.warning("# Fio warning: " + line)
+                self.__warnings.append(line)
+            else:
+                self.__errors.append(line)
+
+    async def __communicate(self):
+        ''' Wait until both streams are closed and the process has exited. '''
+        await asyncio.gather(self.__readStdout(),self.__readStderr())
+        await self.__proc.wait()
+
+    def interrupt(self):
+        '''
+        End the fio job early with SIGINT, fio stops the job and reports
+        the results up to now.
+        '''
+        if self.__proc == None or self.__proc.returncode != None or self.__interrupted:
+            return
+        logging.info("# Interrupting fio pid " + str(self.__proc.pid))
+        self.__interrupted = True
+        try:
+            self.__proc.send_signal(signal.SIGINT)
+        except ProcessLookupError:
+            pass
+
+    async def terminate(self):
+        ''' Terminate the fio process, kill it if it does not exit in time. '''
+        if self.__proc == None or self.__proc.returncode != None:
+            return
+        try:
+            self.__proc.terminate()
+            await asyncio.wait_for(self.__proc.wait(),AsyncFioRunner.killTimeout)
+        except ProcessLookupError:
+            pass
+        except asyncio.TimeoutError:
+            logging.error("# Fio did not terminate, killing pid " + str(self.__proc.pid))
+            self.__proc.kill()
+            await self.__proc.wait()
+
+    async def run(self,samplers=None):
+        '''
+        Run fio until it exits or its deadline is reached.
+        @param samplers A list of coroutine functions, each is called with
+        this runner and runs concurrently to fio. They are cancelled as soon
+        as fio has exited.
+        @return [True,standard output] of the Fio test or [False,''] on error.
+        '''
+        self.__proc = await asyncio.create_subprocess_exec(*self.__args,
+                        stdout=asyncio.subprocess.PIPE,stderr=asyncio.subprocess.PIPE,
+                        limit=AsyncFioRunner.streamLimit)
+        tasks = [asyncio.ensure_future(s(self)) for s in (samplers or [])]
+        try:
+            await asyncio.wait_for(self.__communicate(),self.__deadline)
+        except asyncio.TimeoutError:
+            self.__timedOut = True
+            logging.error("# Error: fio did not finish within " + str(self.__deadline)
+                          + " seconds, stopping pid " + str(self.__proc.pid))
+            await self.terminate()
+        except asyncio.CancelledError:
+            await self.terminate()
+            raise
+        finally:
+            for t in tasks:
+                t.cancel()
+            for r in await asyncio.gather(*tasks,return_exceptions=True):
+                if isinstance(r,Exception):
+                    logging.error("# Error: sampler failed: " + repr(r))
+        if self.__timedOut:
+            return [False,'']
+        #an interrupted fio may exit with the signal, it reported its results anyway
+        if self.__proc.returncode != 0 and not self.__interrupted:
+            logging.error("Fio encountered an error (exit code " + str(self.__proc.returncode)
+                          + "): " + '\n'.join(self.__errors))
+            return [False,'']
+        for line in self.__errors:
+            logging.warning("# Fio reported an error but exited with 0: " + line)
+        return [True,self.getStdout()]
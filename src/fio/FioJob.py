@@ -1,12 +1,25 @@
 ''' @package FioJob
 A module realizing a fio job run.
 '''
-import subprocess
 import logging
 import re
 import json
+import tempfile
+import os
+import glob
+import shutil
+import asyncio
+import numpy as np
+from functools import lru_cache
 from lxml import etree
 
+from fio.FioServer import FioServer
+from system.Tools import ToolRegistry
+from fio.FioResult import FioResult
+from fio.AsyncFioRunner import AsyncFioRunner
+from fio.AdaptiveRuntime import AdaptiveRuntime
+from fio.FioJobSpec import FioJobSpec
+
 class FioJob(object):
     '''
     A class configuring the fio job.
@@ -32,6 +45,12 @@ class FioJob(object):
     ## Postion of total write throughput.
     terseTPWritePos = 47
 
+    ## Seconds added to runtime and ramp time before a job is considered hung.
+    deadlineSlack = 300
+
+    ## Fio interval log types and the job arguments enabling them.
+    intervalLogArgs = {'bw':'write_bw_log','iops':'write_iops_log','lat':'write_lat_log'}
+
     def __init__(self):
         ''' The constructor '''
         ## Fio path
@@ -42,6 +61,14 @@ class FioJob(object):
         self.__fioKVArgs = {}
         ## Single arguments e.g. group_reporting
         self.__fioSglArgs = []
+        ## A local fio server to submit jobs to, None runs fio directly
+        self.__fioServer = None
+        ## Spec of the current arguments, None if they changed since
+        self.__spec = None
+        ## Directory fio writes the interval logs to, None if disabled
+        self.__logDir = None
+        ## Averaging interval of the interval logs in milliseconds
+        self.__logAvgMsec = None
 
     def __str__(self):
         ''' Return a string representation of the fio executable. '''   
@@ -49,16 +76,9 @@ class FioJob(object):
         return res
 
     def initialize(self):
-        ''' Initialize Fio path and version. '''
-        fio = subprocess.Popen(['which', 'fio'],stdout=subprocess.PIPE,stderr=subprocess.PIPE,universal_newlines=True)
-        stdout = fio.communicate()[0]
-        if fio.returncode != 0:
-            logging.error("# Error: command 'which fio' returned an error code.")
-            raise RuntimeError("which fio command error")
-
-        self.__fioPath = stdout.rstrip("\n");
-        fio = subprocess.Popen(['fio','--version'],stdout=subprocess.PIPE,universal_newlines=True)
-        self.__fioVersion = fio.communicate()[0]
+        ''' Initialize Fio path and version, fio is resolved once per process. '''
+        self.__fioPath = ToolRegistry.getPath('fio')
+        self.__fioVersion = ToolRegistry.getVersion('fio')
 
     def getFioVersion(self):
         ''' Return the current Fio version string. '''
@@ -120,124 +140,492 @@ class FioJob(object):
         @param value Value for the given Fio option.
         '''
         self.__fioKVArgs[key] = value
+        self.__spec = None
         
     def addSglArg(self,key):
         ''' Add a single value option to fio argument list.
         @param key Name of the option being added.
         ''' 
         self.__fioSglArgs.append(key)
-        
+        self.__spec = None
+
+    def pinCpus(self,cpus):
+        '''
+        Restrict the jobs to a set of CPUs, all jobs share the set.
+        @param cpus A fio cpu list, e.g. "0-7,16-23".
+        '''
+        self.addKVArg("cpus_allowed",cpus)
+        self.addKVArg("cpus_allowed_policy","shared")
+
+    def removeKVArg(self,key):
+        ''' Remove a key value argument, if it is set. '''
+        self.__fioKVArgs.pop(key,None)
+        self.__spec = None
+
+    def getSpec(self):
+        '''
+        Return an immutable spec of the current arguments. Tests derive the
+        spec of a single run from it, e.g. getSpec().with_(bs="4k"), instead
+        of changing the arguments of the job.
+        @return A FioJobSpec, the same object as long as the arguments are unchanged.
+        '''
+        if self.__spec == None:
+            self.__spec = FioJobSpec(self.__fioKVArgs,self.__fioSglArgs)
+        return self.__spec
+
     def prepKVArgs(self):
         ''' Generate an argument list out of the dictionary suited for fio. '''
-        argList = [self.__fioPath]
-        for k,v in self.__fioKVArgs.items():
-            argList.append('--' + k + '=' + v)
-        return argList
-    
+        return FioJobSpec(self.__fioKVArgs).getArgv(self.__fioPath)
+
     def prepSglArgs(self,argList):
         ''' Generate an argument list out of the single key arguments. '''
         for k in self.__fioSglArgs:
             argList.append('--' + k)
         return argList
-        
-    def start(self):
+
+    def prepJobFile(self,spec=None):
+        '''
+        Generate the content of a job file out of the key value and single
+        arguments. Arguments only valid on the command line are left out.
+        @param spec The FioJobSpec to render, None for the current arguments.
+        @return The job file as string.
+        '''
+        return (spec or self.getSpec()).getJobFile()
+
+    def getServer(self): return self.__fioServer
+
+    def startServer(self):
+        '''
+        Start a local fio server, all following jobs are submitted to it
+        until stopServer is called.
+        @exception RuntimeError if the server could not be started
+        '''
+        if self.__fioServer == None:
+            self.__fioServer = FioServer(self.__fioPath)
+        self.__fioServer.start()
+
+    def stopServer(self):
+        ''' Stop the local fio server, jobs are run by fio directly again. '''
+        if self.__fioServer != None:
+            self.__fioServer.stop()
+            self.__fioServer = None
+
+    def getLogAvgMsec(self): return self.__logAvgMsec
+
+    def getLogPrefix(self,section=None):
+        '''
+        Return the file prefix of the interval logs.
+        @param section The index of a batch job section, None for a single job.
+        '''
+        prefix = os.path.join(self.__logDir,'tkperf')
+        if section != None:
+            prefix += '-' + str(section)
+        return prefix
+
+    def enableIntervalLogs(self,logAvgMsec):
+        '''
+        Let fio write bandwidth, IOPS and latency logs averaged over the
+        given interval. The logs are collected by collectIntervalLogs.
+        @param logAvgMsec The averaging interval in milliseconds.
+        '''
+        if self.__logDir == None:
+            self.__logDir = tempfile.mkdtemp(prefix='tkperf-logs-')
+        self.__logAvgMsec = int(logAvgMsec)
+        for arg in FioJob.intervalLogArgs.values():
+            self.addKVArg(arg,self.getLogPrefix())
+        self.addKVArg('log_avg_msec',str(self.__logAvgMsec))
+
+    def disableIntervalLogs(self):
+        ''' Stop writing interval logs and remove the log directory. '''
+        for arg in list(FioJob.intervalLogArgs.values()) + ['log_avg_msec']:
+            self.removeKVArg(arg)
+        if self.__logDir != None:
+            shutil.rmtree(self.__logDir,ignore_errors=True)
+        self.__logDir = None
+        self.__logAvgMsec = None
+
+    def hasIntervalLogs(self): return self.__logDir != None
+
+    def collectIntervalLogs(self,section=None):
+        '''
+        Read and remove the interval logs of the last run. The logs of all
+        jobs (numjobs) are merged per interval: bandwidth and IOPS are summed,
+        latencies are averaged. Latencies are converted to microseconds.
+        @param section The index of a batch job section, None for a single job.
+        @return A dictionary {'bw','iops','lat'}, each a list of
+        [msec,read,write] rows, None if interval logs are disabled.
+        '''
+        if self.__logDir == None:
+            return None
+        res = {}
+        for log in FioJob.intervalLogArgs.keys():
+            #with a fio server the client appends the host name
+            files = glob.glob(self.getLogPrefix(section) + '_' + log + '.*.log*')
+            rows = []
+            for f in files:
+                data = np.loadtxt(f,delimiter=',',usecols=(0,1,2),ndmin=2)
+                os.remove(f)
+                if len(data) > 0:
+                    rows.append(data)
+            res[log] = FioJob.mergeIntervals(rows,self.__logAvgMsec,log == 'lat')
+        return res
+
+    @staticmethod
+    def mergeIntervals(logs,logAvgMsec,average):
+        '''
+        Merge the interval logs of several jobs.
+        @param logs A list of arrays with the columns msec,value,direction.
+        @param logAvgMsec The averaging interval in milliseconds.
+        @param average True to average the jobs per interval, False to sum them.
+        @return A list of [msec,read,write] rows.
+        '''
+        if len(logs) == 0:
+            return []
+        data = np.concatenate(logs)
+        slots = np.maximum(np.round(data[:,0] / logAvgMsec).astype(np.int64) - 1,0)
+        dirs = data[:,2].astype(np.int64)
+        data = data[dirs < 2]
+        slots = slots[dirs < 2]
+        dirs = dirs[dirs < 2]
+        vals = data[:,1]
+        if average:
+            #fio logs latencies in nanoseconds
+            vals = vals / 1000.0
+        n = slots.max() + 1
+        sums = np.zeros((n,2))
+        cnts = np.zeros((n,2))
+        np.add.at(sums,(slots,dirs),vals)
+        np.add.at(cnts,(slots,dirs),1)
+        if average:
+            sums = np.where(cnts > 0,sums / np.maximum(cnts,1),0.0)
+        msec = (np.arange(n) + 1) * logAvgMsec
+        return [[int(t),round(float(r),2),round(float(w),2)] for t,(r,w) in zip(msec,sums)]
+
+    def getDeadline(self,cells=None,spec=None):
+        '''
+        Calculate the wall clock deadline of a job out of its runtime and
+        ramp time. Jobs without a runtime (e.g. size based) have no deadline.
+        @param cells The cells of a batch run, None for a single job.
+        @param spec The FioJobSpec of the job, None for the current arguments.
+        @return The deadline in seconds or None.
+        '''
+        spec = spec or self.getSpec()
+        total = 0
+        for cell in (cells or [{}]):
+            deadline = spec.with_(**cell).getDeadline(0)
+            if deadline == None:
+                return None
+            total += deadline
+        return total + FioJob.deadlineSlack
+
+    def start(self,spec=None):
         ''' Start a Fio job with its argument list.
-        The argument list defines the parameters given to Fio.
-        @return [True,standard output] of the Fio test or [False,0] on error.
+        The argument list defines the parameters given to Fio. If a fio
+        server is running, the job is submitted to it as job file.
+        @param spec The FioJobSpec to run, None for the current arguments.
+        @return [True,standard output] of the Fio test or [False,''] on error.
         '''
-        args = self.prepKVArgs()
-        args = self.prepSglArgs(args)
+        return asyncio.run(self.startAsync(spec=spec))
+
+    async def startAsync(self,samplers=None,onStdout=None,spec=None):
+        '''
+        Start a Fio job within a running event loop, see start. As the
+        spec is immutable, several jobs can be started at the same time.
+        @param samplers A list of coroutine functions run concurrently to
+        fio, see AsyncFioRunner.run.
+        @param onStdout A function called with every line fio prints.
+        @param spec The FioJobSpec to run, None for the current arguments.
+        @return [True,standard output] of the Fio test or [False,''] on error.
+        '''
+        spec = spec or self.getSpec()
+        if self.__fioServer != None and self.__fioServer.isRunning():
+            return await self.runJobFileAsync(spec.getJobFile(),self.getDeadline(spec=spec),
+                                              samplers,onStdout,spec)
+        args = spec.getArgv(self.__fioPath)
         logging.info('%s',args)
-        if len(args) == 0:
-            logging.error("Error: Fio argument list is empty.")
-            exit(1)
-        out = subprocess.Popen(args,stdout=subprocess.PIPE,stderr=subprocess.PIPE,universal_newlines=True)
-        (stdout,stderr) = out.communicate()
-        if stderr != '':
-            logging.error("Fio encountered an error: " + stderr)
-            return [False,'']
-        else:
-            return [True,stdout]
+        return await self.runAsync(args,self.getDeadline(spec=spec),samplers,onStdout)
+
+    def startAdaptive(self,minRuntime,window,cv,spec=None):
+        '''
+        Start a Fio job which is ended as soon as its throughput has
+        converged, the configured runtime is the maximum runtime.
+        @param minRuntime Minimum runtime in seconds.
+        @param window Seconds the coefficient of variation is calculated over.
+        @param cv Coefficient of variation below which the job is ended.
+        @param spec The FioJobSpec to run, None for the current arguments.
+        @return [True,standard output,runtime in seconds] of the Fio test
+        or [False,'',0] on error.
+        '''
+        spec = (spec or self.getSpec()).with_(**{'status-interval':AdaptiveRuntime.statusInterval})
+        records = 1
+        if 'group_reporting' not in spec.getSglArgs():
+            records = int(spec.get('numjobs','1'))
+        adaptive = AdaptiveRuntime(minRuntime,window,cv,records)
+        call,out = asyncio.run(self.startAsync([adaptive.watch],adaptive.feed,spec))
+        if call == False:
+            return [False,'',0]
+        out = FioJob.finalOutput(out,records)
+        rows = FioJob.parseOutput(out)
+        runtime = max(max(r.getRow()['runtime_r'],r.getRow()['runtime_w']) for r in rows)
+        return [True,out,int(runtime) / 1000.0]
+
+    @staticmethod
+    def finalOutput(fioOut,jobs=1):
+        '''
+        Strip the status records of a fio run with --status-interval.
+        @param fioOut The output containing status and final records.
+        @param jobs Number of records fio prints per group, the number of
+        jobs if group_reporting is not used.
+        @return The output of the final records only.
+        '''
+        if FioResult.isJson(fioOut):
+            return fioOut[fioOut.rindex('\n{') + 1:] if '\n{' in fioOut else fioOut
+        records = {}
+        for line in fioOut.splitlines():
+            fioTerse = line.split(';')
+            if len(fioTerse) > FioJob.terseLatStartWritePos:
+                #later records of a group replace the earlier ones
+                records.setdefault((fioTerse[2],fioTerse[3]),[]).append(line)
+        lines = []
+        for recs in records.values():
+            lines.extend(recs[-jobs:])
+        return '\n'.join(lines) + '\n'
+
+    def prepBatchJobFile(self,cells,spec=None):
+        '''
+        Generate a job file running one job section per cell. The current
+        arguments go to the global section, every cell section overrides
+        them and is separated from its predecessor by a stonewall. As a
+        stonewall starts a new reporting group, fio reports every cell
+        on its own.
+        @param cells A list of dictionaries, the key value arguments of a cell.
+        @param spec The FioJobSpec of the global section, None for the current arguments.
+        @return [job file as string, list of section names]
+        '''
+        spec = spec or self.getSpec()
+        name = spec.get('name','tkperf')
+        #every section logs to its own prefix
+        lines = ['[global]'] + spec.getJobLines(FioJob.intervalLogArgs.values())
+        names = []
+        for i,cell in enumerate(cells):
+            names.append(name + '-' + str(i))
+            lines.append('[' + names[-1] + ']')
+            lines.append('stonewall')
+            if self.__logDir != None:
+                for arg in FioJob.intervalLogArgs.values():
+                    lines.append(arg + '=' + self.getLogPrefix(i))
+            for k,v in cell.items():
+                lines.append(k + '=' + str(v))
+        return ['\n'.join(lines) + '\n',names]
+
+    def startBatch(self,cells,spec=None):
+        '''
+        Run a list of cells with one fio invocation.
+        @param cells A list of dictionaries, the key value arguments of a cell.
+        @param spec The FioJobSpec the cells are based on, None for the current arguments.
+        @return [True,list of outputs in the order of cells] or [False,[]] on error.
+        '''
+        spec = spec or self.getSpec()
+        jobFile,names = self.prepBatchJobFile(cells,spec)
+        call,stdout = self.runJobFile(jobFile,self.getDeadline(cells,spec),spec)
+        if call == False:
+            return [False,[]]
+        outs = self.splitOutput(stdout,names)
+        if outs == None:
+            logging.error("Fio did not report a result for every job section.")
+            return [False,[]]
+        return [True,outs]
+
+    def splitOutput(self,fioOut,names):
+        '''
+        Split the terse or json output of multiple job sections.
+        @param fioOut The output of a fio run with multiple job sections.
+        @param names The job section names to split the output for.
+        @return A list of outputs in the order of names, None if a result is missing.
+        '''
+        outs = []
+        if FioResult.isJson(fioOut):
+            doc = FioResult.loadJson(fioOut)
+            jobs = {}
+            for job in doc['jobs']:
+                jobs.setdefault(job['jobname'],[]).append(job)
+            for n in names:
+                if n not in jobs:
+                    return None
+                part = dict(doc)
+                part['jobs'] = jobs[n]
+                outs.append(json.dumps(part,indent=4))
+            return outs
+        records = {}
+        for line in fioOut.splitlines():
+            fioTerse = line.split(';')
+            if len(fioTerse) > FioJob.terseLatStartWritePos:
+                records.setdefault(fioTerse[2],[]).append(line)
+        for n in names:
+            if n not in records:
+                return None
+            outs.append('\n'.join(records[n]) + '\n')
+        return outs
+
+    def runJobFile(self,jobFile,deadline=None,spec=None):
+        '''
+        Run fio with a job file. If a fio server is running, the job file
+        is submitted to the server.
+        @param jobFile The content of the job file.
+        @param deadline Maximum seconds the job may run, None for no limit.
+        @param spec The FioJobSpec providing the command line only arguments.
+        @return [True,standard output] of the Fio test or [False,''] on error.
+        '''
+        return asyncio.run(self.runJobFileAsync(jobFile,deadline,spec=spec))
+
+    async def runJobFileAsync(self,jobFile,deadline=None,samplers=None,onStdout=None,spec=None):
+        '''
+        Run fio with a job file within a running event loop, see runJobFile.
+        '''
+        spec = spec or self.getSpec()
+        fd,path = tempfile.mkstemp(prefix='tkperf-',suffix='.fio')
+        with os.fdopen(fd,'w') as f:
+            f.write(jobFile)
+        args = [self.__fioPath]
+        if self.__fioServer != None and self.__fioServer.isRunning():
+            args.append(self.__fioServer.getClientArg())
+        args.extend(spec.getCmdLineArgs())
+        args.append(path)
+        logging.info('%s',args)
+        logging.info('%s',jobFile)
+        try:
+            return await self.runAsync(args,deadline,samplers,onStdout)
+        finally:
+            os.remove(path)
+
+    def run(self,args,deadline=None):
+        '''
+        Run fio with the given argument list.
+        @param args The complete fio argument list.
+        @param deadline Maximum seconds the job may run, None for no limit.
+        @return [True,standard output] of the Fio test or [False,''] on error.
+        '''
+        return asyncio.run(self.runAsync(args,deadline))
+
+    async def runAsync(self,args,deadline=None,samplers=None,onStdout=None):
+        '''
+        Run fio with the given argument list within a running event loop.
+        The output is streamed, a job exceeding the deadline is killed and
+        warnings on the standard error do not fail the run.
+        @param args The complete fio argument list.
+        @param deadline Maximum seconds the job may run, None for no limit.
+        @param samplers A list of coroutine functions run concurrently to fio.
+        @param onStdout A function called with every line fio prints.
+        @return [True,standard output] of the Fio test or [False,''] on error.
+        '''
+        runner = AsyncFioRunner(args,deadline,onStdout)
+        return await runner.run(samplers)
         
+    def getResult(self,fioOut):
+        '''
+        Parses the Fio result output once, the getters below are views on
+        the same parsed record.
+        @param fioOut The terse or json output of the Fio performance test.
+        @return A FioResult object of the first reported group, the jobs of
+        a run without group_reporting are aggregated.
+        '''
+        return FioJob.groupResult(fioOut)
+
+    @staticmethod
+    def getJobResults(fioOut):
+        '''
+        Return the results of the jobs of the first reported group.
+        @param fioOut The terse or json output of the Fio performance test.
+        @return A tuple of FioResult objects, one per job.
+        '''
+        res = FioJob.parseOutput(fioOut)
+        name,group = res[0].getName(),res[0].getRow()['groupid']
+        return tuple(r for r in res if r.getName() == name and r.getRow()['groupid'] == group)
+
+    def getImbalance(self,fioOut):
+        '''
+        Return the imbalance of the jobs of a run without group_reporting.
+        @param fioOut The terse or json output of the Fio performance test.
+        @return [max/min job IOPS,max/min job mean latency], None for a single job.
+        '''
+        return FioResult.imbalance(FioJob.getJobResults(fioOut))
+
+    @staticmethod
+    @lru_cache(maxsize=64)
+    def groupResult(fioOut):
+        '''
+        Aggregates the jobs of the first reported group, served from a cache.
+        @param fioOut The terse or json output of the Fio performance test.
+        @return A FioResult object.
+        '''
+        return FioResult.aggregate(FioJob.getJobResults(fioOut))
+
+    @staticmethod
+    @lru_cache(maxsize=64)
+    def parseOutput(fioOut):
+        '''
+        Parses all records of a Fio result output, repeated calls with the
+        same output are served from a cache.
+        @param fioOut The terse or json output of the Fio performance test.
+        @return A tuple of FioResult objects, one per record.
+        '''
+        return tuple(FioResult.fromOutput(fioOut))
+
     def getIOPS(self,fioOut):
         '''
         Parses the average IOPS out of the Fio result output.
         @param fioOut The output of the Fio performance test.
         @return Sum of read IOPS and write IOPS.
         '''
-        #index 7 iops read
-        #index 48 iops write
-        fioTerse = fioOut.split(';')
-        return int(fioTerse[FioJob.terseIOPSReadPos]) + int(fioTerse[FioJob.terseIOPSWritePos])
-       
+        return self.getResult(fioOut).getIOPS()
+
     def getIOPSRead(self,fioOut):
         '''
         Parses the average read IOPS out of the fio result output.
         @param fioOut The output of the fio performance test.
         @return Read IOPS
         '''
-        #index 7 iops read
-        fioTerse = fioOut.split(';')
-        return int(fioTerse[FioJob.terseIOPSReadPos])
-    
+        return self.getResult(fioOut).getIOPSRead()
+
     def getIOPSWrite(self,fioOut):
         '''
         Parses the average write IOPS out of the Fio result output.
         @param fioOut The output of the Fio performance test.
         @return Write IOPS
         '''
-        #index 48 iops write
-        fioTerse = fioOut.split(';')
-        return int(fioTerse[FioJob.terseIOPSWritePos])
-       
+        return self.getResult(fioOut).getIOPSWrite()
+
     def getTotIOWrite(self,fioOut):
         '''
         Parses the write total IO out of the Fio result output.
         @param fioOut The output of the Fio performance test.
         @return Write total IO in KB.
         '''
-        #index 46 write total IO
-        fioTerse = fioOut.split(';')
-        return int(fioTerse[FioJob.terseTotIOWritePos])
-    
+        return self.getResult(fioOut).getTotIOWrite()
+
     def getWriteLats(self,fioOut):
         '''
         Parses the write total latencies out of the Fio result output.
         @param fioOut The output of the Fio performance test.
         @return [min,max,mean] total write latencies in microseconds.
         '''
-        #index 78 write total latency
-        fioTerse = fioOut.split(';')
-        return [float(fioTerse[FioJob.terseLatStartWritePos]),
-                float(fioTerse[FioJob.terseLatStartWritePos + 1]),
-                float(fioTerse[FioJob.terseLatStartWritePos + 2])]
-        
+        return self.getResult(fioOut).getWriteLats()
+
     def getReadLats(self,fioOut):
         '''
         Parses the read total latencies out of the Fio result output.
         @param fioOut The output of the Fio performance test.
         @return [min,max,mean] total read latencies in microseconds.
         '''
-        #index 78 write total latency
-        fioTerse = fioOut.split(';')
-        return [float(fioTerse[FioJob.terseLatStartReadPos]),
-                float(fioTerse[FioJob.terseLatStartReadPos + 1]),
-                float(fioTerse[FioJob.terseLatStartReadPos + 2])]
-        
+        return self.getResult(fioOut).getReadLats()
+
     def getTotLats(self,fioOut):
         '''
         Parses the read+write total latencies out of the Fio result output.
         @param fioOut The output of the Fio performance test.
         @return [min,max,mean] total latencies in microseconds.
         '''
-        #index 78 write total latency
-        fioTerse = fioOut.split(';')
-        return [float(fioTerse[FioJob.terseLatStartReadPos]) + 
-                      float(fioTerse[FioJob.terseLatStartWritePos]),
-                float(fioTerse[FioJob.terseLatStartReadPos + 1]) + 
-                      float(fioTerse[FioJob.terseLatStartWritePos + 1]),
-                float(fioTerse[FioJob.terseLatStartReadPos + 2]) + 
-                      float(fioTerse[FioJob.terseLatStartWritePos + 2])]
+        return self.getResult(fioOut).getTotLats()
 
     def getTPRead(self,fioOut):
         '''
@@ -245,16 +633,12 @@ class FioJob(object):
         @param fioOut The output of the Fio performance test.
         @return Read total bandwidth.
         '''
-        #index 6 write total IO
-        fioTerse = fioOut.split(';')
-        return int(fioTerse[FioJob.terseTPReadPos])
-        
+        return self.getResult(fioOut).getTPRead()
+
     def getTPWrite(self,fioOut):
         '''
         Parses the write bandwidth of the Fio result output.
         @param fioOut The output of the Fio performance test.
         @return Write total bandwidth.
         '''
-        #index 47 write total IO
-        fioTerse = fioOut.split(';')
-        return int(fioTerse[FioJob.terseTPWritePos])
\ No newline at end of file
+        return self.getResult(fioOut).getTPWrite()
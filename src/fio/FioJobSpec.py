@@ -0,0 +1,152 @@
+''' @package FioJobSpec
+A module holding an immutable fio job specification.
+'''
+
+class FioJobSpec(object):
+    '''
+    An immutable set of fio arguments. Variants are derived with with_,
+    without and withSgl, the argument list and the job file are rendered
+    once and cached. As a spec never changes, it can be shared by jobs
+    running at the same time.
+    '''
+    ## Single arguments only valid on the command line, not in a job file.
+    cmdLineSglArgs = ('minimal',)
+
+    ## Key value arguments only valid on the command line, not in a job file.
+    cmdLineKVArgs = ('output-format','status-interval')
+
+    def __init__(self,kvArgs=None,sglArgs=None):
+        '''
+        Constructor
+        @param kvArgs Key value arguments e.g. {'name':'test'}, keeping their order.
+        @param sglArgs Single arguments e.g. ['group_reporting'].
+        '''
+        kv = []
+        for k,v in (kvArgs or {}).items():
+            kv.append((k,str(v)))
+        ## Key value arguments as tuple of (key,value)
+        object.__setattr__(self,'_FioJobSpec__kvArgs',tuple(kv))
+        ## Single arguments as tuple
+        object.__setattr__(self,'_FioJobSpec__sglArgs',tuple(sglArgs or ()))
+        ## Cached argument lists per fio path
+        object.__setattr__(self,'_FioJobSpec__argv',{})
+        ## Cached job file
+        object.__setattr__(self,'_FioJobSpec__jobFile',None)
+
+    def __setattr__(self,name,value):
+        raise AttributeError("FioJobSpec is immutable")
+
+    def __eq__(self,other):
+        return isinstance(other,FioJobSpec) and self.__key() == other.__key()
+
+    def __hash__(self):
+        return hash(self.__key())
+
+    def __repr__(self):
+        return 'FioJobSpec(' + repr(dict(self.__kvArgs)) + ',' + repr(list(self.__sglArgs)) + ')'
+
+    def __key(self):
+        return (tuple(sorted(self.__kvArgs)),tuple(sorted(self.__sglArgs)))
+
+    def getKVArgs(self):
+        ''' Return a copy of the key value arguments. '''
+        return dict(self.__kvArgs)
+
+    def getSglArgs(self): return self.__sglArgs
+
+    def get(self,key,default=None):
+        ''' Return the value of a key value argument. '''
+        return dict(self.__kvArgs).get(key,default)
+
+    def with_(self,**kvArgs):
+        '''
+        Derive a spec with changed or added key value arguments, e.g.
+        spec.with_(bs="4k",rwmixread=65). Keys which are no python
+        identifiers can be passed as dictionary: spec.with_(**{'output-format':'json'}).
+        @return A new FioJobSpec.
+        '''
+        kv = dict(self.__kvArgs)
+        for k,v in kvArgs.items():
+            kv[k] = str(v)
+        return FioJobSpec(kv,self.__sglArgs)
+
+    def without(self,*keys):
+        '''
+        Derive a spec without the given key value or single arguments.
+        @return A new FioJobSpec.
+        '''
+        kv = dict((k,v) for k,v in self.__kvArgs if k not in keys)
+        return FioJobSpec(kv,[a for a in self.__sglArgs if a not in keys])
+
+    def withSgl(self,*args):
+        '''
+        Derive a spec with additional single arguments.
+        @return A new FioJobSpec.
+        '''
+        sgl = list(self.__sglArgs)
+        for a in args:
+            if a not in sgl:
+                sgl.append(a)
+        return FioJobSpec(dict(self.__kvArgs),sgl)
+
+    def getArgv(self,fioPath):
+        '''
+        Return the fio command line of the spec, cached per fio path.
+        @param fioPath The fio executable.
+        @return A list of arguments.
+        '''
+        if fioPath not in self.__argv:
+            argv = [fioPath]
+            for k,v in self.__kvArgs:
+                argv.append('--' + k + '=' + v)
+            for k in self.__sglArgs:
+                argv.append('--' + k)
+            self.__argv[fioPath] = argv
+        return list(self.__argv[fioPath])
+
+    def getCmdLineArgs(self):
+        ''' Return the arguments of the spec which are not valid in a job file. '''
+        args = []
+        for k,v in self.__kvArgs:
+            if k in FioJobSpec.cmdLineKVArgs:
+                args.append('--' + k + '=' + v)
+        for k in self.__sglArgs:
+            if k in FioJobSpec.cmdLineSglArgs:
+                args.append('--' + k)
+        return args
+
+    def getJobLines(self,skip=()):
+        '''
+        Return the job file lines of the arguments, without name and the
+        arguments only valid on the command line.
+        @param skip Further keys to leave out.
+        '''
+        lines = []
+        for k,v in self.__kvArgs:
+            if k == 'name' or k in FioJobSpec.cmdLineKVArgs or k in skip:
+                continue
+            lines.append(k + '=' + v)
+        for k in self.__sglArgs:
+            if k not in FioJobSpec.cmdLineSglArgs:
+                lines.append(k)
+        return lines
+
+    def getJobFile(self):
+        '''
+        Return the job file with one section named after the job, cached.
+        @return The job file as string.
+        '''
+        if self.__jobFile == None:
+            lines = ['[' + self.get('name','tkperf') + ']'] + self.getJobLines()
+            object.__setattr__(self,'_FioJobSpec__jobFile','\n'.join(lines) + '\n')
+        return self.__jobFile
+
+    def getDeadline(self,slack):
+        '''
+        Return the wall clock deadline of the spec out of runtime and ramp
+        time, None for jobs without a runtime (e.g. size based).
+        @param slack Seconds added to runtime and ramp time.
+        '''
+        if self.get('runtime') == None:
+            return None
+        return int(self.get('runtime')) + int(self.get('ramp_time','0')) + slack
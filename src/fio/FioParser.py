@@ -0,0 +1,183 @@
+''' @package FioParser
+A module parsing many fio outputs at once into a numpy structured array.
+'''
+import json
+import re
+import numpy as np
+
+## Completion latency percentiles reported by fio per default.
+pctList = [1.0,5.0,10.0,20.0,30.0,40.0,50.0,60.0,70.0,80.0,90.0,95.0,
+           99.0,99.5,99.9,99.95,99.99]
+
+## Columns of a parsed record. Latencies are in microseconds, bandwidths
+## in KB/s, total IO in KB and runtimes in milliseconds.
+resultDtype = np.dtype([('jobname','U128'),('groupid','i8'),
+                        ('iops_r','i8'),('iops_w','i8'),
+                        ('bw_r','i8'),('bw_w','i8'),
+                        ('io_r','i8'),('io_w','i8'),
+                        ('ios_r','i8'),('ios_w','i8'),
+                        ('runtime_r','i8'),('runtime_w','i8'),
+                        ('lat_min_r','f8'),('lat_max_r','f8'),('lat_mean_r','f8'),
+                        ('lat_min_w','f8'),('lat_max_w','f8'),('lat_mean_w','f8'),
+                        ('clat_min_r','f8'),('clat_max_r','f8'),('clat_mean_r','f8'),
+                        ('clat_min_w','f8'),('clat_max_w','f8'),('clat_mean_w','f8'),
+                        ('clat_pct_r','f8',(len(pctList),)),
+                        ('clat_pct_w','f8',(len(pctList),)),
+                        ('cpu_usr','f8'),('cpu_sys','f8')])
+
+## Start positions of the read and write blocks in the terse output.
+terseDirPos = {'r':5,'w':46}
+
+## Offsets of the columns in a terse direction block.
+terseDirOff = {'io':0,'bw':1,'iops':2,'runtime':3,
+               'clat_min':8,'clat_max':9,'clat_mean':10,
+               'lat_min':32,'lat_max':33,'lat_mean':34}
+
+## Offset of the completion latency percentiles in a terse direction block.
+tersePctOff = 12
+
+## Positions of the cpu usage in the terse output.
+terseCpuPos = {'cpu_usr':87,'cpu_sys':88}
+
+## Number of leading terse fields required to fill a record.
+terseMinFields = 89
+
+## A terse record, possibly prefixed by a log line header.
+terseRegex = re.compile(r'(?:^|\s)(\d;fio-[^;]*;.*)$')
+
+def parse(outputs):
+    '''
+    Parse a list of fio outputs, each output may contain several terse
+    records or one json document.
+    @param outputs A list of terse or json fio outputs.
+    @return A numpy structured array of resultDtype, one row per record.
+    '''
+    lines = []
+    for out in outputs:
+        lines.extend(out.splitlines())
+    return parseStream(lines)
+
+def parseStream(stream):
+    '''
+    Parse a stream of fio output lines, e.g. an opened file or a TKperf log
+    file being replayed. Terse records and json documents may be prefixed by
+    a log line header.
+    @param stream An iterable of lines.
+    @return A numpy structured array of resultDtype, one row per record.
+    '''
+    parts = []
+    terse = []
+    doc = None
+    for line in stream:
+        line = line.rstrip('\n')
+        if doc != None:
+            doc.append(line)
+            if line == '}':
+                parts.append(parseJson([json.loads('\n'.join(doc))]))
+                doc = None
+            continue
+        if line.endswith('{') and (line == '{' or line.endswith(' {')):
+            if len(terse) > 0:
+                parts.append(parseTerse(terse))
+                terse = []
+            doc = ['{']
+            continue
+        match = terseRegex.search(line)
+        if match != None:
+            terse.append(match.group(1))
+    if len(terse) > 0:
+        parts.append(parseTerse(terse))
+    if len(parts) == 0:
+        return np.zeros(0,dtype=resultDtype)
+    return np.concatenate(parts)
+
+def parseTerse(records):
+    '''
+    Parse terse records. Every record is split once, the columns are then
+    converted for all records at once.
+    @param records A list of terse records.
+    @return A numpy structured array of resultDtype.
+    '''
+    fields = np.array([r.split(';',terseMinFields)[:terseMinFields] for r in records])
+    res = np.zeros(len(records),dtype=resultDtype)
+    res['jobname'] = fields[:,2]
+    res['groupid'] = fields[:,3].astype(np.int64)
+    for rw,pos in terseDirPos.items():
+        for col,off in terseDirOff.items():
+            res[col + '_' + rw] = fields[:,pos + off].astype(np.float64)
+        res['ios_' + rw] = np.round(res['iops_' + rw] * res['runtime_' + rw] / 1000.0)
+        off = pos + tersePctOff
+        pct = np.char.partition(fields[:,off:off + 20],'%=')
+        keys = np.where(pct[:,:,2] == '','0',pct[:,:,0]).astype(np.float64)
+        vals = np.where(pct[:,:,2] == '','0',pct[:,:,2]).astype(np.float64)
+        res['clat_pct_' + rw] = np.nan
+        for i,p in enumerate(pctList):
+            hit = np.isclose(keys,p)
+            found = hit.any(axis=1)
+            res['clat_pct_' + rw][found,i] = vals[hit]
+    for col,pos in terseCpuPos.items():
+        res[col] = np.char.rstrip(fields[:,pos],'%').astype(np.float64)
+    return res
+
+def parseJson(docs):
+    '''
+    Parse decoded fio json or json+ documents. Fio 3 reports latencies in
+    nanoseconds, older versions in microseconds.
+    @param docs A list of decoded json documents.
+    @return A numpy structured array of resultDtype, one row per job.
+    '''
+    rows = []
+    for doc in docs:
+        for job in doc['jobs']:
+            row = [job.get('jobname',''),job.get('groupid',0)]
+            dirs = {}
+            for rw,key in [('r','read'),('w','write')]:
+                j = job[key]
+                if 'lat_ns' in j:
+                    lat,clat,div = j['lat_ns'],j['clat_ns'],1000.0
+                else:
+                    lat,clat,div = j['lat'],j['clat'],1.0
+                pct = [np.nan] * len(pctList)
+                for k,v in clat.get('percentile',{}).items():
+                    for i,p in enumerate(pctList):
+                        if abs(float(k) - p) < 1e-6:
+                            pct[i] = v / div
+                dirs[rw] = {'iops':int(round(j['iops'])),'bw':int(j['bw']),
+                            'io':int(j['io_kbytes']),'runtime':int(j['runtime']),
+                            'ios':int(j.get('total_ios',round(j['iops'] * j['runtime'] / 1000.0))),
+                            'lat':[lat['min'] / div,lat['max'] / div,lat['mean'] / div],
+                            'clat':[clat['min'] / div,clat['max'] / div,clat['mean'] / div],
+                            'pct':pct}
+            for col in ['iops','bw','io','ios','runtime']:
+                row.extend([dirs['r'][col],dirs['w'][col]])
+            for col in ['lat','clat']:
+                row.extend(dirs['r'][col])
+                row.extend(dirs['w'][col])
+            row.extend([dirs['r']['pct'],dirs['w']['pct']])
+            row.extend([float(job.get('usr_cpu',0)),float(job.get('sys_cpu',0))])
+            rows.append(tuple(row))
+    return np.array(rows,dtype=resultDtype)
+
+def parseBins(fioOut):
+    '''
+    Parse the json+ completion latency histograms of a fio output.
+    @param fioOut The json+ output of a fio run.
+    @return A list with one entry per job: {'r':{us:count},'w':{us:count}},
+    an empty list if the output does not contain histograms.
+    '''
+    if not fioOut.lstrip().startswith('{'):
+        if '\n{' not in fioOut:
+            return []
+        fioOut = fioOut[fioOut.index('\n{') + 1:]
+    bins = []
+    for job in json.loads(fioOut)['jobs']:
+        jobBins = {}
+        for rw,key in [('r','read'),('w','write')]:
+            clat = job[key].get('clat_ns',{})
+            if 'bins' not in clat:
+                return []
+            jobBins[rw] = {}
+            for k,v in clat['bins'].items():
+                jobBins[rw][int(k) / 1000.0] = v
+        bins.append(jobBins)
+    return bins
@@ -0,0 +1,279 @@
+''' @package FioResult
+A module holding the parsed result of a fio run.
+'''
+import json
+import numpy as np
+
+from fio import FioParser
+
+class FioResult(object):
+    '''
+    The result of one fio job (or reporting group), a view on one row of the
+    structured array created by FioParser. Latencies are in microseconds,
+    bandwidths in KB/s and total IO in KB.
+    '''
+    ## Completion latency percentiles carried by the tests.
+    percentiles = [50.0,90.0,99.0,99.9,99.99]
+
+    ## Column suffixes of the directions.
+    dirKeys = {'read':'r','write':'w'}
+
+    def __init__(self,row,bins=None):
+        '''
+        Constructor
+        @param row A record of FioParser.resultDtype.
+        @param bins The json+ histograms {'r':{us:count},'w':{us:count}} or None.
+        '''
+        ## The parsed record
+        self.__row = row
+        ## Completion latency histograms per direction
+        self.__bins = bins
+
+    def getName(self): return str(self.__row['jobname'])
+    def getRow(self): return self.__row
+    def getCpu(self): return [float(self.__row['cpu_usr']),float(self.__row['cpu_sys'])]
+
+    def getDir(self,rw):
+        '''
+        Return the values of a direction.
+        @param rw The direction, 'read' or 'write'.
+        @return A dictionary with the keys io,bw,iops,runtime,ios,lat,clat,pct,bins.
+        '''
+        k = FioResult.dirKeys[rw]
+        r = self.__row
+        pct = {}
+        for p,l in zip(FioParser.pctList,r['clat_pct_' + k]):
+            if not np.isnan(l):
+                pct[p] = float(l)
+        return {'io':int(r['io_' + k]),'bw':int(r['bw_' + k]),
+                'iops':int(r['iops_' + k]),'runtime':int(r['runtime_' + k]),
+                'ios':int(r['ios_' + k]),
+                'lat':[float(x) for x in (r['lat_min_' + k],r['lat_max_' + k],r['lat_mean_' + k])],
+                'clat':[float(x) for x in (r['clat_min_' + k],r['clat_max_' + k],r['clat_mean_' + k])],
+                'pct':pct,'bins':self.getClatBins(rw)}
+
+    @staticmethod
+    def isJson(fioOut):
+        ''' Check if a fio output is in json format. '''
+        return fioOut.lstrip().startswith('{') or '\n{' in fioOut
+
+    @staticmethod
+    def loadJson(fioOut):
+        '''
+        Load the json document of a fio output, fio may print notes
+        before the document.
+        @return The decoded json document.
+        '''
+        if not fioOut.lstrip().startswith('{'):
+            fioOut = fioOut[fioOut.index('\n{') + 1:]
+        return json.loads(fioOut)
+
+    @staticmethod
+    def fromOutput(fioOut):
+        '''
+        Parse all records of a fio output.
+        @param fioOut The terse or json output of a fio run.
+        @return A list of FioResult objects, one per record.
+        '''
+        rows = FioParser.parse([fioOut])
+        bins = []
+        if FioResult.isJson(fioOut):
+            bins = FioParser.parseBins(fioOut)
+        if len(bins) != len(rows):
+            bins = [None] * len(rows)
+        return [FioResult(r,b) for r,b in zip(rows,bins)]
+
+    def __dir(self,rw,col):
+        ''' Return a column of a direction as python scalar. '''
+        return self.__row[col + '_' + FioResult.dirKeys[rw]].item()
+
+    def getIOPS(self): return self.getIOPSRead() + self.getIOPSWrite()
+    def getIOPSRead(self): return self.__dir('read','iops')
+    def getIOPSWrite(self): return self.__dir('write','iops')
+    def getTotIOWrite(self): return self.__dir('write','io')
+    def getTPRead(self): return self.__dir('read','bw')
+    def getTPWrite(self): return self.__dir('write','bw')
+    def getReadLats(self): return [self.__dir('read',c) for c in ['lat_min','lat_max','lat_mean']]
+    def getWriteLats(self): return [self.__dir('write',c) for c in ['lat_min','lat_max','lat_mean']]
+
+    def getTotLats(self):
+        ''' Return the summed [min,max,mean] latencies of read and write. '''
+        r = self.getReadLats()
+        w = self.getWriteLats()
+        return [r[0] + w[0],r[1] + w[1],r[2] + w[2]]
+
+    def getClatBins(self,rw):
+        ''' Return the json+ completion latency histogram {us:count} or None. '''
+        if self.__bins == None:
+            return None
+        return self.__bins[FioResult.dirKeys[rw]]
+
+    def getClatPercentiles(self,rw):
+        '''
+        Return the completion latency percentiles of a direction.
+        @param rw The direction, 'read' or 'write'.
+        @return A list of latencies in the order of FioResult.percentiles,
+        None for percentiles fio did not report.
+        '''
+        pct = self.getDir(rw)['pct']
+        return [pct.get(p) for p in FioResult.percentiles]
+
+    def getMixedLats(self):
+        '''
+        Return the [min,max,mean] latencies over both directions. The mean
+        is weighted by the number of IOs of each direction.
+        '''
+        dirs = [d for d in [self.getDir('read'),self.getDir('write')] if d['ios'] > 0]
+        if len(dirs) == 0:
+            return [0.0,0.0,0.0]
+        ios = sum(d['ios'] for d in dirs)
+        return [min(d['lat'][0] for d in dirs),
+                max(d['lat'][1] for d in dirs),
+                sum(d['lat'][2] * d['ios'] for d in dirs) / ios]
+
+    def getMixedPercentiles(self):
+        '''
+        Return the completion latency percentiles over both directions.
+        With json+ the histograms of both directions are merged, else the
+        percentile tables are combined weighted by the IOs per direction.
+        @return A list of latencies in the order of FioResult.percentiles.
+        '''
+        dirs = [d for d in [self.getDir('read'),self.getDir('write')] if d['ios'] > 0]
+        if len(dirs) == 0:
+            return [None] * len(FioResult.percentiles)
+        if len(dirs) == 1:
+            return [dirs[0]['pct'].get(p) for p in FioResult.percentiles]
+        if all(d['bins'] != None for d in dirs):
+            bins = {}
+            for d in dirs:
+                for k,v in d['bins'].items():
+                    bins[k] = bins.get(k,0) + v
+            return FioResult.binPercentiles(bins)
+        return FioResult.mixPercentiles(dirs)
+
+    @staticmethod
+    def binPercentiles(bins,pcts=None):
+        '''
+        Calculate the percentiles of a latency histogram.
+        @param bins A dictionary {latency:count}.
+        @param pcts The percentiles to calculate, None for FioResult.percentiles.
+        @return A list of latencies in the order of pcts.
+        '''
+        total = sum(bins.values())
+        lats = sorted(bins.keys())
+        res = []
+        for p in (pcts or FioResult.percentiles):
+            limit = total * p / 100.0
+            cum = 0
+            val = lats[-1]
+            for l in lats:
+                cum += bins[l]
+                if cum >= limit:
+                    val = l
+                    break
+            res.append(val)
+        return res
+
+    @staticmethod
+    def mixPercentiles(dirs,pcts=None):
+        '''
+        Approximate the percentiles of two directions from their percentile
+        tables. The distribution function of the mix is the IO weighted sum
+        of the distribution functions, interpolated between the table entries.
+        @param dirs The direction dictionaries of the result.
+        @param pcts The percentiles to calculate, None for FioResult.percentiles.
+        @return A list of latencies in the order of pcts.
+        '''
+        ios = float(sum(d['ios'] for d in dirs))
+        def cdf(pct,x):
+            pts = sorted(pct.items(),key=lambda e: e[1])
+            prevP,prevL = 0.0,0.0
+            for p,l in pts:
+                if x <= l:
+                    if l == prevL:
+                        return p
+                    return prevP + (p - prevP) * (x - prevL) / (l - prevL)
+                prevP,prevL = p,l
+            return 100.0
+        cands = sorted(set(l for d in dirs for l in d['pct'].values()))
+        res = []
+        for p in (pcts or FioResult.percentiles):
+            val = None
+            for x in cands:
+                mix = sum(cdf(d['pct'],x) * d['ios'] / ios for d in dirs)
+                if mix >= p:
+                    val = x
+                    break
+            if val == None and len(cands) > 0:
+                val = cands[-1]
+            res.append(val)
+        return res
+
+    @staticmethod
+    def aggregate(results):
+        '''
+        Combine the results of several jobs to the result of their group, as
+        fio reports it with group_reporting. IOs, bandwidths and IOPS are
+        summed, mean latencies are weighted by the IOs of a job, the cpu
+        usage is averaged. The percentiles are taken from the merged json+
+        histograms if available, else they are approximated from the
+        percentile tables of the jobs.
+        @param results A list of FioResult objects of the jobs.
+        @return A FioResult of the group.
+        '''
+        if len(results) == 1:
+            return results[0]
+        rows = np.array([r.getRow() for r in results],dtype=FioParser.resultDtype)
+        row = np.zeros(1,dtype=FioParser.resultDtype)[0]
+        row['jobname'] = rows[0]['jobname']
+        row['groupid'] = rows[0]['groupid']
+        row['cpu_usr'] = rows['cpu_usr'].mean()
+        row['cpu_sys'] = rows['cpu_sys'].mean()
+        bins = {}
+        for rw,k in FioResult.dirKeys.items():
+            for col in ['iops','bw','io','ios']:
+                row[col + '_' + k] = rows[col + '_' + k].sum()
+            row['runtime_' + k] = rows['runtime_' + k].max()
+            act = rows[rows['ios_' + k] > 0]
+            if len(act) == 0:
+                row['clat_pct_' + k] = np.nan
+                bins[k] = None
+                continue
+            ios = act['ios_' + k].astype(float)
+            for lat in ['lat','clat']:
+                row[lat + '_min_' + k] = act[lat + '_min_' + k].min()
+                row[lat + '_max_' + k] = act[lat + '_max_' + k].max()
+                row[lat + '_mean_' + k] = (act[lat + '_mean_' + k] * ios).sum() / ios.sum()
+            dirs = [r.getDir(rw) for r in results if r.getDir(rw)['ios'] > 0]
+            if all(d['bins'] != None for d in dirs):
+                bins[k] = {}
+                for d in dirs:
+                    for l,c in d['bins'].items():
+                        bins[k][l] = bins[k].get(l,0) + c
+                pct = FioResult.binPercentiles(bins[k],FioParser.pctList)
+            else:
+                bins[k] = None
+                pct = FioResult.mixPercentiles(dirs,FioParser.pctList)
+            row['clat_pct_' + k] = [np.nan if l == None else l for l in pct]
+        if bins['r'] == None and bins['w'] == None:
+            bins = None
+        return FioResult(row,bins)
+
+    @staticmethod
+    def imbalance(results):
+        '''
+        Calculate how unequal the jobs of a group performed.
+        @param results A list of FioResult objects of the jobs.
+        @return [max/min job IOPS,max/min job mean latency], None for a
+        single job. A starved job without any IOPS gives an infinite ratio.
+        '''
+        if len(results) < 2:
+            return None
+        def ratio(vals):
+            if max(vals) == 0:
+                return 1.0
+            if min(vals) == 0:
+                return float('inf')
+            return float(max(vals)) / min(vals)
+        return [ratio([r.getIOPS() for r in results]),
+                ratio([r.getMixedLats()[2] for r in results])]
@@ -0,0 +1,80 @@
+''' @package FioServer
+A module realizing a local fio server backend.
+'''
+import subprocess
+import logging
+import tempfile
+import shutil
+import os
+from time import sleep
+
+class FioServer(object):
+    '''
+    A fio server listening on a local unix socket. Jobs are submitted to the
+    server with 'fio --client', therefore the fio process is started only once.
+    '''
+    ## Maximum number of seconds to wait for the server socket.
+    startTimeout = 10
+
+    def __init__(self,fioPath='fio'):
+        '''
+        Constructor
+        @param fioPath Path of the fio executable.
+        '''
+        ## Fio path
+        self.__fioPath = fioPath
+        ## Temporary directory holding the socket
+        self.__sockDir = None
+        ## Path of the unix socket the server is bound to
+        self.__sockPath = None
+        ## The running server process
+        self.__proc = None
+
+    def getSockPath(self): return self.__sockPath
+
+    def getClientArg(self):
+        ''' Return the fio argument to submit jobs to this server. '''
+        return '--client=sock:' + self.__sockPath
+
+    def isRunning(self):
+        ''' Check if the server process is alive. '''
+        return self.__proc != None and self.__proc.poll() == None
+
+    def start(self):
+        '''
+        Start the fio server and wait until its socket is available.
+        @exception RuntimeError if the server could not be started
+        '''
+        if self.isRunning():
+            return
+        self.__sockDir = tempfile.mkdtemp(prefix='tkperf-fio-')
+        self.__sockPath = os.path.join(self.__sockDir,'fio.sock')
+        args = [self.__fioPath,'--server=sock:' + self.__sockPath]
+        logging.info('# Starting fio server: %s',args)
+        self.__proc = subprocess.Popen(args,stdout=subprocess.DEVNULL,stderr=subprocess.DEVNULL)
+        waited = 0
+        while not os.path.exists(self.__sockPath):
+            if self.__proc.poll() != None or waited >= FioServer.startTimeout:
+                logging.error("# Error: fio server did not come up on " + self.__sockPath)
+                self.stop()
+                raise RuntimeError("fio server start error")
+            sleep(0.1)
+            waited += 0.1
+        logging.info("# Fio server running with pid " + str(self.__proc.pid))
+
+    def stop(self):
+        ''' Stop the fio server and remove its socket. '''
+        if self.__proc != None:
+            if self.__proc.poll() == None:
+                self.__proc.terminate()
+                try:
+                    self.__proc.wait(FioServer.startTimeout)
+                except subprocess.TimeoutExpired:
+                    self.__proc.kill()
+                    self.__proc.wait()
+            logging.info("# Stopped fio server with pid " + str(self.__proc.pid))
+            self.__proc = None
+        if self.__sockDir != None:
+            shutil.rmtree(self.__sockDir,ignore_errors=True)
+            self.__sockDir = None
+            self.__sockPath = None
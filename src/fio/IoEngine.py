@@ -0,0 +1,136 @@
+''' @package IoEngine
+A module selecting and tuning the fio ioengine of the tests.
+'''
+import logging
+
+from fio.FioJob import FioJob
+from fio.FioJobSpec import FioJobSpec
+from system.Tools import ToolRegistry
+
+class IoEngine(object):
+    '''
+    A fio ioengine with its tuning options. Every engine has a set of
+    tuning options it accepts, a subset of them is applied to the fio
+    jobs. The engines can be probed on the device to pick the one with
+    the most 4k random read IOPS per used core. A synchronous engine keeps
+    one IO outstanding, it is only a candidate if the tests run at iodepth 1.
+    '''
+    ## Engines and the tuning options they accept.
+    tunings = {'libaio':['userspace_reap'],
+               'io_uring':['fixedbufs','registerfiles','sqthread_poll','hipri'],
+               'psync':[],
+               'pvsync2':['hipri']}
+
+    ## Tuning options applied if none are given. Polling options (hipri,
+    ## sqthread_poll) need poll queues of the device or burn a core, so
+    ## they are only used on request.
+    defaultTunings = {'io_uring':['fixedbufs','registerfiles']}
+
+    ## Engines keeping more than one IO outstanding per job.
+    asyncEngines = ['libaio','io_uring']
+
+    ## Runtime in seconds of the probe of one engine.
+    probeRuntime = 5
+
+    ## Iodepth of the probe for asynchronous engines.
+    probeIod = 32
+
+    def __init__(self,name='libaio',tuning=None):
+        '''
+        Constructor
+        @param name The fio ioengine.
+        @param tuning A list of tuning options of the engine, None for the defaults.
+        @exception RuntimeError if the engine or a tuning option is unknown.
+        '''
+        if name not in IoEngine.tunings:
+            logging.error("# Error: unknown ioengine " + str(name))
+            raise RuntimeError("unknown ioengine")
+        if tuning == None:
+            tuning = IoEngine.defaultTunings.get(name,[])
+        for t in tuning:
+            if t not in IoEngine.tunings[name]:
+                logging.error("# Error: tuning option " + t + " is not valid for ioengine " + name)
+                raise RuntimeError("invalid ioengine tuning")
+        ## Name of the engine
+        self.__name = name
+        ## Tuning options applied to the jobs
+        self.__tuning = list(tuning)
+
+    def getName(self): return self.__name
+    def getTuning(self): return self.__tuning
+
+    def isAsync(self):
+        ''' Check if the engine keeps more than one IO outstanding per job. '''
+        return self.__name in IoEngine.asyncEngines
+
+    def isAvailable(self):
+        ''' Check if the installed fio supports the engine. '''
+        return ToolRegistry.hasCap('fio','engine:' + self.__name)
+
+    def apply(self,job):
+        '''
+        Set the engine and its tuning options for a fio job.
+        @param job The FioJob to set the engine for.
+        '''
+        job.addKVArg("ioengine",self.__name)
+        for t in self.__tuning:
+            job.addSglArg(t)
+
+    def applySpec(self,spec):
+        '''
+        Derive a spec using the engine and its tuning options.
+        @param spec A FioJobSpec.
+        @return A new FioJobSpec.
+        '''
+        return spec.with_(ioengine=self.__name).withSgl(*self.__tuning)
+
+    @staticmethod
+    def probe(devPath,names=None,iod=1):
+        '''
+        Run a short 4k random read on the device with every available
+        engine and pick the one with the most IOPS per used core. The
+        probe only reads from the device.
+        @param devPath The device to probe.
+        @param names The engines to probe, None for all known engines.
+        @param iod The iodepth of the tests, above 1 only asynchronous engines are probed.
+        @return [name of the fastest engine,{name:[IOPS,cpu usage in %,IOPS per core]},
+        reason of the choice]
+        @exception RuntimeError if no engine could be probed.
+        '''
+        names = names or sorted(IoEngine.tunings.keys())
+        reason = "most IOPS per core"
+        #a synchronous engine would cap the queue depth of the tests at 1
+        if iod > 1:
+            names = [n for n in names if n in IoEngine.asyncEngines]
+            reason += " of the asynchronous engines, the tests use iodepth " + str(iod)
+        results = {}
+        for name in names:
+            engine = IoEngine(name)
+            if not engine.isAvailable():
+                logging.info("# Ioengine " + name + " not supported by fio, skipping probe")
+                continue
+            iod = IoEngine.probeIod if engine.isAsync() else 1
+            spec = FioJobSpec({'filename':devPath,'name':'probe-' + name,'rw':'randread',
+                               'bs':'4k','direct':'1','numjobs':'1','iodepth':str(iod),
+                               'runtime':str(IoEngine.probeRuntime)},
+                              ['minimal','time_based','group_reporting','readonly'])
+            job = FioJob()
+            job.initialize()
+            call,out = job.start(engine.applySpec(spec))
+            if call == False:
+                logging.error("# Probe of ioengine " + name + " failed")
+                continue
+            res = job.getResult(out)
+            cpu = sum(res.getCpu())
+            iops = res.getIOPS()
+            #the cpu usage of one job is the share of one core
+            perCore = iops / (cpu / 100.0) if cpu > 0 else float(iops)
+            results[name] = [iops,cpu,perCore]
+            logging.info("# Probe of ioengine " + name + ": " + str(iops) + " IOPS, "
+                         + str(cpu) + "% cpu, " + str(round(perCore)) + " IOPS per core")
+        if len(results) == 0:
+            logging.error("# Error: no ioengine could be probed on " + devPath)
+            raise RuntimeError("ioengine probe error")
+        best = max(results.keys(),key=lambda n: results[n][2])
+        logging.info("# Selected ioengine " + best + ": " + reason)
+        return [best,results,reason]
@@ -0,0 +1,399 @@
+'''
+Fits the tests of a performance test into a time budget.
+'''
+
+import logging
+import copy
+import json
+import re
+import time
+
+class Budget(object):
+    '''
+    Allocates the rounds, the fio runtime and the matrix sizes of the tests
+    out of a time budget. The durations are estimated by the Plan of the
+    tests, calibrated with previous results of the device model and the
+    measured timings of the run. Before each test the remaining tests are
+    planned again: they start from their original settings and are reduced
+    step by step until the estimate fits the remaining time. After each round
+    the tests following the running one are planned again, the running test
+    keeps its settings. Optional parts are reduced before tests are skipped:
+
+    1. the random distribution and open loop matrices
+    2. the matrix to the core block sizes and mixes of the test
+    3. the fio runtime, down to minRuntime
+    4. the rounds, down to the steady state window or minRounds
+
+    Within a step the tests of skipOrder are reduced first. A reduction not
+    lowering the estimate is undone. Every reduction is recorded for the report.
+    '''
+    ## Weight of the worst case in an estimate, 0 plans with the best case.
+    worstWeight = 0.5
+    ## Shortest fio runtime in seconds the budget reduces to.
+    minRuntime = 20
+    ## Fewest rounds of a test without steady state the budget reduces to.
+    minRounds = 8
+    ## Tests reduced and skipped first, the least important first.
+    skipOrder = ['writesat','tp','lat','iops']
+    ## The reduction steps in their order.
+    steps = ['extras','matrix','runtime','rounds']
+
+    def __init__(self,seconds):
+        '''
+        Constructor
+        @param seconds The time budget in seconds.
+        '''
+        ## The budget in seconds
+        self.__seconds = seconds
+        ## Start time of the tests, None before they are started
+        self.__start = None
+        ## Seconds used by the tests, set when they are done
+        self.__used = None
+        ## The calibrated plan the estimates are made with
+        self.__plan = None
+        ## Original settings of the tests {key:{options,bs,mixes,maxRnds}}
+        self.__original = {}
+        ## Reductions per test {key:[{what,from,to}]}
+        self.__reductions = {}
+        ## Keys of the skipped tests
+        self.__skipped = []
+        ## Keys of the tests whose timings calibrate the plan
+        self.__measured = []
+        ## Every planning {phase,elapsed,remaining,estimate}
+        self.__replans = []
+        ## The running test {key,start,estimate}, start and estimate in seconds
+        self.__running = None
+
+    def getSeconds(self): return self.__seconds
+    def getUsed(self): return self.__used
+    def getReductions(self): return self.__reductions
+    def getSkipped(self): return self.__skipped
+    def getReplans(self): return self.__replans
+
+    @staticmethod
+    def parse(budget):
+        '''
+        Parse a time budget, e.g. "12h", "90m", "45s" or seconds.
+        @return The budget in seconds.
+        @exception RuntimeError if the budget is not valid.
+        '''
+        match = re.match(r'^\s*(\d+(?:\.\d+)?)\s*([hms]?)\s*$',str(budget))
+        if match == None or float(match.group(1)) <= 0:
+            logging.error("# Error: invalid time budget " + str(budget) + ", use e.g. 12h, 90m or 3600")
+            raise RuntimeError("invalid time budget " + str(budget))
+        factor = {'h':3600,'m':60,'s':1,'':1}[match.group(2)]
+        return int(float(match.group(1)) * factor)
+
+    def isSkipped(self,key):
+        ''' Check if a test is skipped to keep the budget. '''
+        return key in self.__skipped
+
+    def getElapsed(self):
+        ''' Return the seconds since the tests were started. '''
+        if self.__start == None:
+            return 0
+        return time.time() - self.__start
+
+    def done(self):
+        ''' Record the used time once all tests are done. '''
+        self.__used = int(self.getElapsed())
+        logging.info("# Used " + str(self.__used) + " of " + str(self.__seconds) + " seconds of the time budget")
+
+    def settings(self,test):
+        ''' Return the settings of a test the budget may reduce. '''
+        s = {'options':copy.copy(test.getOptions()),'mixes':list(test.getMixWlds()),
+             'maxRnds':test.getMaxRnds()}
+        if hasattr(test,'setBsLabels'):
+            s['bs'] = list(test.getBsLabels())
+        return s
+
+    def restore(self,test,s):
+        '''
+        Set settings to a test, cf. settings().
+        @param test The DeviceTest.
+        @param s The settings.
+        '''
+        test.setOptions(copy.copy(s['options']))
+        test.setMixWlds(s['mixes'])
+        test.setMaxRnds(s['maxRnds'])
+        if 'bs' in s:
+            test.setBsLabels(s['bs'])
+        #the fio job got the runtime when the test was initialized
+        if test.getOptions() != None and test.getOptions().getRuntime() != None:
+            test.getFioJob().addKVArg("runtime",str(test.getOptions().getRuntime()))
+
+    def estimate(self,perfTest,keys):
+        '''
+        Estimate the seconds of tests, between best and worst case by worstWeight.
+        @param perfTest The PerfTest.
+        @param keys The keys of the tests.
+        '''
+        plan = self.__plan
+        plan.clearPhases()
+        tests = perfTest.getTests()
+        for k in keys:
+            if k in self.__skipped:
+                continue
+            plan.setOptions(tests[k].getOptions())
+            tests[k].plan(plan,k)
+        total = plan.getTotal()
+        return total[0] + Budget.worstWeight * (total[1] - total[0])
+
+    def reduce(self,perfTest,key,step,estimate,keys,quiet=False):
+        '''
+        Apply a reduction step to a test, it is undone if the estimate
+        doesn't get lower.
+        @param perfTest The PerfTest.
+        @param key The key of the test.
+        @param step The reduction step, cf. Budget.steps.
+        @param estimate The current estimate of the tests.
+        @param keys The keys of the tests to estimate.
+        @param quiet If the reduction is not logged.
+        @return The new estimate.
+        '''
+        test = perfTest.getTests()[key]
+        before = self.settings(test)
+        o = test.getOptions()
+        changes = []
+        if step == 'extras':
+            if o.getDistributions() != None:
+                changes.append({'what':'random distributions','from':o.getDistributions(),'to':None})
+                o.setDistributions(None)
+            if o.getLoadRates() != None:
+                changes.append({'what':'open loop loads','from':o.getLoadRates(),'to':None})
+                o.setLoadRates(None)
+        if step == 'matrix':
+            if type(test).coreBsLabels != None and 'bs' in before:
+                track = test.getTrackCell()
+                bs = [b for b in before['bs'] if b in type(test).coreBsLabels or (track != None and b == track[1])]
+                if len(bs) < len(before['bs']):
+                    changes.append({'what':'block sizes','from':before['bs'],'to':bs})
+                    test.setBsLabels(bs)
+            if type(test).coreMixWlds != None:
+                track = test.getTrackCell()
+                mixes = [m for m in before['mixes'] if m in type(test).coreMixWlds or (track != None and m == track[0])]
+                if len(mixes) < len(before['mixes']):
+                    changes.append({'what':'workload mixes','from':before['mixes'],'to':mixes})
+                    test.setMixWlds(mixes)
+        if step == 'runtime':
+            rt = o.getRuntime()
+            if rt != None and rt > Budget.minRuntime:
+                changes.append({'what':'fio runtime','from':rt,'to':None})
+        if step == 'rounds':
+            if hasattr(test,'getStdyState'):
+                rnds = o.getTestRnds()
+                floor = test.getStdyState().getWindow()
+            else:
+                rnds = test.getMaxRnds()
+                floor = Budget.minRounds
+            if rnds != None and rnds > floor:
+                changes.append({'what':'maximum rounds','from':rnds,'to':None})
+        if len(changes) == 0:
+            return estimate
+        newEstimate = self.estimate(perfTest,keys)
+        #runtime and rounds are halved until the estimate fits
+        if step in ['runtime','rounds']:
+            value = changes[0]['from']
+            floor = Budget.minRuntime if step == 'runtime' else floor
+            remaining = self.__seconds - self.getElapsed()
+            while value > floor and (newEstimate > remaining or value == changes[0]['from']):
+                value = max(floor,value // 2)
+                if step == 'runtime':
+                    o.setRuntime(value)
+                    test.getFioJob().addKVArg("runtime",str(value))
+                elif hasattr(test,'getStdyState'):
+                    o.setTestRnds(value)
+                else:
+                    test.setMaxRnds(value)
+                newEstimate = self.estimate(perfTest,keys)
+            changes[0]['to'] = value
+        else:
+            test.setOptions(o)
+            newEstimate = self.estimate(perfTest,keys)
+        if newEstimate >= estimate:
+            self.restore(test,before)
+            return estimate
+        self.__reductions.setdefault(key,[]).extend(changes)
+        if not quiet:
+            Budget.logReductions(key,changes)
+        return newEstimate
+
+    @staticmethod
+    def logReductions(key,changes):
+        ''' Log the reductions of a test. '''
+        for c in changes:
+            logging.info("# Time budget: reducing " + c['what'] + " of test " + key + " from "
+                         + str(c['from']) + " to " + str(c['to']))
+
+    def planning(self,keys):
+        ''' Return what is reduced and skipped of tests, to compare plannings. '''
+        return {k:json.dumps([self.__reductions.get(k),k in self.__skipped]) for k in keys}
+
+    def logChanges(self,keys,before):
+        '''
+        Log the tests whose planning changed.
+        @param keys The keys of the planned tests.
+        @param before The planning of the tests before, cf. planning().
+        @return True if a planning changed.
+        '''
+        after = self.planning(keys)
+        changed = [k for k in keys if after[k] != before.get(k)]
+        for k in changed:
+            if k in self.__skipped:
+                logging.warning("# Time budget: skipping test " + k)
+            elif k in self.__reductions:
+                Budget.logReductions(k,self.__reductions[k])
+            else:
+                logging.info("# Time budget: test " + k + " is run in full")
+        return len(changed) > 0
+
+    def begin(self,perfTest):
+        '''
+        Start the budget and calibrate the plan with the timings of the tests
+        done so far: an erase, a preconditioning or a fio run of this run
+        tells about all tests.
+        @param perfTest The PerfTest.
+        '''
+        tests = perfTest.getTests()
+        if self.__start == None:
+            self.__start = time.time()
+        if self.__plan == None:
+            self.__plan = perfTest.newPlan()
+        for d in perfTest.getDoneTests():
+            if d in self.__measured or d not in tests:
+                continue
+            calib = tests[d].calibration()
+            for k in tests:
+                for name in ['erase','precondition','overhead']:
+                    self.__plan.addValues(k,name,calib[name])
+            self.__measured.append(d)
+
+    def fit(self,perfTest,keys,remaining,quiet=False):
+        '''
+        Reduce and skip tests until their estimate fits the remaining time.
+        The tests start from their original settings.
+        @param perfTest The PerfTest.
+        @param keys The keys of the tests to plan.
+        @param remaining The seconds left for the tests.
+        @param quiet If the reductions and skipped tests are not logged.
+        @return The estimate of the tests.
+        '''
+        tests = perfTest.getTests()
+        for k in keys:
+            if k not in self.__original:
+                tests[k].setOptions(copy.copy(tests[k].getOptions()))
+                self.__original[k] = self.settings(tests[k])
+            self.restore(tests[k],self.__original[k])
+            self.__reductions.pop(k,None)
+            if k in self.__skipped:
+                self.__skipped.remove(k)
+        estimate = self.estimate(perfTest,keys)
+        if not self.__plan.isComplete() and not quiet:
+            logging.warning("# Time budget: the device size is unknown, phases depending on it are not estimated")
+        order = [k for k in Budget.skipOrder if k in keys] + [k for k in keys if k not in Budget.skipOrder]
+        for step in Budget.steps:
+            for k in order:
+                if estimate <= remaining:
+                    break
+                estimate = self.reduce(perfTest,k,step,estimate,keys,quiet)
+        #skip tests only if reducing them is not enough, the most important of all tests is run anyway
+        allKeys = list(tests.keys())
+        keep = ([k for k in Budget.skipOrder if k in allKeys] + [k for k in allKeys if k not in Budget.skipOrder])[-1]
+        for k in order:
+            if k == keep:
+                continue
+            if estimate <= remaining:
+                break
+            self.__skipped.append(k)
+            if not quiet:
+                logging.warning("# Time budget: skipping test " + k)
+            estimate = self.estimate(perfTest,keys)
+        return estimate
+
+    def allocate(self,perfTest,key):
+        '''
+        Plan the tests from a test on to fit the remaining budget, called
+        before each test. Timings of the tests done so far calibrate the plan.
+        @param perfTest The PerfTest.
+        @param key The key of the next test.
+        '''
+        self.begin(perfTest)
+        keys = list(perfTest.getTests().keys())
+        keys = keys[keys.index(key):]
+        remaining = self.__seconds - self.getElapsed()
+        #the planning of a test is logged the first time and when it changes
+        before = self.planning(keys) if len(self.__replans) > 0 else {}
+        estimate = self.fit(perfTest,keys,remaining,True)
+        self.logChanges(keys,before)
+        if not self.__plan.isComplete() and len(before) == 0:
+            logging.warning("# Time budget: the device size is unknown, phases depending on it are not estimated")
+        self.__running = {'key':key,'start':int(self.getElapsed()),
+                          'estimate':int(self.estimate(perfTest,[key]))}
+        self.__replans.append({'phase':'test ' + key,'elapsed':int(self.getElapsed()),
+                               'remaining':int(remaining),'estimate':int(estimate)})
+        logging.info("# Time budget: " + str(int(remaining)) + " seconds left, estimated "
+                     + str(int(estimate)) + " seconds for the tests " + ', '.join(keys))
+        if estimate > remaining:
+            logging.warning("# Time budget: the tests don't fit into the remaining time even if reduced")
+
+    def resumeTest(self,perfTest,key):
+        '''
+        Continue the budget with a test resumed from a checkpoint, the test
+        keeps the settings it was started with.
+        @param perfTest The PerfTest.
+        @param key The key of the resumed test.
+        '''
+        self.begin(perfTest)
+        if self.__running == None or self.__running['key'] != key:
+            self.__running = {'key':key,'start':int(self.getElapsed()),
+                              'estimate':int(self.estimate(perfTest,[key]))}
+
+    def update(self,perfTest,key,rnd):
+        '''
+        Plan the tests following the running test again after one of its
+        rounds. The running test is estimated to need its planned seconds
+        minus the seconds it has run, at least nothing. A planning is only
+        recorded and logged if it changes what is reduced or skipped.
+        @param perfTest The PerfTest.
+        @param key The key of the running test.
+        @param rnd The number of the finished round.
+        '''
+        keys = list(perfTest.getTests().keys())
+        keys = keys[keys.index(key) + 1:]
+        if self.__plan == None or self.__running == None or len(keys) == 0:
+            return
+        ran = self.getElapsed() - self.__running['start']
+        remaining = self.__seconds - self.getElapsed() - max(0,self.__running['estimate'] - ran)
+        before = self.planning(keys)
+        estimate = self.fit(perfTest,keys,remaining,True)
+        if self.planning(keys) != before:
+            self.__replans.append({'phase':'round ' + str(rnd + 1) + ' of test ' + key,
+                                   'elapsed':int(self.getElapsed()),'remaining':int(remaining),
+                                   'estimate':int(estimate)})
+            logging.info("# Time budget: after round " + str(rnd) + " of test " + key + " "
+                         + str(int(remaining)) + " seconds are left for the tests " + ', '.join(keys))
+            self.logChanges(keys,before)
+
+    def toDict(self):
+        ''' Return the budget and what it reduced as dictionary, e.g. for the xml. '''
+        return {'seconds':self.__seconds,'used':self.__used,'reductions':self.__reductions,
+                'skipped':self.__skipped,'replans':self.__replans,
+                'elapsed':int(self.getElapsed()) if self.__start != None else None,
+                'running':self.__running}
+
+    @staticmethod
+    def fromDict(d):
+        '''
+        Create a budget out of a dictionary of toDict(). The seconds elapsed
+        before, e.g. in an interrupted run, count as used.
+        @return The Budget.
+        '''
+        budget = Budget(d['seconds'])
+        budget.__used = d['used']
+        budget.__reductions = d['reductions']
+        budget.__skipped = d['skipped']
+        budget.__replans = d['replans']
+        budget.__running = d.get('running')
+        if d.get('elapsed') != None:
+            budget.__start = time.time() - d['elapsed']
+        return budget
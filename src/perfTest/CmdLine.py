@@ -0,0 +1,100 @@
+'''
+The command line of tkperf, shared with tkperfd which checks the options of
+submitted jobs with it.
+'''
+
+import argparse
+
+from perfTest.PerfTest import __version__
+
+def tkperfParser():
+    '''
+    Create the argument parser of tkperf. Options must be given in full, an
+    abbreviation could be read as another option than a check expects.
+    @return The argparse.ArgumentParser.
+    '''
+    parser = argparse.ArgumentParser(prog='tkperf',allow_abbrev=False)
+    parser.add_argument("mode", help="specify the test mode for the device", choices=["hdd","ssd","raid"])
+    parser.add_argument("testname",help="name of the performance tests, corresponds to the result output filenames")
+    parser.add_argument("device",help="device to run fio test on, several devices are tested concurrently, each as DEVICE or DEVICE:TESTNAME",
+                        nargs='+')
+
+    parser.add_argument("-v","--version", help="get the version information", action='version',version="TKperf Version: " + __version__)
+    parser.add_argument("-d","--debug", help="get detailed debug information",action ='store_true')
+    parser.add_argument("-q","--quiet", help="turn off logging of info messages",action ='store_true')
+    parser.add_argument("-nj","--numjobs",help="specify number of jobs for fio",type=int)
+    parser.add_argument("-iod","--iodepth",help="specify iodepth used by fio",type=int)
+    parser.add_argument("-rt","--runtime",help="specify the fio runtime of one test round, if not set this is 60 seconds",type=int)
+    parser.add_argument("-trp","--tpramptime",help="specify the fio ramp_time of the first throughput write test round, if not set this is 30 seconds",type=int)
+    parser.add_argument("-tr","--testrnds",help="specify the maximum number of test rounds in a test, if not set this is 25 rounds",type=int)
+    parser.add_argument("-i","--interface",help="specify optional device interface",choices=["sas","nvme","fusion","usb","sdcard","compactflash"])
+    parser.add_argument("-xml","--fromxml",help="don't run tests but load test objects from xml file",
+                        action='store_true')
+    parser.add_argument("-rfb","--refill_buffers",help="use Fio's refill buffers option to circumvent any compression of devices",
+                        action='store_true')
+    parser.add_argument("-dsc","--desc_file",help="use a description file for the tested device if hdparm doesn't work correctly",
+                        type=argparse.FileType('r'))
+    parser.add_argument("-c","--config",help="specify the config file for a raid device",
+                        type=argparse.FileType('r'))
+    parser.add_argument("-ft","--force_test",help="skip checks if the used device is mounted, don't print warnings and force starting the test",
+                        action='store_true')
+    parser.add_argument("-fm","--feature_matrix",help="add a feature matrix of the given device to the report",
+                        type=argparse.FileType('r'))
+    parser.add_argument("-hddt","--hdd_type",help="choose which tests are run",
+                        choices=['iops','tp'],action='append',dest='hddt')
+    parser.add_argument("-ssdt","--ssd_type",help="choose which tests are run",
+                        choices=['iops','lat','tp','writesat'],action='append',dest='ssdt')
+    parser.add_argument("-fs","--fio_server",help="start a local fio server once per test and submit all rounds to it",
+                        action='store_true')
+    parser.add_argument("-br","--batch_rounds",help="run all workload/block size combinations of a round with one fio invocation",
+                        action='store_true')
+    parser.add_argument("-of","--output_format",help="specify the fio output format, json+ adds completion latency histograms",
+                        choices=['terse','json','json+'])
+    parser.add_argument("-il","--interval_log",help="let fio log bandwidth, IOPS and latency every MSEC milliseconds",
+                        type=int,metavar="MSEC")
+    parser.add_argument("-ar","--adaptive_runtime",help="end a fio run early as soon as its throughput has converged, the runtime is the maximum",
+                        action='store_true')
+    parser.add_argument("-arm","--adaptive_min",help="minimum runtime in seconds of an adaptive fio run (default 20)",type=int)
+    parser.add_argument("-arw","--adaptive_window",help="window in seconds to check the throughput convergence (default 10)",type=int)
+    parser.add_argument("-arc","--adaptive_cv",help="coefficient of variation below which a run has converged (default 0.02)",type=float)
+    parser.add_argument("-pj","--per_job",help="report every fio job on its own and flag cells with unequally performing jobs",
+                        action='store_true')
+    parser.add_argument("-ibt","--imbalance_threshold",help="ratio of max/min job IOPS or latency above which a cell is flagged (default 1.5)",
+                        type=float)
+    parser.add_argument("-lr","--load_rates",help="additionally run the latency matrix open loop with poisson arrivals at each offered load",
+                        type=int,nargs='+',metavar="IOPS")
+    parser.add_argument("-lri","--load_iodepth",help="iodepth of the open loop runs, the headroom for arriving requests (default 32)",type=int)
+    parser.add_argument("-rd","--random_dist",help="additionally run the IOPS matrix with each fio random_distribution, e.g. zipf:1.2 pareto:0.9 normal",
+                        nargs='+',metavar="DIST")
+    parser.add_argument("-ioe","--ioengine",help="specify the fio ioengine used by all tests (default libaio)",
+                        choices=['libaio','io_uring','psync','pvsync2'])
+    parser.add_argument("-iet","--engine_tuning",help="tuning options of the ioengine, e.g. fixedbufs registerfiles sqthread_poll hipri for io_uring",
+                        nargs='*',metavar="OPT")
+    parser.add_argument("-iep","--engine_probe",help="probe the ioengines with a short read only 4k random read and use the one with most IOPS per core",
+                        action='store_true')
+    parser.add_argument("-pin","--pinning",help="pin the fio jobs to the cpus of the device's NUMA node or to the cpus handling its queue interrupts",
+                        choices=['none','numa','irq'])
+    parser.add_argument("-tf","--track_first",help="run only the steady state tracking cell of the IOPS and latency tests until it is steady, then the full matrix for the measurement window",
+                        action='store_true')
+    parser.add_argument("-res","--resume",help="continue an interrupted run at the round following its checkpoint 'testname.checkpoint.xml'",
+                        action='store_true')
+    parser.add_argument("-pl","--plan",help="don't run tests but estimate their duration, fio runs and written bytes per phase",
+                        action='store_true')
+    parser.add_argument("-plx","--plan_xml",help="calibrate the estimate with these result files instead of the ones of the same device model in the current directory",
+                        nargs='+',metavar="XML")
+    parser.add_argument("-pf","--plan_file",help="json or yaml file defining per test the block sizes, mixes, rounds, runtime and steady state tracking",
+                        metavar="FILE")
+    parser.add_argument("-bu","--budget",help="fit the tests into a time budget, e.g. 12h, 90m or seconds: the matrices, runtimes and rounds are reduced as needed and tests only skipped as last resort",
+                        metavar="TIME")
+    parser.add_argument("-qh","--quiesce_hold",help="seconds the device has to be idle before erases and tests (default 5)",type=int)
+    parser.add_argument("-qm","--quiesce_max",help="maximum seconds to wait for an idle device, 0 for no limit (default 300)",type=int)
+    parser.add_argument("-na","--no_archive",help="don't keep the raw fio outputs in the archive 'testname.archive'",
+                        action='store_true')
+    parser.add_argument("-rp","--reparse",help="don't run tests but rebuild the results of the xml file out of the archived fio outputs",
+                        action='store_true')
+    parser.add_argument("-par","--parallel",help="maximum number of devices tested at the same time (default all given devices)",
+                        type=int)
+    parser.add_argument("-m","--mail",help="Send reports or errors to mail address, needs -s to be set")
+    parser.add_argument("-s","--smtp",help="Use the specified smtp server to send mails, uses port 25 to connect")
+    parser.add_argument("-g","--gen_report",help="Set and specify command to generate pdf report, e.g. rst2pdf")
+    return parser
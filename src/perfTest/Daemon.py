@@ -0,0 +1,580 @@
+'''
+The job queue of the tkperfd service and its HTTP API on a Unix socket.
+'''
+
+import contextlib
+import io
+import logging
+import http.server
+import json
+import mimetypes
+import os
+import re
+import signal
+import socketserver
+import subprocess
+import time
+import uuid
+
+from reports.RoundLog import RoundLog
+from perfTest.CmdLine import tkperfParser
+
+class Job(object):
+    '''
+    A submitted performance test of one device. A job is run by a tkperf
+    process in its own directory, which holds the log, xml, archive, round
+    log, plots and report of the test.
+    '''
+    ## States a job doesn't leave anymore.
+    finalStates = ['done','failed','cancelled']
+
+    def __init__(self,spec,jobId=None):
+        '''
+        Constructor
+        @param spec The submission, a dictionary {mode,testname,device,args,plan,desc,budget}.
+        @param jobId The id of the job, None for a new one.
+        '''
+        ## Id of the job, the name of its directory
+        self.__id = jobId or uuid.uuid4().hex[:12]
+        ## The submission
+        self.__spec = spec
+        ## One of queued, running, done, failed or cancelled
+        self.__state = 'queued'
+        ## Times of the submission, the start and the end
+        self.__times = {'submitted':time.time(),'started':None,'finished':None}
+        ## Process id of the running tkperf
+        self.__pid = None
+        ## Start of the tkperf process, tells it from a later process with the same pid
+        self.__procStart = None
+        ## Exit code of tkperf
+        self.__returncode = None
+        ## Why a job failed or was cancelled
+        self.__message = ''
+
+    def getId(self): return self.__id
+    def getSpec(self): return self.__spec
+    def getState(self): return self.__state
+    def setState(self,state): self.__state = state
+    def getTimes(self): return self.__times
+    def getPid(self): return self.__pid
+    def setPid(self,pid): self.__pid = pid
+    def getProcStart(self): return self.__procStart
+    def setProcStart(self,start): self.__procStart = start
+    def getReturncode(self): return self.__returncode
+    def setReturncode(self,rc): self.__returncode = rc
+    def getMessage(self): return self.__message
+    def setMessage(self,msg): self.__message = msg
+    def getDevice(self): return self.__spec['device']
+    def getTestname(self): return self.__spec['testname']
+
+    def isFinished(self):
+        ''' Check if the job is done, failed or cancelled. '''
+        return self.__state in Job.finalStates
+
+    def toDict(self):
+        ''' Return the job as dictionary, e.g. for the state file and the API. '''
+        return {'id':self.__id,'spec':self.__spec,'state':self.__state,'times':self.__times,
+                'pid':self.__pid,'procstart':self.__procStart,'returncode':self.__returncode,
+                'message':self.__message}
+
+    @staticmethod
+    def fromDict(d):
+        '''
+        Create a job out of a dictionary of toDict().
+        @return The Job.
+        '''
+        job = Job(d['spec'],d['id'])
+        job.__state = d['state']
+        job.__times = d['times']
+        job.__pid = d['pid']
+        job.__procStart = d.get('procstart')
+        job.__returncode = d['returncode']
+        job.__message = d['message']
+        return job
+
+class JobQueue(object):
+    '''
+    Queues the submitted jobs per device and runs them, one job per device
+    at a time and jobs of different devices concurrently. Devices are
+    compared by their real path, a device given by two names is still
+    locked. The jobs are kept in 'tkperfd.jobs.json' in the working
+    directory, after a restart of the daemon running tkperf processes are
+    watched again and the queue is continued.
+    '''
+    ## Test modes a job may use.
+    modes = ['ssd','hdd']
+
+    ## Options of tkperf, by their dest, set by the daemon itself, not running
+    ## a test, skipping its checks or reading and running files of the host.
+    reservedArgs = ['fromxml','reparse','plan','plan_xml','plan_file','desc_file','budget',
+                    'force_test','config','feature_matrix','gen_report']
+
+    def __init__(self,workdir,tkperf):
+        '''
+        Constructor
+        @param workdir Directory of the state file and the job directories.
+        @param tkperf The command starting tkperf, a list.
+        '''
+        ## Directory of the state file and the job directories
+        self.__workdir = os.path.abspath(workdir)
+        ## The command starting tkperf
+        self.__tkperf = tkperf
+        ## The jobs in the order of their submission
+        self.__jobs = []
+        ## The processes of the jobs started by this daemon {id:Popen}
+        self.__procs = {}
+        ## Ids of the cancelled jobs whose tkperf may not have exited yet
+        self.__stopping = []
+        self.load()
+
+    def getWorkdir(self): return self.__workdir
+    def getJobs(self): return self.__jobs
+    def getStatePath(self): return os.path.join(self.__workdir,'tkperfd.jobs.json')
+
+    def getJob(self,jobId):
+        ''' Return the job of an id, None if it is unknown. '''
+        for job in self.__jobs:
+            if job.getId() == jobId:
+                return job
+        return None
+
+    def getJobDir(self,job):
+        ''' Return the directory of a job. '''
+        return os.path.join(self.__workdir,'jobs',job.getId())
+
+    @staticmethod
+    def procStart(pid):
+        '''
+        Return the start of a process: the boot id and the start time in
+        clock ticks since the boot, field 22 of /proc/PID/stat.
+        @param pid The process id.
+        @return The start as string, None if the process doesn't exist.
+        '''
+        try:
+            with open('/proc/sys/kernel/random/boot_id') as f:
+                bootId = f.read().strip()
+            with open('/proc/' + str(pid) + '/stat') as f:
+                stat = f.read()
+        except (OSError,IOError):
+            return None
+        #the name of the process in field 2 may contain spaces, fields 3 on follow it
+        return bootId + ':' + stat[stat.rfind(')') + 2:].split()[19]
+
+    @staticmethod
+    def devKey(device):
+        ''' Return the key a device is locked with, its real path. '''
+        return os.path.realpath(device)
+
+    def load(self):
+        ''' Read the jobs of a previous run of the daemon. '''
+        if not os.path.exists(self.getStatePath()):
+            return
+        with open(self.getStatePath()) as f:
+            self.__jobs = [Job.fromDict(d) for d in json.load(f)]
+        #a job cancelled by a previous run of the daemon may still be stopping
+        self.__stopping = [j.getId() for j in self.__jobs if j.getState() == 'cancelled' and j.getPid() != None]
+        logging.info("# Loaded " + str(len(self.__jobs)) + " jobs of " + self.getStatePath())
+
+    def save(self):
+        ''' Write the jobs to the state file, it is replaced atomically. '''
+        tmpPath = self.getStatePath() + '.tmp'
+        with open(tmpPath,'w') as f:
+            json.dump([j.toDict() for j in self.__jobs],f,indent=4)
+        os.replace(tmpPath,self.getStatePath())
+
+    def submit(self,spec):
+        '''
+        Check a submission and queue it.
+        @param spec A dictionary {mode,testname,device,args,plan,desc,budget}:
+        args are further tkperf options, plan a workload plan dictionary,
+        desc the description of the device and budget a time budget, these
+        are optional.
+        @return The queued Job.
+        @exception RuntimeError if the submission is not valid.
+        '''
+        def invalid(msg):
+            logging.error("# Error: invalid job submission: " + msg)
+            raise RuntimeError(msg)
+        if not isinstance(spec,dict):
+            invalid("a job must be a dictionary")
+        unknown = [k for k in spec if k not in ['mode','testname','device','args','plan','desc','budget']]
+        if len(unknown) > 0:
+            invalid("unknown keys " + ', '.join(unknown))
+        if spec.get('mode') not in JobQueue.modes:
+            invalid("mode must be one of " + ', '.join(JobQueue.modes))
+        if not isinstance(spec.get('testname'),str) or re.match(r'^[\w.-]+$',spec['testname']) == None:
+            invalid("testname must be a file name of letters, digits, '_', '-' and '.'")
+        if not isinstance(spec.get('device'),str) or not os.path.isabs(spec['device']):
+            invalid("device must be an absolute path")
+        if not os.path.exists(spec['device']):
+            invalid("device " + spec['device'] + " doesn't exist")
+        args = spec.get('args',[])
+        if not isinstance(args,list) or not all(isinstance(a,str) for a in args):
+            invalid("args must be a list of strings")
+        #the args are read like tkperf reads them, a further device would not be locked
+        err = io.StringIO()
+        try:
+            with contextlib.redirect_stdout(err),contextlib.redirect_stderr(err):
+                parsed = tkperfParser().parse_args([spec['mode'],spec['testname'],spec['device']] + args)
+        except SystemExit:
+            #help and version exit without an error
+            errors = [l.split('error: ',1)[1] for l in err.getvalue().splitlines() if 'error: ' in l]
+            invalid("args are not valid tkperf options: " + (errors[-1] if len(errors) > 0 else ' '.join(args)))
+        if parsed.testname != spec['testname'] or parsed.device != [spec['device']]:
+            invalid("args must not contain further devices or positional arguments")
+        reserved = [d for d in JobQueue.reservedArgs if getattr(parsed,d) not in [None,False]]
+        if len(reserved) > 0:
+            invalid("args must not contain the options " + ', '.join(reserved))
+        if spec.get('plan') != None and not isinstance(spec['plan'],dict):
+            invalid("plan must be a dictionary of tests")
+        if spec.get('desc') != None and not isinstance(spec['desc'],str):
+            invalid("desc must be a string")
+        if spec.get('budget') != None and not isinstance(spec['budget'],str):
+            invalid("budget must be a string, e.g. 12h")
+        job = Job(spec)
+        self.__jobs.append(job)
+        self.save()
+        logging.info("# Queued job " + job.getId() + ": " + spec['mode'] + " test " + spec['testname']
+                     + " of " + spec['device'])
+        return job
+
+    def cancel(self,job):
+        '''
+        Cancel a queued job or stop a running one, the tkperf process and its
+        fio processes are terminated. The device stays locked until they have
+        exited, cf. update().
+        @param job The Job.
+        @exception RuntimeError if the job is already finished.
+        '''
+        if job.isFinished():
+            logging.error("# Error: job " + job.getId() + " is already " + job.getState())
+            raise RuntimeError("job is already " + job.getState())
+        if job.getState() == 'running' and self.isAlive(job):
+            try:
+                os.killpg(job.getPid(),signal.SIGTERM)
+            except OSError as e:
+                logging.warning("# Could not terminate job " + job.getId() + ": " + str(e))
+            self.__stopping.append(job.getId())
+        job.setState('cancelled')
+        job.setMessage('cancelled')
+        job.getTimes()['finished'] = time.time()
+        self.save()
+        logging.info("# Cancelled job " + job.getId())
+
+    def isAlive(self,job):
+        '''
+        Check if the tkperf process of a job is still running. A process of a
+        previous run of the daemon is only taken for the job's if it started
+        at the recorded time, its pid may have been reused.
+        @return True if it runs, False if it has exited.
+        '''
+        proc = self.__procs.get(job.getId())
+        if proc != None:
+            if proc.poll() == None:
+                return True
+            job.setReturncode(proc.returncode)
+            del self.__procs[job.getId()]
+            return False
+        #started by a previous run of the daemon, its exit code is lost
+        return job.getProcStart() != None and JobQueue.procStart(job.getPid()) == job.getProcStart()
+
+    def finish(self,job):
+        '''
+        Set the state of a job whose tkperf process has exited, it is done
+        if tkperf wrote the results. Without an exit code, of a process of a
+        previous run of the daemon, the results must be newer than the start
+        of the job and the checkpoint must be removed, tkperf removes it once
+        the results are complete.
+        @param job The Job.
+        '''
+        job.getTimes()['finished'] = time.time()
+        xml = os.path.join(self.getJobDir(job),job.getTestname() + '.xml')
+        checkpoint = os.path.join(self.getJobDir(job),job.getTestname() + '.checkpoint.xml')
+        if job.getReturncode() == None:
+            complete = (os.path.exists(xml) and os.path.getmtime(xml) >= job.getTimes()['started']
+                        and not os.path.exists(checkpoint))
+        else:
+            complete = job.getReturncode() == 0 and os.path.exists(xml)
+        if complete:
+            job.setState('done')
+        else:
+            job.setState('failed')
+            exited = 'without complete results' if job.getReturncode() == None else 'with ' + str(job.getReturncode())
+            job.setMessage(self.lastOutput(job) or 'tkperf exited ' + exited)
+        logging.info("# Job " + job.getId() + " " + job.getState() + " " + job.getMessage())
+
+    def lastOutput(self,job):
+        ''' Return the last line tkperf printed, e.g. its error. '''
+        try:
+            with open(os.path.join(self.getJobDir(job),'output.txt')) as f:
+                lines = [l.strip() for l in f if l.strip() != '']
+        except (OSError,IOError):
+            return ''
+        return lines[-1] if len(lines) > 0 else ''
+
+    def command(self,job):
+        '''
+        Return the tkperf command line of a job, its plan and description
+        are written to its directory.
+        @param job The Job.
+        '''
+        spec = job.getSpec()
+        jobDir = self.getJobDir(job)
+        cmd = self.__tkperf + [spec['mode'],spec['testname'],spec['device']] + spec.get('args',[])
+        if spec.get('plan') != None:
+            with open(os.path.join(jobDir,'plan.json'),'w') as f:
+                json.dump(spec['plan'],f,indent=4)
+            cmd += ['-pf','plan.json']
+        if spec.get('desc') != None:
+            with open(os.path.join(jobDir,'desc.txt'),'w') as f:
+                f.write(spec['desc'])
+            cmd += ['-dsc','desc.txt']
+        if spec.get('budget') != None:
+            cmd += ['-bu',spec['budget']]
+        return cmd
+
+    def start(self,job):
+        '''
+        Start the tkperf process of a job. The submission confirms that the
+        data of the device is lost, the mount check of tkperf still applies.
+        @param job The Job.
+        '''
+        jobDir = self.getJobDir(job)
+        os.makedirs(jobDir,exist_ok=True)
+        job.setState('running')
+        job.getTimes()['started'] = time.time()
+        try:
+            cmd = self.command(job)
+            with open(os.path.join(jobDir,'output.txt'),'w') as out:
+                #an own session, a cancel terminates tkperf and its fio processes
+                proc = subprocess.Popen(cmd,cwd=jobDir,stdin=subprocess.PIPE,stdout=out,stderr=subprocess.STDOUT,
+                                        universal_newlines=True,start_new_session=True)
+            proc.stdin.write('y\n')
+            proc.stdin.close()
+        except (OSError,IOError) as e:
+            logging.error("# Error: could not start job " + job.getId() + ": " + str(e))
+            job.setState('failed')
+            job.setMessage('could not start tkperf: ' + str(e))
+            job.getTimes()['finished'] = time.time()
+            return
+        self.__procs[job.getId()] = proc
+        job.setPid(proc.pid)
+        job.setProcStart(JobQueue.procStart(proc.pid))
+        logging.info("# Started job " + job.getId() + ": " + ' '.join(cmd))
+
+    def update(self):
+        '''
+        Finish the jobs whose tkperf has exited and start the next queued job
+        of every idle device. The device of a cancelled job is busy until its
+        tkperf has exited. Called periodically by the server.
+        '''
+        changed = False
+        busy = []
+        for jobId in list(self.__stopping):
+            job = self.getJob(jobId)
+            if self.isAlive(job):
+                busy.append(JobQueue.devKey(job.getDevice()))
+            else:
+                self.__stopping.remove(jobId)
+                logging.info("# Cancelled job " + jobId + " has exited")
+        for job in self.__jobs:
+            if job.getState() == 'running':
+                if self.isAlive(job):
+                    busy.append(JobQueue.devKey(job.getDevice()))
+                else:
+                    self.finish(job)
+                    changed = True
+        for job in self.__jobs:
+            if job.getState() == 'queued' and JobQueue.devKey(job.getDevice()) not in busy:
+                self.start(job)
+                busy.append(JobQueue.devKey(job.getDevice()))
+                changed = True
+        if changed:
+            self.save()
+
+    def progress(self,job):
+        '''
+        Return the progress of a job out of its round log.
+        @param job The Job.
+        @return A dictionary {done,test,round,rounds,updated}: the finished
+        tests, the test and round of the last finished round, the number of
+        finished rounds and the time of the last record.
+        '''
+        log = RoundLog(os.path.join(self.getJobDir(job),job.getTestname()))
+        records = log.read()
+        rounds = [r for r in records if 'round' in r]
+        prog = {'done':[r['test'] for r in records if r.get('done')],'test':None,'round':None,
+                'rounds':len(rounds),'updated':None}
+        if len(rounds) > 0:
+            prog['test'] = rounds[-1].get('test')
+            prog['round'] = rounds[-1].get('round')
+        if len(records) > 0:
+            prog['updated'] = records[-1].get('time')
+        return prog
+
+    def artifacts(self,job):
+        '''
+        Return the files of a job, e.g. its log, xml, plots and report.
+        @return A list of dictionaries {name,size}.
+        '''
+        jobDir = self.getJobDir(job)
+        if not os.path.isdir(jobDir):
+            return []
+        return [{'name':n,'size':os.path.getsize(os.path.join(jobDir,n))} for n in sorted(os.listdir(jobDir))
+                if os.path.isfile(os.path.join(jobDir,n))]
+
+    def devices(self):
+        '''
+        Return the queue of every device.
+        @return A dictionary {device:{running,queued,stopping}} with the id of
+        the running job, None if idle, the ids of the queued jobs and of the
+        cancelled jobs whose tkperf has not exited yet.
+        '''
+        devs = {}
+        for job in self.__jobs:
+            if job.isFinished() and job.getId() not in self.__stopping:
+                continue
+            dev = devs.setdefault(JobQueue.devKey(job.getDevice()),{'running':None,'queued':[],'stopping':[]})
+            if job.getId() in self.__stopping:
+                dev['stopping'].append(job.getId())
+            elif job.getState() == 'running':
+                dev['running'] = job.getId()
+            else:
+                dev['queued'].append(job.getId())
+        return devs
+
+class DaemonHandler(http.server.BaseHTTPRequestHandler):
+    '''
+    The HTTP API of the daemon, all bodies are json:
+
+    GET /jobs, POST /jobs, GET /jobs/ID, DELETE /jobs/ID,
+    GET /jobs/ID/artifacts, GET /jobs/ID/artifacts/NAME, GET /devices
+    '''
+    server_version = 'tkperfd'
+
+    def log_message(self,format,*args):
+        ''' Log the requests to the log of the daemon, a Unix socket has no client address. '''
+        logging.debug("# " + (format % args))
+
+    def reply(self,code,obj):
+        ''' Send a json response. '''
+        body = json.dumps(obj,indent=4).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type','application/json')
+        self.send_header('Content-Length',str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def replyError(self,code,msg):
+        ''' Send an error as json {error}. '''
+        self.reply(code,{'error':msg})
+
+    def route(self):
+        '''
+        Split the path of a request.
+        @return [queue,path parts,job], job is None if not given or unknown.
+        '''
+        queue = self.server.getQueue()
+        parts = [p for p in self.path.split('?')[0].split('/') if p != '']
+        job = None
+        if len(parts) > 1 and parts[0] == 'jobs':
+            job = queue.getJob(parts[1])
+        return [queue,parts,job]
+
+    def jobStatus(self,queue,job):
+        ''' Return a job with its progress. '''
+        status = job.toDict()
+        status['progress'] = queue.progress(job)
+        return status
+
+    def do_GET(self):
+        queue,parts,job = self.route()
+        if parts == ['jobs']:
+            self.reply(200,[j.toDict() for j in queue.getJobs()])
+        elif parts == ['devices']:
+            self.reply(200,queue.devices())
+        elif len(parts) > 1 and parts[0] == 'jobs' and job == None:
+            self.replyError(404,'unknown job ' + parts[1])
+        elif len(parts) == 2 and parts[0] == 'jobs':
+            self.reply(200,self.jobStatus(queue,job))
+        elif len(parts) == 3 and parts[0] == 'jobs' and parts[2] == 'artifacts':
+            self.reply(200,queue.artifacts(job))
+        elif len(parts) == 4 and parts[0] == 'jobs' and parts[2] == 'artifacts':
+            #only the files of the job directory are served
+            if parts[3] not in [a['name'] for a in queue.artifacts(job)]:
+                self.replyError(404,'unknown artifact ' + parts[3])
+                return
+            with open(os.path.join(queue.getJobDir(job),parts[3]),'rb') as f:
+                body = f.read()
+            self.send_response(200)
+            self.send_header('Content-Type',mimetypes.guess_type(parts[3])[0] or 'application/octet-stream')
+            self.send_header('Content-Length',str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self.replyError(404,'unknown path ' + self.path)
+
+    def do_POST(self):
+        queue,parts,job = self.route()
+        if parts != ['jobs']:
+            self.replyError(404,'unknown path ' + self.path)
+            return
+        try:
+            length = int(self.headers.get('Content-Length',0))
+            spec = json.loads(self.rfile.read(length).decode('utf-8'))
+        except ValueError:
+            self.replyError(400,'the body must be a json job')
+            return
+        try:
+            job = queue.submit(spec)
+        except RuntimeError as e:
+            self.replyError(400,str(e))
+            return
+        queue.update()
+        self.reply(201,self.jobStatus(queue,job))
+
+    def do_DELETE(self):
+        queue,parts,job = self.route()
+        if len(parts) != 2 or parts[0] != 'jobs':
+            self.replyError(404,'unknown path ' + self.path)
+        elif job == None:
+            self.replyError(404,'unknown job ' + parts[1])
+        else:
+            try:
+                queue.cancel(job)
+            except RuntimeError as e:
+                self.replyError(409,str(e))
+                return
+            self.reply(200,self.jobStatus(queue,job))
+
+class DaemonServer(socketserver.UnixStreamServer):
+    '''
+    Serves the API on a Unix socket, access is controlled by the socket's
+    file permissions. Requests are handled one after the other, between
+    them the job queue is updated.
+    '''
+    ## Seconds between two updates of the job queue.
+    pollInterval = 1
+
+    def __init__(self,path,queue):
+        '''
+        Constructor
+        @param path The path of the Unix socket, an existing socket is replaced.
+        @param queue The JobQueue.
+        '''
+        if os.path.exists(path):
+            os.remove(path)
+        socketserver.UnixStreamServer.__init__(self,path,DaemonHandler)
+        ## The job queue
+        self.__queue = queue
+        os.chmod(path,0o660)
+
+    def getQueue(self): return self.__queue
+
+    def service_actions(self):
+        self.__queue.update()
+
+    def serve(self):
+        ''' Serve until shutdown() or SIGTERM, running jobs are kept. '''
+        self.__queue.update()
+        self.serve_forever(DaemonServer.pollInterval)
@@ -5,19 +5,51 @@ Created on Aug 25, 2014
 '''
 
 from abc import ABCMeta, abstractmethod
+import copy
 import logging
 from collections import deque
 from lxml import etree
 import json
+import math
+import time
 
 from perfTest.StdyState import StdyState
-from perfTest.Options import Options
+from perfTest.Plan import Plan
 from fio.FioJob import FioJob
+from fio.FioResult import FioResult
+from fio.IoEngine import IoEngine
+from system.Topology import Topology
+from reports.Archive import Archive
+
+def mixWriteRate(rndMatrix,mixWlds,bsLabels):
+    '''
+    Return the mean bytes/s written by a cell of an IOPS round matrix.
+    @param rndMatrix The IOPS of the round, one row per workload mix.
+    @param mixWlds The read percentages of the mixed workloads.
+    @param bsLabels The block sizes.
+    '''
+    rates = []
+    for mix,row in zip(mixWlds,rndMatrix):
+        for bs,iops in zip(bsLabels,row):
+            rates.append(iops * (100 - mix) / 100.0 * Plan.bsBytes(bs))
+    return sum(rates) / len(rates)
 
 class DeviceTest(object, metaclass=ABCMeta):
     '''
     Representing a performance test, run on a device.
     '''
+    ## Collect the fio interval logs if enabled by the options.
+    intervalLogs = False
+    ## Default percentages of mixed workloads, empty for tests without mixes.
+    mixWlds = []
+    ## Default [mix,block size] of the round matrix cell the steady state is detected on, None without steady state.
+    trackCell = None
+    ## Default number of rounds of a test without steady state, None if the options give the rounds.
+    maxRnds = None
+    ## Block sizes kept if a time budget reduces the matrix, None to keep all.
+    coreBsLabels = None
+    ## Mixed workloads kept if a time budget reduces the matrix, None to keep all.
+    coreMixWlds = None
 
     def __init__(self,testname,device,options=None):
         '''
@@ -37,13 +69,389 @@ class DeviceTest(object, metaclass=ABCMeta):
         self.__figures = []
         ## Measurement overview tables, from which plots are generated
         self.__tables = []
+        ## Interval samples of each round, in the shape of the round matrix
+        self.__intervals = []
+        ## Interval samples of the cells of the last runCells call
+        self.__lastIntervals = []
+        ## Actual runtimes in seconds of each round with adaptive runtime
+        self.__runtimes = []
+        ## Actual runtimes of the cells of the last runCells call
+        self.__lastRuntimes = []
+        ## Archive of the raw fio outputs, created on first use
+        self.__archive = None
+        ## Number of the running round, the archive keys the fio outputs with it
+        self.__round = None
+        ## Job imbalance [iops ratio,latency ratio,flagged] of each round, per cell
+        self.__imbalance = []
+        ## Job imbalance of the cells of the last runCells call
+        self.__lastImbalance = []
+        ## Matrices of each round per random distribution of the options
+        self.__distMatrices = []
+        ## Measurement tables per random distribution
+        self.__distTables = []
+        ## Plots per random distribution
+        self.__distFigures = []
+        ## Counters of an unfinished test loaded from a checkpoint, None if not resumed
+        self.__resume = None
+        ## Function writing a checkpoint after a round, called with the test and its counters
+        self.__checkpointer = None
+        ## Wall clock seconds of the phases, {'erase':[s],'precondition':[s],'round':[[s,fio runs]]}
+        self.__timings = {}
+        ## Percentages of mixed workloads, the rows of the round matrices
+        self.__mixWlds = list(type(self).mixWlds)
+        ## [mix,block size] of the steady state tracking cell
+        self.__trackCell = None if type(self).trackCell == None else list(type(self).trackCell)
+        ## Number of rounds of a test without steady state
+        self.__maxRnds = type(self).maxRnds
+        ## Tracking cell values of the rounds run before the full matrix, cf. runTrackRounds
+        self.__trackRnds = []
+        ## True while only the tracking cell is run
+        self.__tracking = False
 
     def getTestname(self): return self.__testname
     def getDevice(self): return self.__device
     def getOptions(self): return self.__options
+    def setOptions(self,options): self.__options = options
     def getFioJob(self): return self.__fioJob
     def getFigures(self): return self.__figures
     def getTables(self): return self.__tables
+    def getIntervals(self): return self.__intervals
+    def getLastIntervals(self): return self.__lastIntervals
+    def getRuntimes(self): return self.__runtimes
+    def getImbalance(self): return self.__imbalance
+    def getDistMatrices(self): return self.__distMatrices
+    def getDistTables(self): return self.__distTables
+    def getDistFigures(self): return self.__distFigures
+    def getTimings(self): return self.__timings
+    def getResume(self): return self.__resume
+    def setRound(self,rnd): self.__round = rnd
+    def setResume(self,counters): self.__resume = counters
+    def setCheckpointer(self,cp): self.__checkpointer = cp
+    def getMixWlds(self): return self.__mixWlds
+    def setMixWlds(self,mixWlds): self.__mixWlds = list(mixWlds)
+    def getTrackCell(self): return self.__trackCell
+    def setTrackCell(self,cell): self.__trackCell = list(cell)
+    def getMaxRnds(self): return self.__maxRnds
+    def setMaxRnds(self,rnds): self.__maxRnds = rnds
+    def getTrackRnds(self): return self.__trackRnds
+
+    def getTrackIndex(self):
+        '''
+        Return the position of the steady state tracking cell in a round matrix.
+        @return [row of the mix,column of the block size]
+        '''
+        mix,bs = self.__trackCell
+        return [self.__mixWlds.index(mix),self.getBsLabels().index(bs)]
+
+    def isTrackFirst(self):
+        ''' Check if only the tracking cell is run until it is steady, cf. runTrackRounds. '''
+        return self.__options != None and self.__options.getTrackFirst() and self.__trackCell != None
+
+    def runTrackRounds(self,trackValue):
+        '''
+        Run rounds of the tracking cell only until its values are steady
+        over a window, the full matrix is run afterwards for the measurement
+        window only. The rounds of a full matrix are left for at least one
+        window. The round matrices and the steady state of the test only
+        contain the full rounds.
+        @param trackValue A function returning the tracked value out of the
+        fio output of the tracking cell.
+        @return The number of rounds used, 0 if the fast path is not enabled.
+        '''
+        if not self.isTrackFirst():
+            return 0
+        #a test resumed during the full rounds doesn't go back
+        if len(self.getRndMatrices()) > 0:
+            return len(self.__trackRnds)
+        window = self.getStdyState().getWindow()
+        stdyState = StdyState()
+        stdyState.setWindow(window)
+        steadyValues = deque([])
+        xranges = deque([])
+        mix,bs = self.__trackCell
+        for i in range(self.getOptions().getTestRnds() - window):
+            logging.info("#################")
+            logging.info("Tracking cell round nr. " + str(i))
+            if i < len(self.__trackRnds):
+                logging.info("# Round " + str(i) + " was finished before resuming")
+            else:
+                start = time.time()
+                self.__tracking = True
+                self.__round = i
+                try:
+                    jobOut = self.runCells([{"rwmixread":str(mix),"bs":bs}])[0]
+                    self.__trackRnds.append(trackValue(jobOut))
+                    self.__timings.setdefault('round',[]).append([round(time.time() - start,1),1])
+                    self.checkpoint()
+                finally:
+                    self.__tracking = False
+            steadyValues.append(self.__trackRnds[i])
+            xranges.append(i)
+            if len(xranges) > window:
+                xranges.popleft()
+                steadyValues.popleft()
+            if len(xranges) == window and stdyState.checkSteadyState(xranges,steadyValues,i):
+                logging.info("# Tracking cell is steady in rounds " + str(list(xranges))
+                             + ", running the full matrix")
+                break
+        return len(self.__trackRnds)
+
+    def isResumed(self):
+        ''' Check if the test continues from a checkpoint, erase and precondition are skipped then. '''
+        return self.__resume != None
+
+    def checkpoint(self,counters=None):
+        '''
+        Write a checkpoint after a finished round, the test can be resumed at
+        the next round from it.
+        @param counters A dictionary of further values needed to resume the test.
+        '''
+        if self.__checkpointer != None:
+            self.__checkpointer(self,counters or {})
+
+    def toCheckpoint(self,key):
+        '''
+        Get the compact Xml representation of the running test for a
+        checkpoint: the rounds, steady state window and options of toXml()
+        without the interval samples, which grow with every fio run. The
+        interval timeline of a resumed test starts at the resumed round.
+        @param key Name of the new root Xml node
+        @return An xml root element to resume the test from.
+        '''
+        intervals = self.__intervals
+        self.__intervals = []
+        try:
+            return self.toXml(key)
+        finally:
+            self.__intervals = intervals
+
+    def timed(self,phase,func,*args):
+        '''
+        Call a function and record its wall clock time as a phase of the
+        test, e.g. 'erase' or 'precondition'.
+        @return The return value of the function.
+        '''
+        start = time.time()
+        ret = func(*args)
+        self.__timings.setdefault(phase,[]).append(round(time.time() - start,1))
+        return ret
+
+    def timedRound(self,*args):
+        '''
+        Carry out testRound() and record its wall clock time and number of fio runs.
+        @return The return value of testRound().
+        '''
+        start = time.time()
+        ret = self.testRound(*args)
+        self.__timings.setdefault('round',[]).append([round(time.time() - start,1),self.roundRuns()])
+        return ret
+
+    def roundRuns(self):
+        ''' Return the number of fio runs of a test round. '''
+        return 1
+
+    def calibration(self):
+        '''
+        Return the values of the test a plan of the same device model can
+        be calibrated with: the recorded erase and precondition times and
+        the overhead of a fio run.
+        @return A dictionary {name:[values]}.
+        '''
+        calib = {'erase':self.__timings.get('erase',[]),
+                 'precondition':self.__timings.get('precondition',[]),
+                 'overhead':[]}
+        if len(self.__trackRnds) > 0:
+            calib['trackRounds'] = [len(self.__trackRnds)]
+        #adaptive runs end early, their overhead can't be told from the runtime
+        if self.__options != None and not self.__options.getAdaptive():
+            for secs,runs in self.__timings.get('round',[]):
+                calib['overhead'].append(secs / float(runs) - self.__options.getRuntime())
+        return calib
+
+    def plan(self,plan,key):
+        '''
+        Add the estimated phases of the test to a plan.
+        @param plan The Plan.
+        @param key The key of the test.
+        '''
+        logging.info("# No estimate for " + type(self).__name__)
+
+    def planTrackRounds(self,plan,key):
+        '''
+        Add the rounds of the tracking cell alone to a plan, if the fast path
+        is enabled. The full rounds are estimated as without it, previous
+        runs with the fast path narrow them down to the measurement window.
+        @param plan The Plan.
+        @param key The key of the test.
+        '''
+        if self.isTrackFirst():
+            window = self.getStdyState().getWindow()
+            rnds = [window,max(window,self.getOptions().getTestRnds() - window)]
+            plan.rounds(key,'track rounds',plan.getRange(key,'trackRounds',rnds),1)
+
+    def lastRound(self):
+        '''
+        Return the last finished round for the round log.
+        @return [number of the round,values of the round]
+        '''
+        if self.__tracking:
+            return [len(self.__trackRnds) - 1,{'trackcell':self.__trackRnds[-1]}]
+        return [len(self.__trackRnds) + len(self.getRndMatrices()) - 1,self.getRndMatrices()[-1]]
+
+    def resumedRound(self,i):
+        '''
+        Return the stored matrix of a round finished before the test was
+        resumed. The steady state window is rebuilt by replaying these rounds.
+        @param i The number of the round.
+        @return The round matrix, None if the round has to be run.
+        '''
+        if i < len(self.getRndMatrices()):
+            logging.info("# Round " + str(i) + " was finished before resuming")
+            return self.getRndMatrices()[i]
+        return None
+
+    def getDistributions(self):
+        ''' Return the random distributions of the test, an empty list for uniform only. '''
+        if self.__options == None or self.__options.getDistributions() == None:
+            return []
+        return self.__options.getDistributions()
+
+    def getArchive(self):
+        ''' Return the archive of the raw fio outputs, None if archiving is disabled. '''
+        if self.__options == None or not self.__options.getArchive():
+            return None
+        if self.__archive == None:
+            self.__archive = Archive(self.__testname)
+        return self.__archive
+
+    def archiveOutput(self,jobOut,mix=None,bs=None):
+        '''
+        Store a raw fio output in the archive, keyed by the test, the round
+        and the cell. The round is the one set by setRound(), a rerun round
+        of a resumed test replaces the outputs of the interrupted one.
+        @param jobOut The raw fio output.
+        @param mix The workload of the cell, e.g. the rwmixread value.
+        @param bs The block size of the cell.
+        '''
+        archive = self.getArchive()
+        if archive != None:
+            #the rounds of the tracking cell alone are kept apart from the full rounds
+            name = type(self).__name__ + ('Track' if self.__tracking else '')
+            archive.add(name,mix,bs,jobOut,self.__round)
+
+    @staticmethod
+    def cellMix(cell):
+        '''
+        Return the workload label of a cell in the archive, cells with a
+        random distribution or an open loop rate are labelled with it to
+        keep them apart from the rounds.
+        '''
+        mix = cell.get("rwmixread")
+        if "random_distribution" in cell:
+            mix += "~" + cell["random_distribution"]
+        if "rate_iops" in cell:
+            mix += "@" + cell["rate_iops"]
+        return mix
+
+    def reparse(self,archive):
+        '''
+        Rebuild the round matrices out of the archived fio outputs with the
+        current parsing code, e.g. to add new metrics to an existing test.
+        @param archive The Archive of the performance test.
+        @return True if the round matrices were rebuilt, False if not supported.
+        '''
+        logging.info("# Reparsing is not supported for " + type(self).__name__)
+        return False
+
+    def reparseMatrices(self,archive,mixWlds,cellValue,dist=None):
+        '''
+        Rebuild round matrices of workload mixes and block sizes.
+        @param archive The Archive of the performance test.
+        @param mixWlds The read percentages of the mixed workloads.
+        @param cellValue A function returning the value of a cell out of a fio output.
+        @param dist The random distribution of the matrices, None for uniform.
+        @return A list of round matrices, None if no or incomplete outputs were archived.
+        '''
+        mats = []
+        for rnd in archive.getRounds(type(self).__name__):
+            rndMatrix = []
+            for i in mixWlds:
+                rwRow = []
+                for j in self.getBsLabels():
+                    mix = str(i) if dist == None else str(i) + "~" + dist
+                    if (mix,j) not in rnd:
+                        logging.error("# Error: archive misses mix " + mix + ", bs " + j)
+                        return None
+                    rwRow.append(cellValue(rnd[(mix,j)]))
+                rndMatrix.append(rwRow)
+            mats.append(rndMatrix)
+        if len(mats) == 0:
+            return None
+        return mats
+
+    def reparseDistMatrices(self,archive,mixWlds,cellValue):
+        '''
+        Rebuild the matrices of the random distributions, if any were run.
+        @return True if all distribution matrices were rebuilt.
+        '''
+        if len(self.getDistributions()) == 0:
+            return True
+        perDist = []
+        for d in self.getDistributions():
+            mats = self.reparseMatrices(archive,mixWlds,cellValue,d)
+            if mats == None:
+                return False
+            perDist.append(mats)
+        self.__distMatrices = [list(m) for m in zip(*perDist)]
+        return True
+
+    def pinFio(self,mode):
+        '''
+        Pin the fio jobs to the CPUs near the device and keep the pinning
+        in the options, to be able to compare runs.
+        @param mode 'numa' or 'irq', cf. Topology.getPinning.
+        '''
+        pin = Topology(self.__device.getDevPath()).getPinning(mode)
+        if pin['cpus'] == None:
+            logging.info("# No NUMA or interrupt locality known for " + self.__device.getDevPath()
+                         + ", fio jobs are not pinned")
+        else:
+            logging.info("# Pinning fio jobs to cpus " + pin['cpus'] + " (node " + str(pin['node']) + ")")
+            self.__fioJob.pinCpus(pin['cpus'])
+        for queue,cpus in sorted(pin['irqs'].items()):
+            logging.info("# Interrupt " + queue + " handled by cpus " + cpus)
+        self.__options.setPinInfo(pin)
+
+    def getIoEngine(self):
+        ''' Return the IoEngine of the options, libaio if no options are given. '''
+        if self.__options == None:
+            return IoEngine()
+        return IoEngine(self.__options.getIoEngine(),self.__options.getEngineTuning())
+
+    def isPerJob(self):
+        ''' Check if fio reports every job on its own. '''
+        return self.__options != None and self.__options.getPerJob()
+
+    def cellImbalance(self,cell,jobOut):
+        '''
+        Calculate the job imbalance of a cell, a cell is flagged if the
+        ratio of max/min job IOPS or latency exceeds the threshold.
+        @param cell The key value arguments of the cell.
+        @param jobOut The fio output of the cell.
+        @return [iops ratio,latency ratio,flagged], None for a single job.
+        '''
+        imb = self.__fioJob.getImbalance(jobOut)
+        if imb == None:
+            return None
+        flagged = max(imb) > self.__options.getImbalanceThr()
+        if flagged:
+            logging.warning("# Job imbalance in cell " + str(cell) + ": max/min IOPS "
+                            + str(round(imb[0],2)) + ", max/min latency " + str(round(imb[1],2)))
+        return [imb[0],imb[1],flagged]
+
+    def isAdaptive(self):
+        ''' Check if the fio runs of the test end as soon as they have converged. '''
+        return self.__options != None and self.__options.getAdaptive()
 
     def setFigures(self,fig):
         '''
@@ -83,8 +491,11 @@ class DeviceTest(object, metaclass=ABCMeta):
         self.__fioJob.addKVArg("filename",self.__device.getDevPath())
         self.__fioJob.addKVArg("name",self.__testname)
         self.__fioJob.addKVArg("direct","1")
-        self.__fioJob.addSglArg("minimal")
-        self.__fioJob.addKVArg("ioengine","libaio")
+        if self.__options == None or self.__options.getOutputFormat() == 'terse':
+            self.__fioJob.addSglArg("minimal")
+        else:
+            self.__fioJob.addKVArg("output-format",self.__options.getOutputFormat())
+        self.getIoEngine().apply(self.__fioJob)
         self.__fioJob.addSglArg("time_based")
         if self.__options == None:
             self.__fioJob.addKVArg("numjobs",str(1))
@@ -100,7 +511,240 @@ class DeviceTest(object, metaclass=ABCMeta):
             if self.getOptions().getXargs() != None:
                 for arg in self.getOptions().getXargs():
                     self.__fioJob.addSglArg(arg)
-        self.__fioJob.addSglArg("group_reporting")
+        if not self.isPerJob():
+            self.__fioJob.addSglArg("group_reporting")
+        if self.__options != None and self.__options.getPinning() != 'none':
+            self.pinFio(self.__options.getPinning())
+        if self.intervalLogs and self.__options != None and self.__options.getIntervalLog():
+            self.__fioJob.enableIntervalLogs(self.__options.getIntervalLog())
+        if self.isAdaptive() and self.__options.getBatchRnds():
+            logging.info("# Adaptive runtime needs one fio run per cell, round batches are not used")
+
+    def runCells(self,cells,spec=None):
+        '''
+        Run fio for a list of cells. A cell is a dictionary of key value
+        arguments overriding the fio job arguments, e.g. the workload mix
+        and the block size. If round batches are enabled all cells are run
+        by one fio invocation, else fio is started once per cell.
+        @param cells A list of dictionaries, the key value arguments of a cell.
+        @param spec The FioJobSpec the cells are derived from, None for the
+        arguments of the fio job.
+        @return A list of fio outputs in the order of cells.
+        '''
+        spec = spec or self.__fioJob.getSpec()
+        if self.__options != None and self.__options.getBatchRnds() and not self.isAdaptive():
+            call,outs = self.__fioJob.startBatch(cells,spec)
+            if call == False:
+                raise RuntimeError("fio job error")
+            for cell,jobOut in zip(cells,outs):
+                logging.info(cell)
+                logging.info(jobOut)
+                logging.info("######")
+                self.archiveOutput(jobOut,self.cellMix(cell),cell.get("bs"))
+            if self.isPerJob():
+                self.__lastImbalance = [self.cellImbalance(c,o) for c,o in zip(cells,outs)]
+            if self.__fioJob.hasIntervalLogs():
+                self.__lastIntervals = [self.__fioJob.collectIntervalLogs(i) for i in range(len(cells))]
+            return outs
+        outs = []
+        self.__lastIntervals = []
+        self.__lastRuntimes = []
+        self.__lastImbalance = []
+        for cell in cells:
+            cellSpec = spec.with_(**cell)
+            if self.isAdaptive():
+                call,jobOut,runtime = self.__fioJob.startAdaptive(self.__options.getAdaptiveMin(),
+                                                                  self.__options.getAdaptiveWindow(),
+                                                                  self.__options.getAdaptiveCV(),
+                                                                  cellSpec)
+                self.__lastRuntimes.append(runtime)
+            else:
+                call,jobOut = self.__fioJob.start(cellSpec)
+            if call == False:
+                raise RuntimeError("fio job error")
+            logging.info(cell)
+            logging.info(jobOut)
+            logging.info("######")
+            self.archiveOutput(jobOut,self.cellMix(cell),cell.get("bs"))
+            outs.append(jobOut)
+            if self.isPerJob():
+                self.__lastImbalance.append(self.cellImbalance(cell,jobOut))
+            if self.__fioJob.hasIntervalLogs():
+                self.__lastIntervals.append(self.__fioJob.collectIntervalLogs())
+        return outs
+
+    def runMatrix(self,mixWlds,bsLabels,spec=None,extra=None):
+        '''
+        Run fio for every combination of workload mix and block size.
+        @param mixWlds The read percentages of the mixed workloads.
+        @param bsLabels The block sizes.
+        @param spec The FioJobSpec the cells are derived from, None for the
+        arguments of the fio job.
+        @param extra Further key value arguments of all cells, e.g. a random
+        distribution. The intervals, runtimes and imbalances of such a matrix
+        are not added to the ones of the rounds.
+        @return A matrix of fio outputs, one row per workload mix.
+        '''
+        cells = []
+        for i in mixWlds:
+            for j in bsLabels:
+                cell = {"rwmixread":str(i),"bs":j}
+                cell.update(extra or {})
+                cells.append(cell)
+        outs = self.runCells(cells,spec)
+        rndMatrix = []
+        for k in range(len(mixWlds)):
+            rndMatrix.append(outs[k * len(bsLabels):(k + 1) * len(bsLabels)])
+        if extra != None:
+            return rndMatrix
+        if self.__fioJob.hasIntervalLogs():
+            ivs = self.__lastIntervals
+            self.__intervals.append([ivs[k * len(bsLabels):(k + 1) * len(bsLabels)]
+                                     for k in range(len(mixWlds))])
+        if self.isAdaptive():
+            rts = self.__lastRuntimes
+            self.__runtimes.append([rts[k * len(bsLabels):(k + 1) * len(bsLabels)]
+                                    for k in range(len(mixWlds))])
+        if self.isPerJob():
+            imb = self.__lastImbalance
+            self.__imbalance.append([imb[k * len(bsLabels):(k + 1) * len(bsLabels)]
+                                     for k in range(len(mixWlds))])
+        return rndMatrix
+
+    def runDistMatrices(self,mixWlds,bsLabels,cellValue,spec=None):
+        '''
+        Run the matrix once per random distribution of the options and add
+        the values to the distribution matrices of the round.
+        @param mixWlds The read percentages of the mixed workloads.
+        @param bsLabels The block sizes.
+        @param cellValue A function returning the value of a cell out of a fio output.
+        @param spec The FioJobSpec the cells are derived from, None for the
+        arguments of the fio job.
+        '''
+        if len(self.getDistributions()) == 0:
+            return
+        rndMatrices = []
+        for d in self.getDistributions():
+            logging.info("# Random distribution " + d)
+            outMatrix = self.runMatrix(mixWlds,bsLabels,spec,{"random_distribution":d})
+            rndMatrices.append([[cellValue(o) for o in outRow] for outRow in outMatrix])
+        self.__distMatrices.append(rndMatrices)
+
+    def runLoadMatrix(self,mixWlds,bsLabels,rate,spec=None):
+        '''
+        Run fio open loop for every combination of workload mix and block
+        size: requests arrive as a poisson process at the offered rate,
+        independent of the completion of outstanding ones. The offered
+        rate is split between reads and writes by the workload mix and
+        between the jobs. Fio measures the latency from the submission of
+        a request, a request delayed by a full queue is not accounted.
+        @param mixWlds The read percentages of the mixed workloads.
+        @param bsLabels The block sizes.
+        @param rate The offered load in IOPS.
+        @param spec The FioJobSpec the cells are derived from, None for the
+        arguments of the fio job.
+        @return A matrix of fio outputs, one row per workload mix.
+        '''
+        spec = (spec or self.__fioJob.getSpec()).with_(rate_process="poisson",
+                                                       iodepth=self.__options.getLoadIod())
+        nj = int(spec.get("numjobs","1"))
+        cells = []
+        for i in mixWlds:
+            #a rate of 0 means unlimited for fio, a share of the rate is at least 1 IOPS
+            rd = max(1,int(round(rate * i / 100.0 / nj))) if i > 0 else 0
+            wr = max(1,int(round(rate * (100 - i) / 100.0 / nj))) if i < 100 else 0
+            for j in bsLabels:
+                #a direction without share is unused by the mix, its rate of 0 doesn't matter
+                cells.append({"rwmixread":str(i),"bs":j,"rate_iops":str(rd) + "," + str(wr)})
+        outs = self.runCells(cells,spec)
+        rndMatrix = []
+        for k in range(len(mixWlds)):
+            rndMatrix.append(outs[k * len(bsLabels):(k + 1) * len(bsLabels)])
+        return rndMatrix
+
+    def appendCellXml(self,r):
+        '''
+        Append the per cell interval samples, adaptive runtimes, job
+        imbalances, random distribution matrices and phase timings to a xml
+        node, if any were collected.
+        @param r The xml element of the test.
+        '''
+        if len(self.__intervals) > 0:
+            data = json.dumps(self.__intervals)
+            e = etree.SubElement(r,'intervalmat')
+            e.text = data
+        if len(self.__runtimes) > 0:
+            data = json.dumps(self.__runtimes)
+            e = etree.SubElement(r,'runtimemat')
+            e.text = data
+        if len(self.__imbalance) > 0:
+            data = json.dumps(self.__imbalance)
+            e = etree.SubElement(r,'imbalancemat')
+            e.text = data
+        if len(self.__distMatrices) > 0:
+            data = json.dumps(self.__distMatrices)
+            e = etree.SubElement(r,'distmat')
+            e.text = data
+        if len(self.__timings) > 0:
+            data = json.dumps(self.__timings)
+            e = etree.SubElement(r,'timings')
+            e.text = data
+
+    def appendMatrixXml(self,r):
+        '''
+        Append the block sizes, mixes, tracking cell and rounds of the test to
+        a xml node, the round matrices are loaded with them.
+        @param r The xml element of the test.
+        '''
+        if hasattr(self,'getBsLabels'):
+            e = etree.SubElement(r,'bslabels')
+            e.text = json.dumps(self.getBsLabels())
+        if len(self.__mixWlds) > 0:
+            e = etree.SubElement(r,'mixwlds')
+            e.text = json.dumps(self.__mixWlds)
+        if self.__trackCell != None:
+            e = etree.SubElement(r,'trackcell')
+            e.text = json.dumps(self.__trackCell)
+        if self.__maxRnds != None:
+            e = etree.SubElement(r,'maxrnds')
+            e.text = json.dumps(self.__maxRnds)
+        if len(self.__trackRnds) > 0:
+            e = etree.SubElement(r,'trackrnds')
+            e.text = json.dumps(self.__trackRnds)
+
+    def matrixFromXml(self,root):
+        '''
+        Load the block sizes, mixes, tracking cell and rounds of the test,
+        xml files of older versions keep the defaults.
+        @param root The xml element of the test.
+        '''
+        if root.findtext('bslabels'):
+            self.setBsLabels(json.loads(root.findtext('bslabels')))
+        if root.findtext('mixwlds'):
+            self.__mixWlds = json.loads(root.findtext('mixwlds'))
+        if root.findtext('trackcell'):
+            self.__trackCell = json.loads(root.findtext('trackcell'))
+        if root.findtext('maxrnds'):
+            self.__maxRnds = json.loads(root.findtext('maxrnds'))
+        if root.findtext('trackrnds'):
+            self.__trackRnds = json.loads(root.findtext('trackrnds'))
+
+    def cellsFromXml(self,root):
+        '''
+        Load the per cell interval samples, adaptive runtimes, job
+        imbalances, random distribution matrices and phase timings from xml.
+        @param root The xml element of the test.
+        '''
+        if root.findtext('intervalmat'):
+            self.__intervals = json.loads(root.findtext('intervalmat'))
+        if root.findtext('runtimemat'):
+            self.__runtimes = json.loads(root.findtext('runtimemat'))
+        if root.findtext('imbalancemat'):
+            self.__imbalance = json.loads(root.findtext('imbalancemat'))
+        if root.findtext('distmat'):
+            self.__distMatrices = json.loads(root.findtext('distmat'))
+        if root.findtext('timings'):
+            self.__timings = json.loads(root.findtext('timings'))
 
     @abstractmethod
     def testRound(self):
@@ -128,8 +772,14 @@ class SsdIopsTest(DeviceTest):
     '''
     Representing an IOPS test for a ssd based device.
     '''
+    intervalLogs = True
     ##Percentages of mixed workloads
     mixWlds = [100,95,65,50,35,5,0]
+    ## 0/100% r/w and 4k for steady state detection
+    trackCell = [0,'4k']
+    ## Cells kept within a time budget
+    coreBsLabels = ["64k","8k","4k"]
+    coreMixWlds = [100,65,50,0]
 
     def __init__(self,testname,device,options=None):
         '''
@@ -157,14 +807,30 @@ class SsdIopsTest(DeviceTest):
     def getRndMatrices(self): return self.__roundMatrices
     def getStdyState(self): return self.__stdyState
     def getBsLabels(self): return self.__bsLabels
+    def setBsLabels(self,bs): self.__bsLabels = list(bs)
+
+    def roundRuns(self):
+        return len(self.getMixWlds()) * len(self.getBsLabels()) * (1 + len(self.getDistributions()))
+
+    def calibration(self):
+        calib = super(SsdIopsTest,self).calibration()
+        if len(self.__roundMatrices) > 0:
+            calib['rounds'] = [len(self.__roundMatrices)]
+            calib['writeRate'] = [mixWriteRate(self.__roundMatrices[-1],self.getMixWlds(),self.getBsLabels())]
+        return calib
+
+    def plan(self,plan,key):
+        plan.prepare(key,1,1)
+        self.planTrackRounds(plan,key)
+        rnds = plan.getRounds(key,[self.getStdyState().getWindow(),self.getOptions().getTestRnds()])
+        plan.rounds(key,'rounds',rnds,self.roundRuns(),plan.getWriteRate(key))
 
     def toLog(self):
         '''
         Log information about the steady state and how it 
         has been reached.
         '''
-        logging.info("Round matrices: ")
-        logging.info(self.__roundMatrices)
+        logging.info("Round matrices: " + str(len(self.__roundMatrices)) + " rounds")
         self.getStdyState().toLog()
 
     def testRound(self):
@@ -175,50 +841,59 @@ class SsdIopsTest(DeviceTest):
         over different block sizes.
         @return A matrix containing the sum of average IOPS.
         '''
-        jobOut = '' #Fio job output
         rndMatrix = []
-        for i in SsdIopsTest.mixWlds:
+        for outRow in self.runMatrix(self.getMixWlds(),self.getBsLabels()):
             rwRow = []
-            for j in self.getBsLabels():
-                self.getFioJob().addKVArg("rwmixread",str(i))
-                self.getFioJob().addKVArg("bs",j)
-                call,jobOut = self.getFioJob().start()
-                if call == False:
-                    exit(1)
-                logging.info("mixLoad: " +str(i))
-                logging.info("bs: "+j)
-                logging.info(jobOut)
-                logging.info("######")
-                rwRow.append(self.getFioJob().getIOPS(jobOut))
+            for jobOut in outRow:
+                rwRow.append(self.cellValue(jobOut))
             rndMatrix.append(rwRow)
+        self.runDistMatrices(self.getMixWlds(),self.getBsLabels(),self.cellValue)
         return rndMatrix
 
+    def cellValue(self,jobOut):
+        ''' Return the sum of average IOPS of a fio output. '''
+        return self.getFioJob().getIOPS(jobOut)
+
+    def reparse(self,archive):
+        mats = self.reparseMatrices(archive,self.getMixWlds(),self.cellValue)
+        if mats == None or not self.reparseDistMatrices(archive,self.getMixWlds(),self.cellValue):
+            return False
+        self.__roundMatrices = mats
+        return True
+
     def runRounds(self):
         '''
         Carry out the IOPS test rounds and check if the steady state is reached.
         For a maximum of 25 rounds the test loop is carried out. After each
         test round we check for a measurement window of the last 5 rounds if
-        the steady state has been reached.
+        the steady state has been reached. With the tracking cell fast path
+        the rounds of the tracking cell alone count to the maximum.
         @return True if the steady state has been reached, False if not.
         '''
         rndMatrix = []
-        steadyValues = deque([])#List of 4k random writes IOPS
+        steadyValues = deque([])#List of the tracking cell IOPS, 4k random writes per default
         xranges = deque([])#Rounds of current measurement window
+        window = self.getStdyState().getWindow()
+        mix,bs = self.getTrackIndex()
+        trackRnds = self.runTrackRounds(self.cellValue)
         
-        for i in range(self.getOptions().getTestRnds()):
+        for i in range(self.getOptions().getTestRnds() - trackRnds):
             logging.info("#################")
             logging.info("Round nr. "+str(i))
-            rndMatrix = self.testRound()
-            self.getRndMatrices().append(rndMatrix)
-            # Use the last row and its next to last value
-            #-> 0/100% r/w and 4k for steady state detection
-            steadyValues.append(rndMatrix[-1][-2])
+            rndMatrix = self.resumedRound(i)
+            if rndMatrix == None:
+                self.setRound(i)
+                rndMatrix = self.timedRound()
+                self.getRndMatrices().append(rndMatrix)
+                self.checkpoint()
+            # Use the tracking cell for steady state detection
+            steadyValues.append(rndMatrix[mix][bs])
             xranges.append(i)
-            if i > 4:
+            if len(xranges) > window:
                 xranges.popleft()
                 steadyValues.popleft()
-            #check if the steady state has been reached in the last 5 rounds
-            if i >= 4:
+            #check if the steady state has been reached in the last window rounds
+            if len(xranges) == window:
                 steadyState = self.getStdyState().checkSteadyState(xranges,steadyValues,i)
                 if steadyState == True:
                     break
@@ -230,28 +905,32 @@ class SsdIopsTest(DeviceTest):
         Start the rounds, log the steady state infos.
         @return True if all tests were run
         '''
-        try: 
-            self.getDevice().secureErase()
-        except RuntimeError:
-            logging.error("# Could not carry out secure erase for "+self.getDevice().getDevPath())
-            raise
+        if self.isResumed():
+            logging.info("# Resuming IOPS test, secure erase and preconditioning are skipped")
+        else:
+            try: 
+                self.timed('erase',self.getDevice().secureErase)
+            except RuntimeError:
+                logging.error("# Could not carry out secure erase for "+self.getDevice().getDevPath())
+                raise
         try:
             self.getDevice().logSMARTlog()
         except RuntimeError:
             logging.error("# Could not carry out retrieving SMART log for "+self.getDevice().getDevPath())
             raise
-        try:
-            if self.getOptions() == None:
-                self.getDevice().precondition(1,1)
-            else:
-                if self.getOptions().getNj() != None:
-                    nj = self.getOptions().getNj()
-                if self.getOptions().getIod() != None:
-                    iod = self.getOptions().getIod()
-                self.getDevice().precondition(nj,iod)
-        except RuntimeError:
-            logging.error("# Could not carry out preconditioning for "+self.getDevice().getDevPath())
-            raise
+        if not self.isResumed():
+            try:
+                if self.getOptions() == None:
+                    self.timed('precondition',self.getDevice().precondition,1,1,self.getIoEngine())
+                else:
+                    if self.getOptions().getNj() != None:
+                        nj = self.getOptions().getNj()
+                    if self.getOptions().getIod() != None:
+                        iod = self.getOptions().getIod()
+                    self.timed('precondition',self.getDevice().precondition,nj,iod,self.getIoEngine())
+            except RuntimeError:
+                logging.error("# Could not carry out preconditioning for "+self.getDevice().getDevPath())
+                raise
         logging.info("########### Starting IOPS Test ###########")
         steadyState = self.runRounds()
         if steadyState == False:
@@ -278,6 +957,8 @@ class SsdIopsTest(DeviceTest):
         data = json.dumps(self.__roundMatrices)
         e = etree.SubElement(r,'roundmat')
         e.text = data
+        self.appendMatrixXml(r)
+        self.appendCellXml(r)
         self.getStdyState().appendXml(r)
         return r
 
@@ -288,6 +969,8 @@ class SsdIopsTest(DeviceTest):
         '''
         logging.info("########### Loading IOPS test from "+self.getTestname()+".xml ###########")
         self.__roundMatrices = json.loads(root.findtext('roundmat'))
+        self.matrixFromXml(root)
+        self.cellsFromXml(root)
         self.__stdyState.fromXml(root)
         #If the current device is 4K native, remove 512 from performance test block sizes
         if self.getDevice().getLogicalSectorSize() == 4096:
@@ -304,6 +987,10 @@ class SsdIopsTest(DeviceTest):
         pgp.stdyStVerPlt(self,"IOPS")
         pgp.mes2DPlt(self,"IOPS")
         pgp.mes3DPlt(self,"IOPS")
+        if len(self.getIntervals()) > 0:
+            pgp.intervalPlt(self,"iops")
+        if len(self.getDistMatrices()) > 0:
+            pgp.distPlt(self,self.getMixWlds(),self.getStdyState().getStdyRnds())
 
 class SsdLatencyTest(DeviceTest):
     '''
@@ -311,6 +998,10 @@ class SsdLatencyTest(DeviceTest):
     '''
     ##Percentages of mixed workloads.
     mixWlds = [100,65,0]
+    ## Mean latency of 0/100% r/w and 4k for steady state detection
+    trackCell = [0,'4k']
+    ## Block sizes kept within a time budget
+    coreBsLabels = ["8k","4k"]
 
     def __init__(self,testname,device,options=None):
         '''
@@ -318,20 +1009,23 @@ class SsdLatencyTest(DeviceTest):
         '''
         ## Keep user options
         self.__userOptions = options
+        wsoptions = None
         if options != None:
             #For latency the specification says to use 1 job/thread, 1 outstanding IO
-            wsoptions = Options(1,1)
-            # Keep the runtime parameter if set on start
-            if options.getRuntime():
-                wsoptions.setRuntime(options.getRuntime())
-            if options.getXargs() != None:
-                wsoptions.setXargs(options.getXargs())
+            wsoptions = copy.copy(options)
+            wsoptions.setNj(1)
+            wsoptions.setIod(1)
         super(SsdLatencyTest,self).__init__(testname,device,wsoptions)
         ## Labels of block sizes to run tests with
         self.__bsLabels = ["8k","4k","512"]
         ## A list of matrices with the collected fio measurement values of each round.
         self.__roundMatrices = []
         self.__stdyState = StdyState()
+        ## Completion latency percentiles following [min,max,mean] in each cell
+        self.__percentiles = list(FioResult.percentiles)
+        ## Open loop matrices per offered load, a cell is [offered IOPS,
+        ## achieved IOPS] followed by the latencies and percentiles.
+        self.__loadMatrices = []
         self.getFioJob().addKVArg("rw","randrw")
 
     def prepareBsLabels(self, bsToAdd, bsToRemove):
@@ -348,14 +1042,48 @@ class SsdLatencyTest(DeviceTest):
     def getRndMatrices(self): return self.__roundMatrices
     def getStdyState(self): return self.__stdyState
     def getBsLabels(self): return self.__bsLabels
+    def setBsLabels(self,bs): self.__bsLabels = list(bs)
+    def getPercentiles(self): return self.__percentiles
+    def getLoadMatrices(self): return self.__loadMatrices
+
+    def getLoadRates(self):
+        ''' Return the offered loads of the open loop matrices. '''
+        return [m[0][0][0] for m in self.__loadMatrices]
+
+    def hasPercentiles(self):
+        '''
+        Check if the round matrices carry latency percentiles, xml files
+        of older versions only contain [min,max,mean].
+        '''
+        if len(self.__roundMatrices) == 0:
+            return False
+        return len(self.__roundMatrices[0][0][0]) > 3
+
+    def roundRuns(self):
+        return len(self.getMixWlds()) * len(self.getBsLabels())
+
+    def calibration(self):
+        calib = super(SsdLatencyTest,self).calibration()
+        if len(self.__roundMatrices) > 0:
+            calib['rounds'] = [len(self.__roundMatrices)]
+        return calib
+
+    def plan(self,plan,key):
+        plan.prepare(key,1,1)
+        self.planTrackRounds(plan,key)
+        rnds = plan.getRounds(key,[self.getStdyState().getWindow(),self.getOptions().getTestRnds()])
+        plan.rounds(key,'rounds',rnds,self.roundRuns())
+        if self.getOptions().getLoadRates() != None:
+            plan.rounds(key,'open loop',[1,1],self.roundRuns() * len(self.getOptions().getLoadRates()))
 
     def toLog(self):
         '''
         Log information about the steady state and how it 
         has been reached.
         '''
-        logging.info("Round matrices: ")
-        logging.info(self.__roundMatrices)
+        logging.info("Round matrices: " + str(len(self.__roundMatrices)) + " rounds")
+        if len(self.__loadMatrices) > 0:
+            logging.info("Open loop matrices: " + str(len(self.__loadMatrices)) + " offered loads")
         self.getStdyState().toLog()
 
     def testRound(self):
@@ -364,63 +1092,89 @@ class SsdLatencyTest(DeviceTest):
         The round consists of two inner loops: one iterating over the
         percentage of random reads/writes in the mixed workload, the other
         over different block sizes.
-        @return A matrix containing [min,max,mean] latencies of the round.
+        For mixed workloads min and max are taken over both directions, the
+        mean is weighted by the number of IOs per direction.
+        @return A matrix containing [min,max,mean] latencies of the round,
+        followed by the completion latency percentiles.
         '''
-        jobOut = ''
-        rndMatrix = []        
-        for i in SsdLatencyTest.mixWlds:
+        rndMatrix = []
+        for outRow in self.runMatrix(self.getMixWlds(),self.getBsLabels()):
             rwRow = []
-            for j in self.getBsLabels():
-                self.getFioJob().addKVArg("rwmixread",str(i))
-                self.getFioJob().addKVArg("bs",j)
-                call,jobOut = self.getFioJob().start()
-                if call == False:
-                    exit(1)
-                logging.info("mixLoad: " +str(i))
-                logging.info("bs: "+j)
-                logging.info(jobOut)
-                logging.info("######")
-                if i == 65:
-                    #if we have a mixed workload weight the latencies
-                    l = [0,0,0]
-                    r = self.getFioJob().getReadLats(jobOut)
-                    w = self.getFioJob().getWriteLats(jobOut)
-                    #FIXME Is this also correct for Min and Max?
-                    l[0] = (0.65 * r[0]) + (0.35 * w[0])
-                    l[1] = (0.65 * r[1]) + (0.35 * w[1])
-                    l[2] = (0.65 * r[2]) + (0.35 * w[2])
-                else:
-                    l = self.getFioJob().getTotLats(jobOut)
-                rwRow.append(l)
+            for jobOut in outRow:
+                rwRow.append(self.cellValue(jobOut))
             rndMatrix.append(rwRow)
         return rndMatrix
 
+    def cellValue(self,jobOut):
+        ''' Return [min,max,mean] latencies and the percentiles of a fio output. '''
+        res = self.getFioJob().getResult(jobOut)
+        l = res.getMixedLats()
+        l.extend(res.getMixedPercentiles())
+        return l
+
+    def reparse(self,archive):
+        mats = self.reparseMatrices(archive,self.getMixWlds(),self.cellValue)
+        if mats == None:
+            return False
+        self.__roundMatrices = mats
+        return True
+
+    def runLoads(self):
+        '''
+        Carry out one open loop round per offered load of the options, to
+        see the latencies under a realistic utilisation instead of QD1.
+        Cells not reaching the offered load are saturated, their latencies
+        are those of a closed loop at the given iodepth.
+        '''
+        for rate in self.getOptions().getLoadRates():
+            logging.info("#################")
+            logging.info("Open loop round at " + str(rate) + " IOPS")
+            loadMatrix = []
+            for outRow in self.runLoadMatrix(self.getMixWlds(),self.getBsLabels(),rate):
+                rwRow = []
+                for jobOut in outRow:
+                    iops = self.getFioJob().getIOPS(jobOut)
+                    if iops < rate * 0.95:
+                        logging.warning("# Offered load of " + str(rate) + " IOPS not reached, achieved "
+                                        + str(iops) + " IOPS")
+                    rwRow.append([rate,iops] + self.cellValue(jobOut))
+                loadMatrix.append(rwRow)
+            self.__loadMatrices.append(loadMatrix)
+
     def runRounds(self):
         '''
         Carry out the latency test rounds and check if the steady state is reached.
         For a maximum of 25 rounds the test loop is carried out. After each
         test round we check for a measurement window of the last 5 rounds if
-        the steady state has been reached.
+        the steady state has been reached. With the tracking cell fast path
+        the rounds of the tracking cell alone count to the maximum.
         @return True if the steady state has been reached, False if not.
         '''
         rndMatrix = []
         steadyValues = deque([])
         xranges = deque([])#Rounds of current measurement window
+        window = self.getStdyState().getWindow()
+        mix,bs = self.getTrackIndex()
+        trackRnds = self.runTrackRounds(lambda jobOut: self.cellValue(jobOut)[2])
         
-        for i in range(self.getOptions().getTestRnds()):
+        for i in range(self.getOptions().getTestRnds() - trackRnds):
             logging.info("#################")
             logging.info("Round nr. "+str(i))
-            rndMatrix = self.testRound()
-            self.getRndMatrices().append(rndMatrix)
+            rndMatrix = self.resumedRound(i)
+            if rndMatrix == None:
+                self.setRound(i)
+                rndMatrix = self.timedRound()
+                self.getRndMatrices().append(rndMatrix)
+                self.checkpoint()
             #Latencies always consist of [min,max,mean] latency
-            #Take mean/average for steady state detection
-            steadyValues.append(rndMatrix[-1][-2][2])
+            #Take mean/average of the tracking cell for steady state detection
+            steadyValues.append(rndMatrix[mix][bs][2])
             xranges.append(i)
-            if i > 4:
+            if len(xranges) > window:
                 xranges.popleft()
                 steadyValues.popleft()
-            #check if the steady state has been reached in the last 5 rounds
-            if i >= 4:
+            #check if the steady state has been reached in the last window rounds
+            if len(xranges) == window:
                 steadyState = self.getStdyState().checkSteadyState(xranges,steadyValues,i)
                 if steadyState == True:
                     break
@@ -432,33 +1186,38 @@ class SsdLatencyTest(DeviceTest):
         Start the rounds, log the steady state infos.
         @return True if all tests were run
         '''
-        try: 
-            self.getDevice().secureErase()
-        except RuntimeError:
-            logging.error("# Could not carry out secure erase for "+self.getDevice().getDevPath())
-            raise
+        if self.isResumed():
+            logging.info("# Resuming Latency test, secure erase and preconditioning are skipped")
+        else:
+            try: 
+                self.timed('erase',self.getDevice().secureErase)
+            except RuntimeError:
+                logging.error("# Could not carry out secure erase for "+self.getDevice().getDevPath())
+                raise
         try:
             self.getDevice().logSMARTlog()
         except RuntimeError:
             logging.error("# Could not carry out retrieving SMART log for "+self.getDevice().getDevPath())
             raise
-        return True
-        try:
-            if self.__userOptions == None:
-                self.getDevice().precondition(1,1)
-            else:
-                if self.__userOptions.getNj() != None:
-                    nj = self.__userOptions.getNj()
-                if self.__userOptions.getIod() != None:
-                    iod = self.__userOptions.getIod()
-                self.getDevice().precondition(nj,iod)
-        except RuntimeError:
-            logging.error("# Could not carry out preconditioning for "+self.getDevice().getDevPath())
-            raise
+        if not self.isResumed():
+            try:
+                if self.__userOptions == None:
+                    self.timed('precondition',self.getDevice().precondition,1,1,self.getIoEngine())
+                else:
+                    if self.__userOptions.getNj() != None:
+                        nj = self.__userOptions.getNj()
+                    if self.__userOptions.getIod() != None:
+                        iod = self.__userOptions.getIod()
+                    self.timed('precondition',self.getDevice().precondition,nj,iod,self.getIoEngine())
+            except RuntimeError:
+                logging.error("# Could not carry out preconditioning for "+self.getDevice().getDevPath())
+                raise
         logging.info("########### Starting Latency Test ###########")
         steadyState = self.runRounds()
         if steadyState == False:
             logging.info("# Steady State has not been reached for Latency Test.")
+        if self.getOptions().getLoadRates() != None:
+            self.runLoads()
         self.toLog()
         try:
             self.getDevice().logSMARTlog()
@@ -481,6 +1240,15 @@ class SsdLatencyTest(DeviceTest):
         data = json.dumps(self.__roundMatrices)
         e = etree.SubElement(r,'roundmat')
         e.text = data
+        data = json.dumps(self.__percentiles)
+        e = etree.SubElement(r,'latpercentiles')
+        e.text = data
+        if len(self.__loadMatrices) > 0:
+            data = json.dumps(self.__loadMatrices)
+            e = etree.SubElement(r,'loadmat')
+            e.text = data
+        self.appendMatrixXml(r)
+        self.appendCellXml(r)
         self.getStdyState().appendXml(r)
         return r
 
@@ -491,6 +1259,12 @@ class SsdLatencyTest(DeviceTest):
         '''
         logging.info("########### Loading latency test from "+self.getTestname()+".xml ###########")
         self.__roundMatrices = json.loads(root.findtext('roundmat'))
+        if root.findtext('latpercentiles'):
+            self.__percentiles = json.loads(root.findtext('latpercentiles'))
+        if root.findtext('loadmat'):
+            self.__loadMatrices = json.loads(root.findtext('loadmat'))
+        self.matrixFromXml(root)
+        self.cellsFromXml(root)
         self.__stdyState.fromXml(root)
         #If the current device is 4K native, remove 512 from performance test block sizes
         if self.getDevice().getLogicalSectorSize() == 4096:
@@ -508,11 +1282,19 @@ class SsdLatencyTest(DeviceTest):
         pgp.mes2DPlt(self,"avg-LAT")
         pgp.mes2DPlt(self,"max-LAT")
         pgp.latMes3DPlt(self)
+        if self.hasPercentiles():
+            for p in self.getPercentiles():
+                pgp.calcMsmtTable(self,pgp.pctMode(p))
 
 class SsdTPTest(DeviceTest):
     '''
     A class to carry out the Throughput test.
     '''
+    ## Sequential writes (0% read) of 1024k for steady state detection, it is the first block size
+    trackCell = [0,'1024k']
+    ## Block sizes kept within a time budget
+    coreBsLabels = ["1024k","64k","8k"]
+
     def __init__(self,testname,device,options):
         '''
         Constructor.
@@ -538,14 +1320,31 @@ class SsdTPTest(DeviceTest):
     def getRndMatrices(self): return self.__roundMatrices
     def getStdyState(self): return self.__stdyState
     def getBsLabels(self): return self.__bsLabels
+    def setBsLabels(self,bs): self.__bsLabels = list(bs)
+
+    def calibration(self):
+        calib = super(SsdTPTest,self).calibration()
+        if len(self.__roundMatrices) > 0:
+            #the write rounds of the tracked first block size determine the rounds of all block sizes
+            calib['rounds'] = [len(self.__roundMatrices[0][1])]
+            writes = [w for rw in self.__roundMatrices for w in rw[1]]
+            calib['writeRate'] = [sum(writes) * 1024.0 / len(writes)]
+        return calib
+
+    def plan(self,plan,key):
+        bs = len(self.getBsLabels())
+        plan.prepare(key,bs)
+        rnds = plan.getRounds(key,[self.getStdyState().getWindow(),self.getOptions().getTestRnds()])
+        rnds = [r * bs for r in rnds]
+        plan.rounds(key,'write rounds',rnds,1,plan.getWriteRate(key),bs * self.getOptions().getTPramptime())
+        plan.rounds(key,'read rounds',rnds,1,None)
 
     def toLog(self):
         '''
         Log information about the steady state and how it 
         has been reached.
         '''
-        logging.info("Round matrices: ")
-        logging.info(self.__roundMatrices)
+        logging.info("Round matrices: " + str(len(self.__roundMatrices)) + " block sizes")
         self.getStdyState().toLog()
 
     def testRound(self,bs):
@@ -555,29 +1354,29 @@ class SsdTPTest(DeviceTest):
         @param bs The current block size to use.
         @return Read and Write bandwidths [tpRead,tpWrite]
         '''
-        self.getFioJob().addKVArg("bs",bs)
+        spec = self.getFioJob().getSpec().with_(bs=bs)
         jobOut = ''
         tpRead = 0 #read bandwidth
         tpWrite = 0#write bandwidth
 
         #start read tests
-        self.getFioJob().addKVArg("rw","read")
-        call,jobOut = self.getFioJob().start()
+        call,jobOut = self.getFioJob().start(spec.with_(rw="read"))
         if call == False:
-            exit(1)
+            raise RuntimeError("fio job error")
         logging.info("Read TP test:")
         logging.info(jobOut)
         logging.info("######")
+        self.archiveOutput(jobOut,"read",bs)
         tpRead = self.getFioJob().getTPRead(jobOut)
         
         #start write tests
-        self.getFioJob().addKVArg("rw","write")
-        call,jobOut = self.getFioJob().start()
+        call,jobOut = self.getFioJob().start(spec.with_(rw="write"))
         if call == False:
-            exit(1)
+            raise RuntimeError("fio job error")
         logging.info("Write TP test:")
         logging.info(jobOut)
         logging.info("######")
+        self.archiveOutput(jobOut,"write",bs)
         tpWrite = self.getFioJob().getTPWrite(jobOut)
         return [tpRead,tpWrite]
 
@@ -590,35 +1389,36 @@ class SsdTPTest(DeviceTest):
         @param rnd The current round number
         @return Read or Write bandwidths tpRead or tpWrite
         '''
-        self.getFioJob().addKVArg("bs",bs)
+        spec = self.getFioJob().getSpec().with_(bs=bs)
         jobOut = ''
+        self.setRound(rnd)
         if rw == "read":
             tpRead = 0 #read bandwidth
             #start read tests
-            self.getFioJob().addKVArg("rw","read")
-            call,jobOut = self.getFioJob().start()
+            call,jobOut = self.getFioJob().start(spec.with_(rw="read"))
             if call == False:
-                 exit(1)
+                raise RuntimeError("fio job error")
             logging.info("Read TP test:")
             logging.info(jobOut)
             logging.info("######")
+            self.archiveOutput(jobOut,"read",bs)
             tpRead = self.getFioJob().getTPRead(jobOut)
             return tpRead
         else:
             if rw == "write":
                 tpWrite = 0 #write bandwidth
                 #start write tests
-                self.getFioJob().addKVArg("rw","write")
                 if rnd == 0:
-                    self.getFioJob().addKVArg("ramp_time",str(self.getOptions().getTPramptime()))
+                    spec = spec.with_(rw="write",ramp_time=self.getOptions().getTPramptime())
                 else:
-                    self.getFioJob().addKVArg("ramp_time","0")
-                call,jobOut = self.getFioJob().start()
+                    spec = spec.with_(rw="write",ramp_time=0)
+                call,jobOut = self.getFioJob().start(spec)
                 if call == False:
-                    exit(1)
+                    raise RuntimeError("fio job error")
                 logging.info("Write TP test:")
                 logging.info(jobOut)
                 logging.info("######")
+                self.archiveOutput(jobOut,"write",bs)
                 tpWrite = self.getFioJob().getTPWrite(jobOut)
                 return tpWrite
             else:
@@ -629,13 +1429,18 @@ class SsdTPTest(DeviceTest):
         Carry out the throughput/bandwidth test rounds and check if the steady state is reached.
          @return True if the steady state has been reached, False if not.
         '''
-        stdyValsWrite = deque([])#List of 1M sequential write IOPS
+        stdyValsWrite = deque([])#List of the tracked block size sequential write IOPS, 1M per default
         xrangesWrite = deque([])#Rounds of current measurement window
+        window = self.getStdyState().getWindow()
         
         #rounds are the same for IOPS and throughput
-        for j in self.getBsLabels():
+        for k,j in enumerate(self.getBsLabels()):
+            #block sizes finished before resuming are kept, an unfinished one is restarted
+            if k < len(self.getRndMatrices()):
+                logging.info("# Block size " + j + " was finished before resuming")
+                continue
             try: 
-                self.getDevice().secureErase()
+                self.timed('erase',self.getDevice().secureErase)
             except RuntimeError:
                 logging.error("# Could not carry out secure erase for "+self.getDevice().getDevPath())
                 raise
@@ -648,7 +1453,7 @@ class SsdTPTest(DeviceTest):
             for i in range(self.getOptions().getTestRnds()):
                 logging.info("######")
                 logging.info("Write Round nr. "+str(i))
-                tpWrite = self.testRound("write",j,i)
+                tpWrite = self.timedRound("write",j,i)
                 tpWrite_l.append(tpWrite)
                 
                 #if the rounds have been set by steady state for 1M block size
@@ -657,15 +1462,15 @@ class SsdTPTest(DeviceTest):
                 if self.getStdyState().getRnds() != 0 and self.getStdyState().getRnds() == i:
                     break
                 
-                # Use 1M block sizes sequential write for steady state detection
-                if j == "1024k":
+                # Use the tracked block size sequential write for steady state detection
+                if j == self.getTrackCell()[1]:
                     stdyValsWrite.append(tpWrite)
                     xrangesWrite.append(i)
-                    if i > 4:
+                    if len(xrangesWrite) > window:
                         xrangesWrite.popleft()
                         stdyValsWrite.popleft()
-                        #check if the steady state has been reached in the last 5 rounds
-                    if i >= 4:
+                        #check if the steady state has been reached in the last window rounds
+                    if len(xrangesWrite) == window:
                         steadyState = self.getStdyState().checkSteadyState(xrangesWrite,stdyValsWrite,i)
                         #reached a steady state
                         if steadyState == True:
@@ -681,7 +1486,7 @@ class SsdTPTest(DeviceTest):
             for i in range(self.getOptions().getTestRnds()):
                 logging.info("######")
                 logging.info("Read Round nr. "+str(i))
-                tpRead = self.testRound("read",j,i)
+                tpRead = self.timedRound("read",j,i)
                 tpRead_l.append(tpRead)
 
                 #if the rounds have been set by steady state for 1M block size
@@ -691,6 +1496,7 @@ class SsdTPTest(DeviceTest):
                     break
 
             self.getRndMatrices().append([tpRead_l,tpWrite_l])
+            self.checkpoint()
         #Return current steady state
         return self.getStdyState().isSteady()
         
@@ -730,6 +1536,8 @@ class SsdTPTest(DeviceTest):
         data = json.dumps(self.__roundMatrices)
         e = etree.SubElement(r,'roundmat')
         e.text = data
+        self.appendMatrixXml(r)
+        self.appendCellXml(r)
         self.getStdyState().appendXml(r)
         return r
 
@@ -740,6 +1548,8 @@ class SsdTPTest(DeviceTest):
         '''
         logging.info("########### Loading TP test from "+self.getTestname()+".xml ###########")
         self.__roundMatrices = json.loads(root.findtext('roundmat'))
+        self.matrixFromXml(root)
+        self.cellsFromXml(root)
         self.__stdyState.fromXml(root)
         #If the current device is 4K native, remove 512 from performance test block sizes
         if self.getDevice().getLogicalSectorSize() == 4096:
@@ -760,6 +1570,10 @@ class SsdWriteSatTest(DeviceTest):
     '''
     A class to carry out the Write Saturation test.
     '''
+    intervalLogs = True
+    ## Carry out the test for a maximum of 24h, one round runs for 1 minute
+    maxRnds = 60*24
+
     def __init__(self,testname,device,options=None):
         '''
         Constructor.
@@ -782,14 +1596,36 @@ class SsdWriteSatTest(DeviceTest):
     def getRnds(self): return self.__rounds
     def getRndMatrices(self): return self.__roundMatrices
 
+    def calibration(self):
+        calib = super(SsdWriteSatTest,self).calibration()
+        if len(self.__roundMatrices) > 0 and len(self.__roundMatrices[0]) > 0:
+            iops = self.__roundMatrices[0]
+            calib['writeRate'] = [sum(iops) * 4096.0 / len(iops)]
+        return calib
+
+    def plan(self,plan,key):
+        plan.prepare(key,1)
+        size = plan.getDevSizeB()
+        maxRounds = self.getMaxRnds()
+        if size == None:
+            plan.rounds(key,'rounds',[1,maxRounds],1,None,adaptive=False)
+            return
+        rt = self.getOptions().getRuntime()
+        rates = plan.getWriteRate(key,Plan.satRate)
+        rnds = [min(maxRounds,int(math.ceil(size * 4.0 / (r * rt)))) for r in rates]
+        plan.rounds(key,'rounds',rnds,1,rates,adaptive=False)
+
     def toLog(self):
         '''
         Log information about write saturation test.
         '''
         logging.info("Write Sat rounds: ")
         logging.info(self.__rounds)
-        logging.info("Round matrices: ")
-        logging.info(self.__roundMatrices)
+        if len(self.__roundMatrices) > 0:
+            logging.info("Round matrices: " + str(len(self.__roundMatrices[0])) + " rounds")
+
+    def lastRound(self):
+        return [len(self.__roundMatrices[0]) - 1,[self.__roundMatrices[0][-1],self.__roundMatrices[1][-1]]]
 
     def testRound(self):
         '''
@@ -799,7 +1635,10 @@ class SsdWriteSatTest(DeviceTest):
         '''
         (call,jobOut) = self.getFioJob().start()
         if call == False:
-            exit(1)
+            raise RuntimeError("fio job error")
+        if self.getFioJob().hasIntervalLogs():
+            self.getIntervals().append(self.getFioJob().collectIntervalLogs())
+        self.archiveOutput(jobOut,"randwrite","4k")
         
         writeIO = self.getFioJob().getTotIOWrite(jobOut)
         iops = self.getFioJob().getIOPS(jobOut)
@@ -819,24 +1658,36 @@ class SsdWriteSatTest(DeviceTest):
         devSzB = self.getDevice().getDevSizeB()
         logging.info("#Device size in Byte: " + str(devSzB))
         totWriteIO = 0 #total written IO in KB, must be greater than 4xDevice 
-        #carry out the test for a maximum of 24h, one round runs for 1 minute
-        maxRounds = 60*24
+        maxRounds = self.getMaxRnds()
         writeIO = 0
         iops_l = [] #overall list of iops
         iops = 0 #IOPS per round
         lats_l = []#overall list of latencies
         lats = []#latencies per round
+        #continue with the rounds and written IO of a checkpoint
+        if self.isResumed() and len(self.__roundMatrices) == 2:
+            iops_l,lats_l = self.__roundMatrices
+            totWriteIO = self.getResume().get('totwriteio',0)
+            logging.info("# Resuming at round " + str(len(iops_l)) + ", " + str(totWriteIO) + "KB written")
+        self.__roundMatrices = [iops_l,lats_l]
         
         #range starts at 0, so 1 must be subtracted
         self.__rounds = maxRounds - 1
+        startRnd = len(iops_l)
+        if startRnd > 0 and (totWriteIO * 1024) >= (devSzB * 4):
+            #the last round was finished before resuming
+            self.__rounds = startRnd - 1
+            startRnd = maxRounds
         #assume all rounds must be carried out
-        for i in range(maxRounds):
+        for i in range(startRnd,maxRounds):
             logging.info("#################")
             logging.info("Round nr. "+str(i))
-            writeIO,iops,lats = self.testRound()
+            self.setRound(i)
+            writeIO,iops,lats = self.timedRound()
             iops_l.append(iops)
             lats_l.append(lats)
             totWriteIO += writeIO
+            self.checkpoint({'totwriteio':totWriteIO})
             if i == 0:
                 logging.info("#If write IO stays steady, it will take "
                              +str((devSzB * 4) / (writeIO * 1024))+" rounds to complete.")
@@ -844,20 +1695,36 @@ class SsdWriteSatTest(DeviceTest):
             if (totWriteIO * 1024) >= (devSzB * 4):
                 self.__rounds = i
                 break
-        self.__roundMatrices.append(iops_l)
-        self.__roundMatrices.append(lats_l)
         logging.info("#Write saturation has written " + str(totWriteIO) + "KB")
 
+    def reparse(self,archive):
+        iops_l = []
+        lats_l = []
+        for rnd in archive.getRounds(type(self).__name__):
+            if ("randwrite","4k") not in rnd:
+                logging.error("# Error: archive misses a write saturation round")
+                return False
+            jobOut = rnd[("randwrite","4k")]
+            iops_l.append(self.getFioJob().getIOPS(jobOut))
+            lats_l.append(self.getFioJob().getWriteLats(jobOut))
+        if len(iops_l) == 0:
+            return False
+        self.__roundMatrices = [iops_l,lats_l]
+        return True
+
     def run(self):
         '''
         Start the rounds, log number of rounds until 4 times device size was written.
         @return True if all tests were run
         '''
-        try: 
-            self.getDevice().secureErase()
-        except RuntimeError:
-            logging.error("# Could not carry out secure erase for "+self.getDevice().getDevPath())
-            raise
+        if self.isResumed():
+            logging.info("# Resuming Write Saturation test, secure erase is skipped")
+        else:
+            try: 
+                self.timed('erase',self.getDevice().secureErase)
+            except RuntimeError:
+                logging.error("# Could not carry out secure erase for "+self.getDevice().getDevPath())
+                raise
         try:
             self.getDevice().logSMARTlog()
         except RuntimeError:
@@ -891,6 +1758,8 @@ class SsdWriteSatTest(DeviceTest):
         data = json.dumps(self.__rounds)
         e = etree.SubElement(r,'rndnr')
         e.text = data
+        self.appendMatrixXml(r)
+        self.appendCellXml(r)
         return r
 
     def fromXml(self,root):
@@ -901,6 +1770,8 @@ class SsdWriteSatTest(DeviceTest):
         logging.info("########### Loading write saturation test from "+self.getTestname()+".xml ###########")
         self.__roundMatrices = json.loads(root.findtext('roundmat'))
         self.__rounds = json.loads(root.findtext('rndnr'))
+        self.matrixFromXml(root)
+        self.cellsFromXml(root)
         self.getFioJob().fromXml(root)
         self.getOptions().fromXml(root)
         self.toLog()
@@ -910,6 +1781,8 @@ class SsdWriteSatTest(DeviceTest):
         import plots.genPlots as pgp
         pgp.writeSatIOPSPlt(self)
         pgp.writeSatLatPlt(self)
+        if len(self.getIntervals()) > 0:
+            pgp.intervalPlt(self,"iops")
 
 class HddIopsTest(DeviceTest):
     '''
@@ -943,15 +1816,28 @@ class HddIopsTest(DeviceTest):
 
     def getRndMatrices(self): return self.__roundMatrices
     def getBsLabels(self): return self.__bsLabels
+    def setBsLabels(self,bs): self.__bsLabels = list(bs)
+
+    def roundRuns(self):
+        return len(self.getMixWlds()) * len(self.getBsLabels()) * (1 + len(self.getDistributions()))
+
+    def calibration(self):
+        calib = super(HddIopsTest,self).calibration()
+        if len(self.__roundMatrices) > 0:
+            calib['writeRate'] = [mixWriteRate(self.__roundMatrices[-1],self.getMixWlds(),self.getBsLabels())]
+        return calib
+
+    def plan(self,plan,key):
+        rnds = [self.getMaxRnds(),self.getMaxRnds()]
+        plan.rounds(key,'rounds',rnds,self.roundRuns(),plan.getWriteRate(key))
 
     def toLog(self):
         '''
         Log information about IOPS test.
         '''
         logging.info("IOPS rounds: ")
-        logging.info(HddIopsTest.maxRnds)
-        logging.info("Round matrices: ")
-        logging.info(self.__roundMatrices)
+        logging.info(self.getMaxRnds())
+        logging.info("Round matrices: " + str(len(self.__roundMatrices)) + " rounds")
 
     def toXml(self,root):
         '''
@@ -968,9 +1854,11 @@ class HddIopsTest(DeviceTest):
         data = json.dumps(self.__roundMatrices)
         e = etree.SubElement(r,'roundmat')
         e.text = data
-        data = json.dumps(HddIopsTest.maxRnds)
+        data = json.dumps(self.getMaxRnds())
         e = etree.SubElement(r,'rndnr')
         e.text = data
+        self.appendMatrixXml(r)
+        self.appendCellXml(r)
         return r
 
     def fromXml(self,root):
@@ -980,6 +1868,8 @@ class HddIopsTest(DeviceTest):
         '''
         logging.info("########### Loading IOPS test from "+self.getTestname()+".xml ###########")
         self.__roundMatrices = json.loads(root.findtext('roundmat'))
+        self.matrixFromXml(root)
+        self.cellsFromXml(root)
         self.getFioJob().fromXml(root)
         self.getOptions().fromXml(root)
         self.toLog()
@@ -993,35 +1883,36 @@ class HddIopsTest(DeviceTest):
         @return A matrix containing the sum of average IOPS
         '''
         
-        self.getFioJob().addKVArg("offset", str(offset))
-        self.getFioJob().addKVArg("size", str(size))
+        spec = self.getFioJob().getSpec().with_(offset=offset,size=size)
         #Iterate over mixed rand read and write and vary block size
         #save the output of fio for parsing and retreiving IOPS
-        jobOut = ''
         rndMatrix = []
-        for i in HddIopsTest.mixWlds:
+        for outRow in self.runMatrix(self.getMixWlds(),self.getBsLabels(),spec):
             rwRow = []
-            for j in self.getBsLabels():
-                self.getFioJob().addKVArg("rwmixread",str(i))
-                self.getFioJob().addKVArg("bs",j)
-                call,jobOut = self.getFioJob().start()
-                if call == False:
-                    exit(1)
-                logging.info("mixLoad: " +str(i))
-                logging.info("bs: "+j)
-                logging.info(jobOut)
-                logging.info("######")
-                rwRow.append(self.getFioJob().getIOPS(jobOut))
+            for jobOut in outRow:
+                rwRow.append(self.cellValue(jobOut))
             rndMatrix.append(rwRow)
+        self.runDistMatrices(self.getMixWlds(),self.getBsLabels(),self.cellValue,spec)
         return rndMatrix
 
+    def cellValue(self,jobOut):
+        ''' Return the sum of average IOPS of a fio output. '''
+        return self.getFioJob().getIOPS(jobOut)
+
+    def reparse(self,archive):
+        mats = self.reparseMatrices(archive,self.getMixWlds(),self.cellValue)
+        if mats == None or not self.reparseDistMatrices(archive,self.getMixWlds(),self.cellValue):
+            return False
+        self.__roundMatrices = mats
+        return True
+
     def runRounds(self):
         '''
         Run the rounds for IOPS HDD test.
         '''
         rndMatrix = []
         devSizeKB = self.getDevice().getDevSizeKB()
-        increment = (devSizeKB * 1024) / self.maxRnds
+        increment = (devSizeKB * 1024) / self.getMaxRnds()
         #We must ensure that increment can be divided by 4096
         #as we need to align the direct IO to block size. If it
         #is an advanced sector format with 4k 4096 is ok, if the 
@@ -1031,13 +1922,16 @@ class HddIopsTest(DeviceTest):
             increment = increment - rem
         logging.info("Increment in byte: "+str(increment))
         offset = 0
-        for i in range(HddIopsTest.maxRnds):
+        for i in range(self.getMaxRnds()):
             logging.info("#################")
             logging.info("Round nr. "+str(i))
             logging.info("Offset "+str(offset))
             #we read and write increment starting at the offset
-            rndMatrix = self.testRound(offset,increment)
-            self.getRndMatrices().append(rndMatrix)
+            if self.resumedRound(i) == None:
+                self.setRound(i)
+                rndMatrix = self.timedRound(offset,increment)
+                self.getRndMatrices().append(rndMatrix)
+                self.checkpoint()
             offset += increment
         return
 
@@ -1055,6 +1949,8 @@ class HddIopsTest(DeviceTest):
         ''' Generate plots for IOPS. '''
         import plots.genPlots as pgp
         pgp.IOPSplot(self)
+        if len(self.getDistMatrices()) > 0:
+            pgp.distPlt(self,self.getMixWlds(),range(len(self.getDistMatrices())))
 
 class HddTPTest(DeviceTest):
     '''
@@ -1086,15 +1982,22 @@ class HddTPTest(DeviceTest):
 
     def getRndMatrices(self): return self.__roundMatrices
     def getBsLabels(self): return self.__bsLabels
+    def setBsLabels(self,bs): self.__bsLabels = list(bs)
+
+    def roundRuns(self):
+        return 2
+
+    def plan(self,plan,key):
+        rnds = [self.getMaxRnds() * len(self.getBsLabels())] * 2
+        plan.rounds(key,'rounds',rnds,self.roundRuns())
 
     def toLog(self):
         '''
         Log information about TP test.
         '''
         logging.info("TP rounds: ")
-        logging.info(HddTPTest.maxRnds)
-        logging.info("Round matrices: ")
-        logging.info(self.__roundMatrices)
+        logging.info(self.getMaxRnds())
+        logging.info("Round matrices: " + str(len(self.__roundMatrices)) + " block sizes")
 
     def toXml(self,root):
         '''
@@ -1111,6 +2014,8 @@ class HddTPTest(DeviceTest):
         data = json.dumps(self.__roundMatrices)
         e = etree.SubElement(r,'roundmat')
         e.text = data
+        self.appendMatrixXml(r)
+        self.appendCellXml(r)
         return r
 
     def fromXml(self,root):
@@ -1120,6 +2025,8 @@ class HddTPTest(DeviceTest):
         '''
         logging.info("########### Loading TP test from "+self.getTestname()+".xml ###########")
         self.__roundMatrices = json.loads(root.findtext('roundmat'))
+        self.matrixFromXml(root)
+        self.cellsFromXml(root)
         self.getFioJob().fromXml(root)
         self.getOptions().fromXml(root)
         self.toLog()
@@ -1133,31 +2040,29 @@ class HddTPTest(DeviceTest):
         @param size The size to read starting from offset.
         @return Read and Write bandwidths [tpRead,tpWrite]
         '''
-        self.getFioJob().addKVArg("offset", str(offset))
-        self.getFioJob().addKVArg("size", str(size))
-        self.getFioJob().addKVArg("bs",bs)
+        spec = self.getFioJob().getSpec().with_(offset=offset,size=size,bs=bs)
         jobOut = ''
         tpRead = 0 #read bandwidth
         tpWrite = 0#write bandwidth
 
         #start read tests
-        self.getFioJob().addKVArg("rw","read")
-        call,jobOut = self.getFioJob().start()
+        call,jobOut = self.getFioJob().start(spec.with_(rw="read"))
         if call == False:
-            exit(1)
+            raise RuntimeError("fio job error")
         logging.info("Read TP test:")
         logging.info(jobOut)
         logging.info("######")
+        self.archiveOutput(jobOut,"read",bs)
         tpRead = self.getFioJob().getTPRead(jobOut)
     
         #start write tests
-        self.getFioJob().addKVArg("rw","write")
-        call,jobOut = self.getFioJob().start()
+        call,jobOut = self.getFioJob().start(spec.with_(rw="write"))
         if call == False:
-            exit(1)
+            raise RuntimeError("fio job error")
         logging.info("Write TP test:")
         logging.info(jobOut)
         logging.info("######")
+        self.archiveOutput(jobOut,"write",bs)
         tpWrite = self.getFioJob().getTPWrite(jobOut)
         return [tpRead,tpWrite]
 
@@ -1168,7 +2073,7 @@ class HddTPTest(DeviceTest):
         devSizeB = self.getDevice().getDevSizeB()
         #In each round the offset is incremented
         #if it can be divided by 512, we can also divide it by 128
-        increment = devSizeB / HddTPTest.maxRnds
+        increment = devSizeB / self.getMaxRnds()
         #we must ensure that increment can be divided by 4096
         #as we need to align the direct IO to block size. If it
         #is an advanced sector format with 4k 4096 is ok, if the 
@@ -1178,24 +2083,29 @@ class HddTPTest(DeviceTest):
             increment = increment - rem
         logging.info("Increment in byte: "+str(increment))
         #Number of rounds are the same for IOPS and throughput
-        for j in self.getBsLabels():
+        for k,j in enumerate(self.getBsLabels()):
+            #block sizes finished before resuming are kept, an unfinished one is restarted
+            if k < len(self.getRndMatrices()):
+                logging.info("# Block size " + j + " was finished before resuming")
+                continue
             tpRead_l = []
             tpWrite_l = []
             logging.info("#################")
             logging.info("Current block size. "+str(j))
             #set offset back for current bs
             offset = 0
-            for i in range(HddTPTest.maxRnds):
+            for i in range(self.getMaxRnds()):
                 logging.info("######")
                 logging.info("Round nr. "+str(i))
                 logging.info("Offset "+str(offset))
                 #we read and write increment starting at the offset
-                tpRead,tpWrite = self.testRound(j,offset,increment)
+                tpRead,tpWrite = self.timedRound(j,offset,increment)
                 tpRead_l.append(tpRead)
                 tpWrite_l.append(tpWrite)
                 offset += increment
             #finished current bs
             self.getRndMatrices().append([tpRead_l,tpWrite_l])
+            self.checkpoint()
 
     def run(self):
         '''
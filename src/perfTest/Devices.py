@@ -6,21 +6,25 @@ Created on Aug 6, 2014
 
 from abc import ABCMeta, abstractmethod
 import logging
+import os
 import subprocess
 import json
 import re
 from lxml import etree
-from time import sleep
 
 from fio.FioJob import FioJob
 from system.OS import Storcli
 from system.OS import Mdadm
+from system.Quiescence import Quiescence
 
 
 class Device(object, metaclass=ABCMeta):
     '''
-    Representing the tested device.
+    Representing the tested device. A regular file can be tested instead
+    of a block device, e.g. to try a setup with a fake fio.
     '''
+    ## Sector size in bytes of a regular file tested as device.
+    fileSectorSize = 512
 
     def __init__(self, devtype, path, devname, vendor=None, intfce=None):
         '''
@@ -118,6 +122,10 @@ class Device(object, metaclass=ABCMeta):
     def isMounted(self): return self.__devismounted
     def isAvailable(self): return self.__devisavailable
 
+    def isFile(self):
+        ''' Check if the tested device is a regular file. '''
+        return self.__path != None and os.path.isfile(self.__path)
+
     def calcDevSizeKB(self):
         '''
         Get the device size in KByte.
@@ -126,6 +134,8 @@ class Device(object, metaclass=ABCMeta):
         @return Size on success
         @exception RuntimeError if blockdev fails
         '''
+        if self.isFile():
+            return self.calcDevSizeB() / 1024
         out = subprocess.Popen(['blockdev','--getss',self.__path],stdout=subprocess.PIPE,stderr=subprocess.PIPE,universal_newlines=True)
         (stdout,stderr) = out.communicate()
         if stderr != '':
@@ -157,6 +167,12 @@ class Device(object, metaclass=ABCMeta):
         @return Size on success
         @exception RuntimeError if blockdev fails
         '''
+        if self.isFile():
+            byteSize = os.path.getsize(self.__path)
+            if byteSize == 0 or byteSize % 1024 != 0:
+                logging.error("# Error: the size of file " + self.__path + " must be a multiple of 1024 bytes")
+                raise RuntimeError("file size error")
+            return byteSize
         out = subprocess.Popen(['blockdev','--getsize64',self.__path],stdout=subprocess.PIPE,stderr=subprocess.PIPE,universal_newlines=True)
         (stdout,stderr) = out.communicate()
         if stderr != '':
@@ -176,6 +192,8 @@ class Device(object, metaclass=ABCMeta):
         @return Size on success
         @exception RuntimeError if blockdev fails or size is 0
         '''
+        if self.isFile():
+            return Device.fileSectorSize
         out = subprocess.Popen(['blockdev','--getpbsz',self.__path],stdout=subprocess.PIPE,stderr=subprocess.PIPE,universal_newlines=True)
         (stdout,stderr) = out.communicate()
         if stderr != '':
@@ -196,6 +214,8 @@ class Device(object, metaclass=ABCMeta):
         @return Size on success
         @exception RuntimeError if blockdev fails or size is 0
         '''
+        if self.isFile():
+            return Device.fileSectorSize
         out = subprocess.Popen(['blockdev','--getss',self.__path],stdout=subprocess.PIPE,stderr=subprocess.PIPE,universal_newlines=True)
         (stdout,stderr) = out.communicate()
         if stderr != '':
@@ -217,6 +237,9 @@ class Device(object, metaclass=ABCMeta):
         @return True if device is mounted, False if not
         @exception RuntimeError if mount command fails
         '''
+        #a file is not mounted itself
+        if self.isFile():
+            return False
         out = subprocess.Popen(['mount','-l'],stdout=subprocess.PIPE,stderr=subprocess.PIPE,universal_newlines=True)
         (stdout,stderr) = out.communicate()
         if stderr != '':
@@ -234,6 +257,8 @@ class Device(object, metaclass=ABCMeta):
         Check if the given device is a valid partition.
         @return True if yes, False if not.
         '''
+        if self.isFile():
+            return True
         out = subprocess.Popen(['cat','/proc/partitions'],stdout=subprocess.PIPE,stderr=subprocess.PIPE,universal_newlines=True)
         (stdout,stderr) = out.communicate()
         if stderr != '':
@@ -361,6 +386,10 @@ class Device(object, metaclass=ABCMeta):
         # The device info has already been set
         if self.__devinfo != None:
             return True
+        # A file has no device information
+        if self.isFile():
+            logging.error("# Error: " + self.__path + " is a file, please use a description file to set device information!")
+            return False
         # If no interface is specified or compactflash/sdcard is used, try to call hdparm
         if self.getIntfce() == None or self.getIntfce() == 'compactflash' or self.getIntfce() == 'sdcard':
             # If hdparm has bad data, try to use udevadm and blockdev
@@ -659,10 +688,13 @@ class SSD(Device):
         nvme format is used for nvme devices
         @return True if device is secure erased, False if not.
         '''
+        #a file has no erase command, the preconditioning overwrites it
+        if self.isFile():
+            logging.info("# " + self.getDevPath() + " is a file, skipping Secure Erase")
+            return False
         logging.info("# Trying to run Secure Erase for device: " + self.getDevPath())
-        #before starting the erase sleep, to ensure previous device operations are finished
-        logging.info("# Sleeping for 10 seconds...")
-        sleep(10)
+        #before starting the erase wait until previous device operations are finished
+        Quiescence(self.getDevPath()).wait("secure erase")
         if self.getIntfce() == None or self.getIntfce() == 'compactflash' or self.getIntfce() == 'sdcard' or self.getIntfce() == 'usb':
             if self.secureEraseSupported():
                 self.secureEraseHdparm()
@@ -742,6 +774,8 @@ class SSD(Device):
         Log SMART log
         @return True if nvme smart-log was successful
         '''
+        if self.isFile():
+            return False
         out = subprocess.Popen(['nvme', 'smart-log', self.getDevPath() ],stdout=subprocess.PIPE,stderr=subprocess.PIPE,universal_newlines=True)
         (stdout,stderr) = out.communicate()
         if out.returncode != 0:
@@ -751,10 +785,11 @@ class SSD(Device):
             logging.info("# nvme smartlog: " + stdout)
             return True
 
-    def precondition(self,nj=1,iod=1):
+    def precondition(self,nj=1,iod=1,engine=None):
         '''
         Workload independent preconditioning for SSDs.
         Write two times the device with streaming I/O.
+        @param engine The IoEngine to write with, None for libaio.
         @return True if precontioning succeded
         @exception RuntimeError if fio command fails
         '''
@@ -766,7 +801,10 @@ class SSD(Device):
         job.addKVArg("direct","1")
         job.addSglArg("minimal")
         job.addKVArg("numjobs",str(nj))
-        job.addKVArg("ioengine","libaio")
+        if engine == None:
+            job.addKVArg("ioengine","libaio")
+        else:
+            engine.apply(job)
         job.addKVArg("iodepth",str(iod))
         job.addSglArg("group_reporting")
         job.addSglArg('refill_buffers')
@@ -891,8 +929,8 @@ class RAID(Device):
             self.__raidTec.deleteVD()
         # Create the raid device
         self.__raidTec.createVD()
-        while not self.__raidTec.isReady():
-            sleep(30)
+        #the raid has to be ready, don't limit the wait for its initialization
+        Quiescence(self.getDevPath()).wait("raid creation",self.__raidTec.isReady,None)
 
     def secureErase(self):
         '''
@@ -921,9 +959,10 @@ class RAID(Device):
         logging.info("# Creating raid device "+self.getDevPath()+" after secure erase!")
         self.createRaid()
 
-    def precondition(self,nj=1,iod=1):
+    def precondition(self,nj=1,iod=1,engine=None):
         '''
         Carries out the preconditioning for a RAID device.
+        @param engine The IoEngine to write with, None for libaio.
         '''
         if self.getType() == 'sw_mdadm':
             import multiprocessing
@@ -931,7 +970,7 @@ class RAID(Device):
             exc = m.Queue()
             ps = []
             for d in self.__raidTec.getDevices():
-                p = multiprocessing.Process(target=self.operator,args=(d,'condition',nj, iod, exc))
+                p = multiprocessing.Process(target=self.operator,args=(d,'condition',nj, iod, exc, engine))
                 ps.append(p)
                 p.start()
             for p in ps:
@@ -943,18 +982,18 @@ class RAID(Device):
                 raise RuntimeError("precondition error")
         if self.getType() == 'hw_lsi':
             tmpSSD = SSD('ssd', self.getDevPath(), self.getDevName())
-            tmpSSD.precondition(nj, iod)
+            tmpSSD.precondition(nj, iod, engine)
         # After preconditioning create the raid device
         logging.info("# Creating raid device "+self.getDevPath()+" after workload independet preconditioning!")
         self.createRaid()
 
-    def operator(self, path, op, nj, iod, exc):
+    def operator(self, path, op, nj, iod, exc, engine=None):
         try:
             tmpSSD = SSD('ssd', path, self.getDevName())
             tmpSSD.setInterface(self.getIntfce())
             if op == 'erase':
                 tmpSSD.secureErase()
             if op == 'condition':
-                tmpSSD.precondition(nj, iod)
+                tmpSSD.precondition(nj, iod, engine)
         except RuntimeError:
             exc.put('Error')
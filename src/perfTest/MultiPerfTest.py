@@ -0,0 +1,237 @@
+'''
+Runs the performance tests of several devices concurrently, every device
+in its own worker process.
+'''
+
+import logging
+import multiprocessing
+import json
+import os
+import sys
+import time
+
+from perfTest.Devices import SSD
+from perfTest.Devices import HDD
+from perfTest.PerfTest import SsdPerfTest
+from perfTest.PerfTest import HddPerfTest
+from perfTest.WorkloadPlan import WorkloadPlan
+from perfTest.Budget import Budget
+from system.Quiescence import Quiescence
+
+## Format of the log files of the parent and the workers.
+logFormat = '%(asctime)s %(name)-8s %(levelname)-8s %(message)s'
+## Date format of the log files.
+logDateFormat = '%Y%m%d %H:%M'
+
+def configureLogging(logger,logfile,level):
+    '''
+    Let a logger write to its own file only, handlers inherited from a
+    parent process are removed.
+    @param logger The logger to configure.
+    @param logfile The file to log to.
+    @param level The logging level.
+    '''
+    for h in list(logger.handlers):
+        logger.removeHandler(h)
+        h.close()
+    handler = logging.FileHandler(logfile)
+    handler.setFormatter(logging.Formatter(logFormat,logDateFormat))
+    logger.addHandler(handler)
+    logger.setLevel(level)
+
+def runDevice(job):
+    '''
+    Run the performance test of one device, called in a worker process.
+    The tests log through the root logger, which belongs to the worker
+    process and writes to the log file of the device only.
+    @param job A dictionary {mode,device,testname,options,testKeys,force,level,genReport,argv,interface,resume,workloadPlan,quiesce,budget}.
+    @return A dictionary {device,testname,status,message,seconds,log}, status
+    is 'done', 'refused' or 'failed'.
+    '''
+    logfile = job['testname'] + '.log'
+    configureLogging(logging.getLogger(),logfile,job['level'])
+    status = {'device':job['device'],'testname':job['testname'],'status':'failed',
+              'message':'','seconds':0,'log':logfile}
+    start = time.time()
+    if job['quiesce'] != None:
+        Quiescence.holdTime,Quiescence.maxWait = job['quiesce']
+    try:
+        device = MultiPerfTest.devClasses[job['mode']](job['mode'],job['device'],job['testname'])
+        if job['interface'] != None:
+            device.setInterface(job['interface'])
+        perfClass = MultiPerfTest.perfClasses[job['mode']]
+        if job['testKeys'] != None:
+            perfClass.testKeys = job['testKeys']
+        myTest = perfClass(job['testname'],device,job['options'])
+        if job['workloadPlan'] != None:
+            WorkloadPlan(job['workloadPlan']).apply(myTest)
+        if job['budget'] != None:
+            myTest.setBudget(Budget(job['budget']))
+        myTest.initialize()
+        if job['resume'] and os.path.exists(myTest.getCheckpointPath()):
+            myTest.resume()
+        myTest.readCmdLineArgs(job['argv'])
+        if not device.isInitialized():
+            status['status'] = 'refused'
+            status['message'] = 'no device information, run it alone with a description file'
+            return status
+        if not job['force']:
+            if device.isMounted():
+                status['status'] = 'refused'
+                status['message'] = 'device is mounted'
+                return status
+            if not device.isAvailable():
+                status['status'] = 'refused'
+                status['message'] = 'not a valid device or partition'
+                return status
+        logging.info("# Starting " + job['mode'] + " test of " + job['device'])
+        myTest.run()
+        status['status'] = 'done'
+        if job['genReport'] != None:
+            try:
+                myTest.getRstReport().toPDF(job['genReport'])
+            except RuntimeError:
+                status['message'] = 'generating pdf failed'
+    except RuntimeError as e:
+        logging.error("# Test of " + job['device'] + " failed: " + str(e))
+        status['message'] = str(e)
+    except Exception as e:
+        #anything escaping the worker would be lost for the summary
+        logging.exception("# Test of " + job['device'] + " aborted")
+        status['message'] = type(e).__name__ + ': ' + str(e)
+    finally:
+        status['seconds'] = int(time.time() - start)
+    return status
+
+class MultiPerfTest(object):
+    '''
+    Runs the performance tests of a list of devices in a pool of worker
+    processes. Every device has its own test name and therefore its own
+    log, xml, archive, plots and report. At most a given number of devices
+    are tested at the same time.
+    '''
+    ## Device classes per test mode.
+    devClasses = {'ssd':SSD,'hdd':HDD}
+
+    ## Performance test classes per test mode.
+    perfClasses = {'ssd':SsdPerfTest,'hdd':HddPerfTest}
+
+    def __init__(self,mode,testname,devices,options,parallel=None):
+        '''
+        Constructor
+        @param mode The test mode of all devices, ssd or hdd.
+        @param testname Name of the whole run, used for its log and summary.
+        @param devices A list of [device path,test name] pairs.
+        @param options The Options used for every device.
+        @param parallel Maximum number of devices tested at the same time, None for all.
+        @exception RuntimeError if the mode is not supported or test names are used twice.
+        '''
+        if mode not in MultiPerfTest.devClasses:
+            raise RuntimeError("mode " + mode + " not supported for several devices")
+        names = [n for d,n in devices]
+        if len(set(names)) != len(names) or testname in names:
+            raise RuntimeError("every device needs its own test name")
+        if len(set(d for d,n in devices)) != len(devices):
+            raise RuntimeError("a device is given twice")
+        ## The test mode of all devices
+        self.__mode = mode
+        ## Name of the whole run
+        self.__testname = testname
+        ## Pairs of device path and test name
+        self.__devices = devices
+        ## Options for every device
+        self.__options = options
+        ## Maximum number of concurrent devices
+        self.__parallel = min(parallel or len(devices),len(devices))
+        ## Status of every device after the run
+        self.__results = []
+        ## The logger of the run, the root logger belongs to the tests
+        self.__log = logging.getLogger('tkperf.multi')
+        self.__log.propagate = False
+
+    def getTestname(self): return self.__testname
+    def getDevices(self): return self.__devices
+    def getParallel(self): return self.__parallel
+    def getResults(self): return self.__results
+
+    @staticmethod
+    def parseDevices(devices,testname):
+        '''
+        Parse devices given as DEVICE or DEVICE:TESTNAME, a device without
+        test name is named after the run and the device, e.g. run-sdb.
+        @param devices A list of strings.
+        @param testname Name of the whole run.
+        @return A list of [device path,test name] pairs.
+        '''
+        pairs = []
+        for d in devices:
+            if ':' in d:
+                path,name = d.split(':',1)
+            else:
+                path,name = d,testname + '-' + os.path.basename(d)
+            pairs.append([path,name])
+        return pairs
+
+    def run(self,testKeys=None,force=False,level=logging.INFO,genReport=None,argv=None,interface=None,resume=False,
+            workloadPlan=None,quiesce=None,budget=None):
+        '''
+        Test all devices, at most getParallel() at a time. Every device runs in
+        a fresh worker process, a failing device does not stop the others.
+        @param testKeys The keys of the tests to run, None for all.
+        @param force Test mounted devices and skip the device checks.
+        @param level The logging level of the workers.
+        @param genReport Command to generate pdf reports, None for no pdfs.
+        @param argv The command line, stored in the reports.
+        @param interface The interface of all devices, None if not given.
+        @param resume Resume the devices having a checkpoint, the others start from scratch.
+        @param workloadPlan The plan dictionary of a WorkloadPlan for every device, None for the defaults.
+        @param quiesce [hold time,maximum wait] of the Quiescence of the workers, None for the defaults.
+        @param budget Time budget in seconds of every device from its start on, None to run the tests in full.
+        @return The list of device status dictionaries, cf. runDevice().
+        '''
+        configureLogging(self.__log,self.__testname + '.log',level)
+        jobs = [{'mode':self.__mode,'device':d,'testname':n,'options':self.__options,
+                 'testKeys':testKeys,'force':force,'level':level,'genReport':genReport,
+                 'argv':argv or sys.argv,'interface':interface,
+                 'resume':resume,'workloadPlan':workloadPlan,
+                 'quiesce':quiesce,'budget':budget} for d,n in self.__devices]
+        self.__log.info("# Testing " + str(len(jobs)) + " devices, " + str(self.__parallel) + " at a time")
+        self.__results = []
+        #one process per device, nothing is kept between two devices
+        pool = multiprocessing.Pool(self.__parallel,maxtasksperchild=1)
+        try:
+            for status in pool.imap_unordered(runDevice,jobs):
+                self.__log.info("# " + status['device'] + " (" + status['testname'] + "): "
+                                + status['status'] + " " + status['message'])
+                print("Finished " + status['device'] + ": " + status['status'])
+                self.__results.append(status)
+            pool.close()
+        except KeyboardInterrupt:
+            self.__log.error("# Interrupted, terminating the workers")
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+        order = [d for d,n in self.__devices]
+        self.__results.sort(key=lambda s: order.index(s['device']))
+        self.writeSummary()
+        return self.__results
+
+    def isSuccess(self):
+        ''' Check if the tests of all devices are done. '''
+        return all(s['status'] == 'done' for s in self.__results)
+
+    def summary(self):
+        ''' Return the status of all devices as text table. '''
+        lines = ['%-20s %-24s %-8s %8s  %s' % ('device','testname','status','minutes','message')]
+        for s in self.__results:
+            lines.append('%-20s %-24s %-8s %8.1f  %s' % (s['device'],s['testname'],s['status'],
+                                                         s['seconds'] / 60.0,s['message']))
+        return '\n'.join(lines)
+
+    def writeSummary(self):
+        ''' Write the status of all devices to testname.summary.json and the log. '''
+        with open(self.__testname + '.summary.json','w') as f:
+            json.dump({'mode':self.__mode,'parallel':self.__parallel,'devices':self.__results},f,indent=4)
+        for line in self.summary().split('\n'):
+            self.__log.info("# " + line)
@@ -33,6 +33,50 @@ class Options(object):
         self.__tpramptime = tpramptime
         ## Max number of carried out test rounds.
         self.__testRnds = testRounds
+        ## Submit the fio jobs of a test to a local fio server.
+        self.__fioServer = False
+        ## Run all cells of a test round with one fio invocation.
+        self.__batchRnds = False
+        ## Output format of fio, terse, json or json+.
+        self.__outputFormat = 'terse'
+        ## Averaging interval of the fio interval logs in msec, None to disable.
+        self.__intervalLog = None
+        ## End a fio run early as soon as its throughput has converged.
+        self.__adaptive = False
+        ## Minimum runtime in seconds of an adaptive fio run.
+        self.__adaptiveMin = 20
+        ## Window in seconds to check the convergence of an adaptive fio run.
+        self.__adaptiveWindow = 10
+        ## Coefficient of variation below which an adaptive fio run is ended.
+        self.__adaptiveCV = 0.02
+        ## Archive the raw fio outputs next to the xml file.
+        self.__archive = True
+        ## Report every fio job on its own instead of group_reporting.
+        self.__perJob = False
+        ## Ratio of max/min job IOPS or latency above which a cell is flagged as imbalanced.
+        self.__imbalanceThr = 1.5
+        ## Offered loads in IOPS of the open loop latency runs, None for closed loop only.
+        self.__loadRates = None
+        ## Iodepth of an open loop run, the headroom for requests arriving while others are outstanding.
+        self.__loadIod = 32
+        ## Fio random_distribution values e.g. zipf:1.2, each is an additional axis of the IOPS matrices.
+        self.__distributions = None
+        ## The fio ioengine of the tests.
+        self.__ioEngine = 'libaio'
+        ## Tuning options of the ioengine, None for its defaults.
+        self.__engineTuning = None
+        ## Probe the ioengines on the device and use the fastest.
+        self.__engineProbe = False
+        ## Results of the ioengine probe {engine:[IOPS,cpu usage,IOPS per core]}.
+        self.__probeResults = None
+        ## Why the probe selected the ioengine.
+        self.__probeReason = None
+        ## Pin the fio jobs to the CPUs near the device: none, numa or irq.
+        self.__pinning = 'none'
+        ## The applied pinning {mode,node,cpus,irqs}.
+        self.__pinInfo = None
+        ## Run only the steady state tracking cell until it is steady, then the full matrix.
+        self.__trackFirst = False
 
     def getNj(self): return self.__nj
     def getIod(self): return self.__iod
@@ -40,12 +84,56 @@ class Options(object):
     def getTPramptime(self): return self.__tpramptime
     def getXargs(self): return self.__xargs
     def getTestRnds(self): return self.__testRnds
+    def getFioServer(self): return self.__fioServer
+    def getBatchRnds(self): return self.__batchRnds
+    def getOutputFormat(self): return self.__outputFormat
+    def getIntervalLog(self): return self.__intervalLog
+    def getAdaptive(self): return self.__adaptive
+    def getAdaptiveMin(self): return self.__adaptiveMin
+    def getAdaptiveWindow(self): return self.__adaptiveWindow
+    def getAdaptiveCV(self): return self.__adaptiveCV
+    def getArchive(self): return self.__archive
+    def getPerJob(self): return self.__perJob
+    def getImbalanceThr(self): return self.__imbalanceThr
+    def getLoadRates(self): return self.__loadRates
+    def getLoadIod(self): return self.__loadIod
+    def getDistributions(self): return self.__distributions
+    def getIoEngine(self): return self.__ioEngine
+    def getEngineTuning(self): return self.__engineTuning
+    def getEngineProbe(self): return self.__engineProbe
+    def getProbeResults(self): return self.__probeResults
+    def getProbeReason(self): return self.__probeReason
+    def getPinning(self): return self.__pinning
+    def getPinInfo(self): return self.__pinInfo
+    def getTrackFirst(self): return self.__trackFirst
     def setNj(self,nj): self.__nj = nj
     def setIod(self,iod): self.__iod = iod
     def setRuntime(self,rt): self.__runtime = rt
     def setTPramptime(self,ramptime): self.__tpramptime = ramptime
     def setXargs(self,xargs): self.__xargs = xargs
     def setTestRnds(self,rnds): self.__testRnds = rnds
+    def setFioServer(self,fs): self.__fioServer = fs
+    def setBatchRnds(self,br): self.__batchRnds = br
+    def setOutputFormat(self,of): self.__outputFormat = of
+    def setIntervalLog(self,il): self.__intervalLog = il
+    def setAdaptive(self,ad): self.__adaptive = ad
+    def setAdaptiveMin(self,am): self.__adaptiveMin = am
+    def setAdaptiveWindow(self,aw): self.__adaptiveWindow = aw
+    def setAdaptiveCV(self,ac): self.__adaptiveCV = ac
+    def setArchive(self,ar): self.__archive = ar
+    def setPerJob(self,pj): self.__perJob = pj
+    def setImbalanceThr(self,it): self.__imbalanceThr = it
+    def setLoadRates(self,lr): self.__loadRates = lr
+    def setLoadIod(self,li): self.__loadIod = li
+    def setDistributions(self,di): self.__distributions = di
+    def setIoEngine(self,ie): self.__ioEngine = ie
+    def setEngineTuning(self,et): self.__engineTuning = et
+    def setEngineProbe(self,ep): self.__engineProbe = ep
+    def setProbeResults(self,pr): self.__probeResults = pr
+    def setProbeReason(self,pr): self.__probeReason = pr
+    def setPinning(self,pi): self.__pinning = pi
+    def setPinInfo(self,pi): self.__pinInfo = pi
+    def setTrackFirst(self,tf): self.__trackFirst = tf
     
     def appendXml(self,r):
         '''
@@ -72,6 +160,52 @@ class Options(object):
         e = etree.SubElement(r,'testrnds')
         e.text = data
         
+        data = json.dumps(self.__fioServer)
+        e = etree.SubElement(r,'fioserver')
+        e.text = data
+
+        data = json.dumps(self.__batchRnds)
+        e = etree.SubElement(r,'batchrnds')
+        e.text = data
+
+        data = json.dumps(self.__outputFormat)
+        e = etree.SubElement(r,'outputformat')
+        e.text = data
+        data = json.dumps(self.__intervalLog)
+        e = etree.SubElement(r,'intervallog')
+        e.text = data
+        data = json.dumps([self.__adaptive,self.__adaptiveMin,self.__adaptiveWindow,self.__adaptiveCV])
+        e = etree.SubElement(r,'adaptive')
+        e.text = data
+        data = json.dumps(self.__archive)
+        e = etree.SubElement(r,'archive')
+        e.text = data
+
+        data = json.dumps([self.__perJob,self.__imbalanceThr])
+        e = etree.SubElement(r,'perjob')
+        e.text = data
+
+        data = json.dumps([self.__loadRates,self.__loadIod])
+        e = etree.SubElement(r,'loadrates')
+        e.text = data
+
+        data = json.dumps(self.__distributions)
+        e = etree.SubElement(r,'distributions')
+        e.text = data
+
+        data = json.dumps([self.__ioEngine,self.__engineTuning,self.__engineProbe,self.__probeResults,
+                           self.__probeReason])
+        e = etree.SubElement(r,'ioengine')
+        e.text = data
+
+        data = json.dumps([self.__pinning,self.__pinInfo])
+        e = etree.SubElement(r,'pinning')
+        e.text = data
+
+        data = json.dumps(self.__trackFirst)
+        e = etree.SubElement(r,'trackfirst')
+        e.text = data
+
         if self.__xargs != None:
             data = json.dumps(list(self.__xargs))
             e = etree.SubElement(r,'xargs')
@@ -90,9 +224,35 @@ class Options(object):
         if root.findtext('runtime'):
             self.__runtime = json.loads(root.findtext('runtime'))
         if root.findtext('tpramptime'):
-            self.__runtime = json.loads(root.findtext('tpramptime'))
+            self.__tpramptime = json.loads(root.findtext('tpramptime'))
         if root.findtext('testrnds'):
-            self.__runtime = json.loads(root.findtext('testrnds'))
+            self.__testRnds = json.loads(root.findtext('testrnds'))
+        if root.findtext('fioserver'):
+            self.__fioServer = json.loads(root.findtext('fioserver'))
+        if root.findtext('batchrnds'):
+            self.__batchRnds = json.loads(root.findtext('batchrnds'))
+        if root.findtext('outputformat'):
+            self.__outputFormat = json.loads(root.findtext('outputformat'))
+        if root.findtext('intervallog'):
+            self.__intervalLog = json.loads(root.findtext('intervallog'))
+        if root.findtext('adaptive'):
+            (self.__adaptive,self.__adaptiveMin,self.__adaptiveWindow,
+             self.__adaptiveCV) = json.loads(root.findtext('adaptive'))
+        if root.findtext('archive'):
+            self.__archive = json.loads(root.findtext('archive'))
+        if root.findtext('perjob'):
+            (self.__perJob,self.__imbalanceThr) = json.loads(root.findtext('perjob'))
+        if root.findtext('loadrates'):
+            (self.__loadRates,self.__loadIod) = json.loads(root.findtext('loadrates'))
+        if root.findtext('distributions'):
+            self.__distributions = json.loads(root.findtext('distributions'))
+        if root.findtext('ioengine'):
+            (self.__ioEngine,self.__engineTuning,self.__engineProbe,
+             self.__probeResults,self.__probeReason) = json.loads(root.findtext('ioengine'))
+        if root.findtext('pinning'):
+            (self.__pinning,self.__pinInfo) = json.loads(root.findtext('pinning'))
+        if root.findtext('trackfirst'):
+            self.__trackFirst = json.loads(root.findtext('trackfirst'))
         if root.findtext('xargs'):
                 self.__xargs = json.loads(root.findtext('xargs'))
         logging.info("# Loading options from xml")
@@ -12,13 +12,19 @@ from lxml import etree
 import json
 import datetime
 import os
-import time
 
 import perfTest.DeviceTests as dt
 from perfTest.Devices import SSD
 from perfTest.Devices import HDD
 from perfTest.Options import Options
+from perfTest.Plan import Plan
+from perfTest.Budget import Budget
 from reports.XmlReport import XmlReport
+from reports.Archive import Archive
+from reports.RoundLog import RoundLog
+from fio.IoEngine import IoEngine
+from system.Quiescence import Quiescence
+from perfTest.PlotWorker import PlotWorker
 from reports.RstReport import RstReport
 
 class PerfTest(object):
@@ -60,15 +66,36 @@ class PerfTest(object):
         ## Hold the command line used to call the test
         self.__cmdLineArgs = None
 
+        ## Workload plan the tests were run with, None for the defaults
+        self.__workloadPlan = None
+
+        ## Time budget the tests are fitted into, None to run them in full
+        self.__budget = None
+
+        ## Keys of the tests finished before the run was resumed
+        self.__doneTests = []
+
+        ## Log of the finished rounds, appended while the tests run
+        self.__roundLog = RoundLog(self.__testname)
+
+        ## Renders the plots of finished tests while the next one runs
+        self.__plotWorker = None
+
     def getTestname(self): return self.__testname
     def getDevice(self): return self.__device
     def getTestDate(self): return self.__testDate
     def getIOPerfVersion(self): return self.__IOPerfVersion
     def getCmdLineArgs(self): return self.__cmdLineArgs
+    def getWorkloadPlan(self): return self.__workloadPlan
+    def getBudget(self): return self.__budget
     def getOSInfo(self): return self.__OSInfo
     def getTests(self): return self.__tests
     def getXmlReport(self): return self.__xmlReport
     def getRstReport(self): return self.__rstReport
+    def getDoneTests(self): return self.__doneTests
+    def getRoundLog(self): return self.__roundLog
+    def getPlotWorker(self): return self.__plotWorker
+    def getCheckpointPath(self): return self.__testname + '.checkpoint.xml'
 
     def collOSInfos(self):
         '''
@@ -136,6 +163,20 @@ class PerfTest(object):
         '''
         self.__cmdLineArgs = cmdLineStr
 
+    def setWorkloadPlan(self,plan):
+        '''
+        Sets the workload plan the tests are run with.
+        @param plan The plan dictionary of a WorkloadPlan.
+        '''
+        self.__workloadPlan = plan
+
+    def setBudget(self,budget):
+        '''
+        Sets the time budget the tests are fitted into.
+        @param budget A Budget, None to run the tests in full.
+        '''
+        self.__budget = budget
+
     def addTest(self,key,test):
         '''
         Add a test to the test dictionary.
@@ -144,6 +185,13 @@ class PerfTest(object):
         '''
         self.__tests[key] = test
 
+    def removeTest(self,key):
+        '''
+        Remove a test from the test dictionary.
+        @param key The key of the test.
+        '''
+        del self.__tests[key]
+
     def resetTests(self):
         '''
         Clear the dictionary containing the tests.
@@ -153,27 +201,81 @@ class PerfTest(object):
     def initialize(self):
         '''
         Initialize the given tests, this sets the device and Fio
-        init params for all tests.
+        init params for all tests. If requested the ioengines are probed
+        first and the fastest one is used by all tests.
         '''
         sorted(self.__tests.items())
+        self.probeEngines()
         for k,v in list(self.__tests.items()):
             logging.info("# Initialiazing test "+k)
             v.initialize()
 
+    def probeEngines(self):
+        '''
+        Probe the ioengines on the device if an option of a test asks for
+        it, the selected engine and the probe results are set for all tests.
+        The deepest iodepth of the tests limits the engines probed.
+        '''
+        opts = [v.getOptions() for v in self.__tests.values() if v.getOptions() != None]
+        if not any(o.getEngineProbe() for o in opts):
+            return
+        self.getDevice().initialize()
+        iod = max(o.getIod() or 1 for o in opts)
+        best,results,reason = IoEngine.probe(self.getDevice().getDevPath(),iod=iod)
+        for o in opts:
+            o.setIoEngine(best)
+            o.setEngineTuning(None)
+            o.setProbeResults(results)
+            o.setProbeReason(reason)
+
     def runTests(self):
         '''
         Call the run method of every test in the test dictionary. The run method
         of a test is its core function where the performance test is carried out.
+        Every finished test is handed to the plot worker, cf. collectPlots().
+        With a time budget the remaining tests are planned again before each
+        test and after each round, tests skipped to keep the budget are
+        removed afterwards.
         '''
         #sort per key to ensure tests have the same order
         sorted(self.__tests.items())
+        #a resumed run continues the round log and the archive of the interrupted one
+        if len(self.__doneTests) == 0 and not any(v.isResumed() for v in self.__tests.values()):
+            self.__roundLog.clear()
+            Archive(self.__testname).clear()
+            self.removeCheckpoint()
+        self.__plotWorker = PlotWorker('hdd' if isinstance(self,HddPerfTest) else 'ssd',self.__testname)
         for k,v in list(self.__tests.items()):
+            if k in self.__doneTests:
+                logging.info("# Test " + k + " was finished before resuming")
+                self.__plotWorker.submit(k,v)
+                continue
+            if self.__budget != None and v.isResumed():
+                self.__budget.resumeTest(self,k)
+            elif self.__budget != None:
+                self.__budget.allocate(self,k)
+                if self.__budget.isSkipped(k):
+                    logging.warning("# Skipping test " + k + " to keep the time budget")
+                    continue
             print("Starting test: " + k)
-            #before each test sleep, to ensure device operations of previous
+            #before each test wait until device operations of previous
             #tests are finished
-            logging.info("# Sleeping for 5 seconds...")
-            time.sleep(5)
-            v.run()
+            Quiescence(self.getDevice().getDevPath()).wait("test " + k)
+            #start one fio server per test, all rounds are submitted to it
+            if v.getOptions() != None and v.getOptions().getFioServer():
+                v.getFioJob().startServer()
+            v.setCheckpointer(self.checkpoint)
+            try:
+                v.run()
+            finally:
+                v.getFioJob().stopServer()
+                v.getFioJob().disableIntervalLogs()
+            self.finishTest(k)
+            self.__plotWorker.submit(k,v)
+        if self.__budget != None:
+            for k in self.__budget.getSkipped():
+                self.removeTest(k)
+            self.__budget.done()
 
     def genPlots(self):
         '''
@@ -184,11 +286,23 @@ class PerfTest(object):
             logging.info("# Generating plots for "+k+" test")
             v.genPlots()
 
+    def collectPlots(self):
+        '''
+        Wait for the plots rendered while the tests were running, tests not
+        rendered in the background are plotted now.
+        '''
+        if self.__plotWorker == None:
+            self.genPlots()
+        else:
+            self.__plotWorker.collect(self.__tests)
+            self.__plotWorker = None
+
     def toXml(self):
         '''
         First the device information is written to the xml file.
         Calls for every test in the test dictionary the toXMl method
-        and writes the results to the xml file.
+        and writes the results to the xml file. The tests are written
+        one after the other, their xml isn't kept in memory.
         '''
         tests = self.getTests()
         e = self.getXmlReport().getXml()
@@ -213,11 +327,166 @@ class PerfTest(object):
         if self.__cmdLineArgs != None:
             dev = etree.SubElement(e,'cmdline')
             dev.text = json.dumps(self.__cmdLineArgs)
+        # Add the workload plan, the tests carry their resulting matrices
+        if self.__workloadPlan != None:
+            dev = etree.SubElement(e,'workloadplan')
+            dev.text = json.dumps(self.__workloadPlan)
+        # Add the time budget and what was reduced to keep it
+        if self.__budget != None:
+            dev = etree.SubElement(e,'budget')
+            dev.text = json.dumps(self.__budget.toDict())
         # Call the xml function for every test in the dictionary
         sorted(self.__tests.items())
-        for k,v in tests.items():
-            e.append(v.toXml(k))
-        self.getXmlReport().xmlToFile(self.getTestname())
+        self.getXmlReport().streamToFile(self.getTestname(),(v.toXml(k) for k,v in tests.items()))
+
+    def plan(self,xmlFiles=None):
+        '''
+        Estimate the duration of the tests without running them. The device
+        is only queried for its size, sector size and model, nothing is
+        written and a raid is not created. Results of previous runs of the
+        same device model calibrate the estimate.
+        @param xmlFiles Names of previous result files without .xml, None to
+        search the current directory for the device model.
+        @return The Plan of the tests.
+        '''
+        device = self.getDevice()
+        try:
+            device.setDevSizeB(device.calcDevSizeB())
+            device.setLogicalSectorSize(device.calcDevLogicalSectorSizeB())
+            device.readDevInfo()
+        except (RuntimeError,TypeError,AttributeError):
+            #a raid that is not created yet has no size and no device information
+            logging.warning("# Could not query " + str(device.getDevPath()) + ", estimating without its size")
+        if device.getLogicalSectorSize() == 4096:
+            for v in self.__tests.values():
+                v.prepareBsLabels(None,"512")
+        plan = self.newPlan(xmlFiles)
+        for k,v in self.__tests.items():
+            #a workload plan may give a test its own runtime
+            plan.setOptions(v.getOptions())
+            v.plan(plan,k)
+        return plan
+
+    def newPlan(self,xmlFiles=None):
+        '''
+        Create a plan without phases, calibrated with the results of
+        previous runs of the same device model.
+        @param xmlFiles Names of previous result files without .xml, None to
+        search the current directory for the device model.
+        @return The Plan.
+        '''
+        device = self.getDevice()
+        if xmlFiles == None:
+            xmlFiles = Plan.findXmls(Plan.getModel(device.getDevInfo()))
+        options = [v.getOptions() for v in self.__tests.values() if v.getOptions() != None][0]
+        plan = Plan(options,device.getDevSizeB())
+        for name in xmlFiles:
+            prev = type(self)(name,device,Options())
+            try:
+                prev.fromXml()
+            except (IOError,OSError,etree.XMLSyntaxError,TypeError,ValueError) as e:
+                logging.warning("# Could not calibrate the plan with " + name + ".xml: " + str(e))
+                continue
+            plan.calibrate(name,prev)
+        return plan
+
+    def getTestCheckpointPath(self,key):
+        '''
+        Return the path of the checkpoint of a finished test, cf. checkpoint().
+        @param key The key of the test.
+        '''
+        return self.__testname + '.' + key + '.checkpoint.xml'
+
+    @staticmethod
+    def writeDurable(path,root):
+        '''
+        Replace a file atomically with a xml element. The element is written to
+        a temporary file which is synced before it replaces the file, then the
+        directory is synced so the replace survives a power loss.
+        @param path The path of the file.
+        @param root The xml element.
+        '''
+        tmpPath = path + '.tmp'
+        with open(tmpPath,'wb') as f:
+            f.write(etree.tostring(root))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmpPath,path)
+        dirFd = os.open(os.path.dirname(os.path.abspath(path)),os.O_RDONLY)
+        try:
+            os.fsync(dirFd)
+        finally:
+            os.close(dirFd)
+
+    def checkpoint(self,test=None,counters=None):
+        '''
+        Write the state of the run to 'testname.checkpoint.xml' and append the
+        last round of the running test to the round log. Only the running test
+        is written with its compact state, cf. DeviceTest.toCheckpoint(), a
+        finished test is written once to its own file by finishTest(). With a
+        time budget the following tests are planned again and the budget is
+        part of the state.
+        @param test The running DeviceTest, None if no test is running.
+        @param counters Further values needed to resume the running test.
+        '''
+        state = {'done':self.__doneTests,'current':None,'counters':counters}
+        root = etree.Element(self.__testname)
+        for k,v in self.__tests.items():
+            if v is test:
+                state['current'] = k
+                root.append(v.toCheckpoint(k))
+                rnd,values = v.lastRound()
+                self.__roundLog.append({'test':k,'round':rnd,'values':values,'counters':counters})
+                if self.__budget != None:
+                    self.__budget.update(self,k,rnd)
+        if self.__budget != None:
+            state['budget'] = self.__budget.toDict()
+        cp = etree.SubElement(root,'checkpoint')
+        cp.text = json.dumps(state)
+        PerfTest.writeDurable(self.getCheckpointPath(),root)
+
+    def finishTest(self,key):
+        '''
+        Mark a test as finished, its results are written to
+        'testname.key.checkpoint.xml' before the checkpoint refers to them.
+        @param key The key of the test.
+        '''
+        PerfTest.writeDurable(self.getTestCheckpointPath(key),self.__tests[key].toXml(key))
+        self.__doneTests.append(key)
+        self.__roundLog.append({'test':key,'done':True})
+        self.checkpoint()
+
+    def removeCheckpoint(self):
+        ''' Remove the checkpoint and the files of the finished tests. '''
+        for path in [self.getCheckpointPath()] + [self.getTestCheckpointPath(k) for k in self.__tests]:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def resume(self):
+        '''
+        Load the tests of a checkpoint written by an interrupted run. Finished
+        tests are not run again, the running test continues at the round
+        following its last checkpoint without erase and preconditioning.
+        A time budget continues with the seconds used before. Call it after
+        initialize().
+        @exception RuntimeError if there is no checkpoint.
+        '''
+        if not os.path.exists(self.getCheckpointPath()):
+            logging.error("# Error: no checkpoint found at " + self.getCheckpointPath())
+            raise RuntimeError("checkpoint not found")
+        root = etree.parse(self.getCheckpointPath()).getroot()
+        state = json.loads(root.findtext('checkpoint'))
+        if state.get('budget') != None:
+            self.setBudget(Budget.fromDict(state['budget']))
+        for k,v in self.__tests.items():
+            if k in state['done']:
+                v.fromXml(etree.parse(self.getTestCheckpointPath(k)).getroot())
+                self.__doneTests.append(k)
+            elif k == state['current']:
+                v.fromXml(root.find(k))
+                v.setResume(state['counters'] or {})
+                logging.info("# Resuming test " + k)
+        logging.info("# Finished tests before resuming: " + str(self.__doneTests))
 
     def fromXml(self):
         '''
@@ -250,8 +519,10 @@ class PerfTest(object):
             self.setCmdLineArgs(json.loads(root.findtext('cmdline')))
         else:
             self.setCmdLineArgs('n.a.')
-        # Create an empty options object, it is initialized in fromXml
-        options = Options(None,None)
+        if(root.findtext('workloadplan')):
+            self.setWorkloadPlan(json.loads(root.findtext('workloadplan')))
+        if(root.findtext('budget')):
+            self.setBudget(Budget.fromDict(json.loads(root.findtext('budget'))))
         # Initialize device and performance tests
         if isinstance(self, SsdPerfTest):
             device = SSD('ssd',None,self.getTestname())
@@ -261,13 +532,14 @@ class PerfTest(object):
                 for elem in root.iterfind(tag):
                     test = None
                     if elem.tag == SsdPerfTest.iopsKey:
-                        test = dt.SsdIopsTest(self.getTestname(),device,options)
+                        test = dt.SsdIopsTest(self.getTestname(),device,Options(None,None))
                     if elem.tag == SsdPerfTest.latKey:
-                        test = dt.SsdLatencyTest(self.getTestname(),device,options)
+                        test = dt.SsdLatencyTest(self.getTestname(),device,Options(None,None))
                     if elem.tag == SsdPerfTest.tpKey:
-                        test = dt.SsdTPTest(self.getTestname(),device,options)
+                        test = dt.SsdTPTest(self.getTestname(),device,Options(None,None))
                     if elem.tag == SsdPerfTest.wrKey:
-                        test = dt.SsdWriteSatTest(self.getTestname(),device,options)
+                        test = dt.SsdWriteSatTest(self.getTestname(),device,Options(None,None))
+                    #every test has its own options, a workload plan may change them per test
                     #we found a tag in the xml file, now we can read the data from xml
                     if test != None:
                         test.fromXml(elem)
@@ -279,22 +551,51 @@ class PerfTest(object):
                 for elem in root.iterfind(tag):
                     test = None
                     if elem.tag == HddPerfTest.iopsKey:
-                        test = dt.HddIopsTest(self.getTestname(),device,options)
+                        test = dt.HddIopsTest(self.getTestname(),device,Options(None,None))
                     if elem.tag == HddPerfTest.tpKey:
-                        test = dt.HddTPTest(self.getTestname(),device,options)
+                        test = dt.HddTPTest(self.getTestname(),device,Options(None,None))
                     if test != None:
                         test.fromXml(elem)
                         self.addTest(tag, test)
 
+    def reparse(self):
+        '''
+        Rebuild the results of the tests read by fromXml out of the archived
+        raw fio outputs and write them back to 'testname.xml'. Tests not
+        supporting a reparse keep their results.
+        @return True if at least one test was reparsed.
+        '''
+        archive = Archive(self.getTestname())
+        if not archive.exists():
+            logging.error("# Error: no archive found at " + archive.getPath())
+            raise RuntimeError("archive not found")
+        root = self.getXmlReport().getXml()
+        reparsed = False
+        for k,v in list(self.__tests.items()):
+            logging.info("# Reparsing " + k + " test")
+            if v.reparse(archive):
+                root.replace(root.find(k),v.toXml(k))
+                reparsed = True
+        if reparsed:
+            self.getXmlReport().xmlToFile(self.getTestname())
+        return reparsed
+
     @abstractmethod
     def toRst(self):
         ''' Convert tests to restructured text '''
 
     def run(self):
         ''' The main run method, runs tests, generates plots and rst report. '''
-        self.runTests()
+        try:
+            self.runTests()
+        except BaseException:
+            if self.__plotWorker != None:
+                self.__plotWorker.close()
+            raise
         self.toXml()
-        self.genPlots()
+        #the results are complete, the checkpoint isn't needed anymore
+        self.removeCheckpoint()
+        self.collectPlots()
         self.toRst()
 
 class SsdPerfTest(PerfTest):
@@ -345,15 +646,18 @@ class SsdPerfTest(PerfTest):
             rst.addDevInfo(tests[keys].getDevice().getDevInfo(),tests[keys].getDevice().getFeatureMatrix())
             break
         rst.addCmdLine(self.getCmdLineArgs())
+        if self.getBudget() != None:
+            rst.addBudget(self.getBudget())
 
         #add the fio version, nj, iod and general info of one test to the report
         for keys in tests.keys():
             if keys != 'lat':
                 rst.addSetupInfo(self.getIOPerfVersion(),tests[keys].getFioJob().getFioVersion(),
                                  self.getTestDate())
-                rst.addFioJobInfo(tests[keys].getOptions().getNj(), tests[keys].getOptions().getIod())
+                rst.addFioJobInfo(tests[keys].getOptions().getNj(), tests[keys].getOptions().getIod(),
+                                  tests[keys].getOptions())
                 rst.addOSInfo(self.getOSInfo())
-                rst.addGeneralInfo('ssd')
+                rst.addGeneralInfo('ssd',tests[keys])
                 break
 
         if SsdPerfTest.iopsKey in tests:
@@ -361,15 +665,23 @@ class SsdPerfTest(PerfTest):
             rst.addTestInfo('ssd','iops',tests['iops'])
             rst.addSection("Measurement Plots")
             for i,fig in enumerate(tests['iops'].getFigures()):
-                rst.addFigure(fig,'ssd','iops',i)
+                rst.addFigure(fig,'ssd','iops',i,tests['iops'])
             rst.addSection("Measurement Window Summary Table")
-            rst.addTable(tests['iops'].getTables()[0],tests['iops'].getBsLabels(),'iops')
+            rst.addTable(tests['iops'].getTables()[0],tests['iops'].getBsLabels(),'iops',None,tests['iops'].getMixWlds())
+            if len(tests['iops'].getDistTables()) > 0:
+                rst.addSection("Access Distributions")
+                for dist,fig,tb in zip(tests['iops'].getDistributions(),tests['iops'].getDistFigures(),
+                                       tests['iops'].getDistTables()):
+                    rst.addFigure(fig,'ssd','iops-dist',0)
+                    rst.addTable(tb,tests['iops'].getBsLabels(),'iops',
+                                 "Average IOPS with random_distribution=" + dist + " vs. Block Size and R/W Mix %",
+                                 tests['iops'].getMixWlds())
         if SsdPerfTest.tpKey in tests:
             rst.addChapter("Throughput")
             rst.addTestInfo('ssd','tp',tests['tp'])
             rst.addSection("Measurement Plots")
             for i,fig in enumerate(tests['tp'].getFigures()):
-                rst.addFigure(fig,'ssd','tp',i)
+                rst.addFigure(fig,'ssd','tp',i,tests['tp'])
             rst.addSection("Measurement Window Summary Table")
             rst.addTable(tests['tp'].getTables()[0],tests['tp'].getBsLabels(),'tp')
         if SsdPerfTest.latKey in tests:
@@ -380,16 +692,27 @@ class SsdPerfTest(PerfTest):
                 #index 2 and 3 are 2D measurement plots that are not required
                 #but we need them to generate the measurement overview table
                 if i == 2 or i == 3: continue
-                rst.addFigure(fig,'ssd','lat',i)
+                rst.addFigure(fig,'ssd','lat',i,tests['lat'])
             rst.addSection("Measurement Window Summary Table")
-            rst.addTable(tests['lat'].getTables()[0],tests['lat'].getBsLabels(),'avg-lat')#avg lat
-            rst.addTable(tests['lat'].getTables()[1],tests['lat'].getBsLabels(),'max-lat')#max lat
+            rst.addTable(tests['lat'].getTables()[0],tests['lat'].getBsLabels(),'avg-lat',None,tests['lat'].getMixWlds())#avg lat
+            rst.addTable(tests['lat'].getTables()[1],tests['lat'].getBsLabels(),'max-lat',None,tests['lat'].getMixWlds())#max lat
+            #percentile tables follow avg and max lat
+            for i,pct in enumerate(tests['lat'].getPercentiles()):
+                if len(tests['lat'].getTables()) > i + 2:
+                    rst.addTable(tests['lat'].getTables()[i + 2],tests['lat'].getBsLabels(),'p' + ('%g' % pct) + '-lat',
+                                 None,tests['lat'].getMixWlds())
+            if len(tests['lat'].getLoadMatrices()) > 0:
+                rst.addSection("Open Loop Latency Tables")
+                rst.addString("Requests arrive as a poisson process at the offered load. A cell reaching less IOPS "
+                              "than offered is saturated.\n")
+                for m in tests['lat'].getLoadMatrices():
+                    rst.addLoadTable(m,tests['lat'].getBsLabels(),tests['lat'].getPercentiles(),tests['lat'].getMixWlds())
         if SsdPerfTest.wrKey in tests:
             rst.addChapter("Write Saturation")
             rst.addTestInfo('ssd','writesat',tests['writesat'])
             rst.addSection("Measurement Plots")
             for i,fig in enumerate(tests['writesat'].getFigures()):
-                rst.addFigure(fig,'ssd','writesat',i)
+                rst.addFigure(fig,'ssd','writesat',i,tests['writesat'])
 
         rst.toRstFile()
 
@@ -434,12 +757,15 @@ class HddPerfTest(PerfTest):
             rst.addDevInfo(tests[keys].getDevice().getDevInfo(),tests[keys].getDevice().getFeatureMatrix())
             break
         rst.addCmdLine(self.getCmdLineArgs())
+        if self.getBudget() != None:
+            rst.addBudget(self.getBudget())
 
         #Setup and OS infos are the same for all tests, just take one
         for keys in tests.keys():
             rst.addSetupInfo(self.getIOPerfVersion(),tests[keys].getFioJob().getFioVersion(),
                              self.getTestDate())
-            rst.addFioJobInfo(tests[keys].getOptions().getNj(), tests[keys].getOptions().getIod())
+            rst.addFioJobInfo(tests[keys].getOptions().getNj(), tests[keys].getOptions().getIod(),
+                              tests[keys].getOptions())
             rst.addOSInfo(self.getOSInfo())
             rst.addGeneralInfo('hdd')
             break
@@ -448,11 +774,19 @@ class HddPerfTest(PerfTest):
             rst.addTestInfo('hdd','iops',tests['iops'])
             rst.addSection("Measurement Plots")
             for i,fig in enumerate(tests['iops'].getFigures()):
-                rst.addFigure(fig,'hdd','iops',i)
+                rst.addFigure(fig,'hdd','iops',i,tests['iops'])
+            if len(tests['iops'].getDistTables()) > 0:
+                rst.addSection("Access Distributions")
+                for dist,fig,tb in zip(tests['iops'].getDistributions(),tests['iops'].getDistFigures(),
+                                       tests['iops'].getDistTables()):
+                    rst.addFigure(fig,'hdd','iops-dist',0)
+                    rst.addTable(tb,tests['iops'].getBsLabels(),'hdd-iops',
+                                 "Average IOPS with random_distribution=" + dist + " vs. Block Size and R/W Mix %",
+                                 tests['iops'].getMixWlds())
         if HddPerfTest.tpKey in tests:
             rst.addChapter("Throughput")
             rst.addTestInfo('hdd','tp',tests['tp'])
             rst.addSection("Measurement Plots")
             for i,fig in enumerate(tests['tp'].getFigures()):
-                rst.addFigure(fig,'hdd','tp',i)
+                rst.addFigure(fig,'hdd','tp',i,tests['tp'])
         rst.toRstFile()
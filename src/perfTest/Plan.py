@@ -0,0 +1,296 @@
+'''
+Estimates the duration of a performance test without running it.
+'''
+
+import logging
+import glob
+import json
+import math
+import re
+from lxml import etree
+
+from perfTest.Devices import SSD
+from system.Quiescence import Quiescence
+
+class Plan(object):
+    '''
+    Estimates the wall clock time, the number of fio runs and the written
+    bytes of the tests of a performance test, per test and phase as best and
+    worst case. The structure of the tests gives the number of erases, fio
+    runs and rounds, the defaults below give the time of an erase, the
+    preconditioning and the overhead of a fio run. Results of previous runs
+    of the same device model narrow these ranges down: their recorded phase
+    timings, the rounds until steady state and the write rates.
+    '''
+    ## Seconds of a secure erase including the wait for an idle device before it, best and worst case.
+    eraseTime = [15,7200]
+    ## Write rate in bytes/s of the sequential preconditioning, best and worst case.
+    precondRate = [3e9,1e8]
+    ## Seconds a fio run takes longer than its runtime, best and worst case.
+    fioOverhead = [0.5,5]
+    ## Rate in bytes/s of the 4k random writes of the write saturation test, best and worst case.
+    satRate = [2e9,2e7]
+
+    def __init__(self,options,devSizeB=None):
+        '''
+        Constructor
+        @param options The Options of the tests.
+        @param devSizeB The size of the device in bytes, None if unknown.
+        '''
+        ## Options of the test currently estimated
+        self.__options = options
+        ## Size of the device in bytes
+        self.__devSizeB = devSizeB
+        ## Values of previous results per test key {key:{name:[values]}}
+        self.__calib = {}
+        ## Xml files the values were taken from
+        self.__sources = []
+        ## The estimated phases, dictionaries {test,phase,fio,seconds,bytes}
+        self.__phases = []
+
+    def getOptions(self): return self.__options
+    def setOptions(self,o): self.__options = o
+    def getDevSizeB(self): return self.__devSizeB
+    def getSources(self): return self.__sources
+    def getPhases(self): return self.__phases
+
+    @staticmethod
+    def bsBytes(bs):
+        ''' Return the bytes of a block size label, e.g. 4096 for "4k". '''
+        if bs.endswith('k'):
+            return int(bs[:-1]) * 1024
+        return int(bs)
+
+    @staticmethod
+    def getModel(devInfo):
+        '''
+        Return the model of a device out of its device information, None if
+        it is not found.
+        @param devInfo The device information of hdparm, udevadm or a description file.
+        '''
+        if devInfo == None:
+            return None
+        match = re.search(r'(Model Number:|ID_MODEL=|Model:)\s*(\S.*)',devInfo)
+        if match == None:
+            return None
+        return match.group(2).strip()
+
+    @staticmethod
+    def findXmls(model,pattern='*.xml'):
+        '''
+        Find the result files of previous runs of a device model.
+        @param model The device model, None finds no files.
+        @param pattern The files to search.
+        @return A list of xml file names without the .xml extension.
+        '''
+        names = []
+        if model == None:
+            return names
+        for path in sorted(glob.glob(pattern)):
+            if path.endswith('.checkpoint.xml'):
+                continue
+            try:
+                root = etree.parse(path).getroot()
+                devInfo = json.loads(root.findtext('devinfo') or 'null')
+            except (etree.XMLSyntaxError,IOError,OSError,ValueError):
+                continue
+            if Plan.getModel(devInfo) == model:
+                names.append(path[:-len('.xml')])
+        return names
+
+    def calibrate(self,source,perfTest):
+        '''
+        Take the values of a previous run.
+        @param source The name of the xml file.
+        @param perfTest A PerfTest loaded from the xml file.
+        '''
+        for k,v in perfTest.getTests().items():
+            calib = self.__calib.setdefault(k,{})
+            for name,values in v.calibration().items():
+                calib.setdefault(name,[]).extend(values)
+        self.__sources.append(source)
+        logging.info("# Calibrated the test plan with " + source)
+
+    def addValues(self,key,name,values):
+        '''
+        Add measured values to the calibration of a test.
+        @param key The key of the test.
+        @param name The calibrated value, e.g. 'erase' or 'overhead'.
+        @param values A list of values.
+        '''
+        self.__calib.setdefault(key,{}).setdefault(name,[]).extend(values)
+
+    def clearPhases(self):
+        ''' Remove the estimated phases, the calibration is kept. '''
+        self.__phases = []
+
+    def getRange(self,key,name,default):
+        '''
+        Return the [min,max] of the values of previous runs, the default if
+        there are none.
+        @param key The key of the test.
+        @param name The calibrated value, e.g. 'erase' or 'overhead'.
+        @param default The default [best,worst] range.
+        '''
+        values = self.__calib.get(key,{}).get(name,[])
+        if len(values) == 0:
+            return default
+        return [min(values),max(values)]
+
+    def getEraseTime(self,key):
+        ''' Return the [best,worst] seconds of a secure erase. '''
+        return self.getRange(key,'erase',Plan.eraseTime)
+
+    def getPrecondTime(self,key,nbytes):
+        '''
+        Return the [best,worst] seconds of the workload independent preconditioning.
+        @param nbytes The bytes written by the preconditioning, None if unknown.
+        '''
+        default = None
+        if nbytes != None:
+            default = [nbytes / Plan.precondRate[0],nbytes / Plan.precondRate[1]]
+        return self.getRange(key,'precondition',default)
+
+    def getRunTime(self,key,adaptive=True):
+        '''
+        Return the [best,worst] seconds of one fio run. An adaptive run may
+        end after its minimum runtime.
+        @param adaptive If adaptive runtime applies to the runs.
+        '''
+        o = self.__options
+        overhead = [max(0,t) for t in self.getRange(key,'overhead',Plan.fioOverhead)]
+        best = worst = o.getRuntime()
+        if adaptive and o.getAdaptive():
+            best = min(o.getAdaptiveMin(),o.getRuntime())
+        return [best + overhead[0],worst + overhead[1]]
+
+    def getRounds(self,key,default):
+        '''
+        Return the [best,worst] number of rounds, previous runs narrow the
+        range if they are within it.
+        @param default The [min,max] rounds of the test.
+        '''
+        rnds = self.getRange(key,'rounds',default)
+        return [max(default[0],min(rnds[0],default[1])),max(default[0],min(rnds[1],default[1]))]
+
+    def getWriteRate(self,key,default=None):
+        ''' Return the [best,worst] bytes/s written by a fio run, None if unknown. '''
+        rates = self.getRange(key,'writeRate',default)
+        if rates == None:
+            return None
+        #a higher rate means a higher and a faster write saturation
+        return [max(rates),min(rates)]
+
+    def phase(self,key,name,fio,seconds,nbytes=None):
+        '''
+        Add a phase of a test.
+        @param key The key of the test.
+        @param name The name of the phase, e.g. 'erase' or 'rounds'.
+        @param fio The [best,worst] number of fio runs.
+        @param seconds The [best,worst] seconds, None if unknown.
+        @param nbytes The [best,worst] written bytes, None if unknown.
+        '''
+        self.__phases.append({'test':key,'phase':name,'fio':fio,'seconds':seconds,'bytes':nbytes})
+
+    def prepare(self,key,erases,preconditions=0):
+        '''
+        Add the secure erases and workload independent preconditionings of a test.
+        @param key The key of the test.
+        @param erases The number of secure erases.
+        @param preconditions The number of preconditionings.
+        '''
+        if erases > 0:
+            self.phase(key,'erase',[0,0],[erases * t for t in self.getEraseTime(key)],[0,0])
+        if preconditions > 0:
+            nbytes = None
+            if self.__devSizeB != None:
+                nbytes = preconditions * SSD.wlIndPrecRnds * self.__devSizeB
+            seconds = self.getPrecondTime(key,nbytes)
+            if seconds != None:
+                seconds = [preconditions * t for t in seconds]
+            runs = preconditions * SSD.wlIndPrecRnds
+            self.phase(key,'precondition',[runs,runs],seconds,None if nbytes == None else [nbytes,nbytes])
+
+    def rounds(self,key,name,rounds,runs,writeRate=None,extra=0,adaptive=True):
+        '''
+        Add test rounds.
+        @param key The key of the test.
+        @param name The name of the phase.
+        @param rounds The [best,worst] number of rounds.
+        @param runs The fio runs of a round.
+        @param writeRate The [best,worst] bytes/s a fio run writes, None if unknown.
+        @param extra Further seconds of all rounds, e.g. ramp times.
+        @param adaptive If adaptive runtime applies to the runs.
+        '''
+        runTime = self.getRunTime(key,adaptive)
+        fio = [rounds[0] * runs,rounds[1] * runs]
+        seconds = [fio[i] * runTime[i] + extra for i in (0,1)]
+        nbytes = None
+        if writeRate != None:
+            o = self.__options
+            nbytes = [fio[0] * o.getRuntime() * writeRate[1],fio[1] * o.getRuntime() * writeRate[0]]
+        self.phase(key,name,fio,seconds,nbytes)
+
+    def getTotal(self,key=None):
+        '''
+        Return the [best,worst] seconds of a test or of all tests, including
+        the wait for an idle device before each test.
+        @param key The key of the test, None for all tests.
+        '''
+        phases = [p for p in self.__phases if key == None or p['test'] == key]
+        tests = set(p['test'] for p in phases)
+        #an idle device is waited for at least the hold time before each test
+        total = [Quiescence.holdTime * len(tests)] * 2
+        for p in phases:
+            if p['seconds'] != None:
+                total = [total[0] + p['seconds'][0],total[1] + p['seconds'][1]]
+        return total
+
+    def isComplete(self):
+        ''' Check if the time of every phase is known. '''
+        return all(p['seconds'] != None for p in self.__phases)
+
+    @staticmethod
+    def fmtTime(seconds):
+        ''' Format seconds as e.g. 4.5h, 12m or 30s. '''
+        if seconds == None:
+            return '?'
+        if seconds >= 3600:
+            return '%.1fh' % (seconds / 3600.0)
+        if seconds >= 60:
+            return '%dm' % math.ceil(seconds / 60.0)
+        return '%ds' % math.ceil(seconds)
+
+    @staticmethod
+    def fmtBytes(nbytes):
+        ''' Format bytes as GB. '''
+        if nbytes == None:
+            return '?'
+        return '%.1fGB' % (nbytes / 1e9)
+
+    def toText(self):
+        ''' Return the plan as text table. '''
+        fmt = '%-10s %-14s %13s %16s %20s'
+        lines = [fmt % ('test','phase','fio runs','time','written')]
+        keys = []
+        for p in self.__phases:
+            if p['test'] not in keys:
+                keys.append(p['test'])
+        for key in keys:
+            for p in [p for p in self.__phases if p['test'] == key]:
+                s = p['seconds'] or [None,None]
+                b = p['bytes'] or [None,None]
+                lines.append(fmt % (key,p['phase'],'%d-%d' % tuple(p['fio']),
+                                    Plan.fmtTime(s[0]) + '-' + Plan.fmtTime(s[1]),
+                                    Plan.fmtBytes(b[0]) + '-' + Plan.fmtBytes(b[1])))
+            t = self.getTotal(key)
+            lines.append(fmt % (key,'total','',Plan.fmtTime(t[0]) + '-' + Plan.fmtTime(t[1]),''))
+        t = self.getTotal()
+        lines.append('Total: ' + Plan.fmtTime(t[0]) + ' best case, ' + Plan.fmtTime(t[1]) + ' worst case')
+        if not self.isComplete():
+            lines.append('The device size is unknown, the totals miss the phases marked with ?')
+        if len(self.__sources) > 0:
+            lines.append('Calibrated with: ' + ', '.join(self.__sources))
+        else:
+            lines.append('No previous results of the device model found, using defaults')
+        return '\n'.join(lines)
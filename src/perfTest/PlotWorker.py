@@ -0,0 +1,123 @@
+'''
+Renders the plots of finished tests in a background process, while the
+next test is running on the device.
+'''
+
+import logging
+import multiprocessing
+import os
+from lxml import etree
+
+from perfTest.Devices import SSD
+from perfTest.Devices import HDD
+from perfTest.Options import Options
+
+## Device classes to load a test with, per test mode.
+devClasses = {'ssd':SSD,'hdd':HDD}
+
+def initWorker():
+    ''' Lower the priority of a worker process, the running fio jobs come first. '''
+    try:
+        os.nice(19)
+    except OSError:
+        pass
+
+def renderTest(job):
+    '''
+    Load a finished test from its xml and generate its plots and measurement
+    tables, called in the worker process.
+    @param job A dictionary {key,mode,testname,testClass,xml}, xml holds the
+    device and the test element.
+    @return A dictionary {key,figures,tables,distTables,distFigures}.
+    '''
+    root = etree.fromstring(job['xml'])
+    device = devClasses[job['mode']](job['mode'],None,job['testname'])
+    device.fromXml(root)
+    test = job['testClass'](job['testname'],device,Options(None,None))
+    test.fromXml(root.find(job['key']))
+    logging.info("# Generating plots for " + job['key'] + " test in the background")
+    test.genPlots()
+    return {'key':job['key'],'figures':test.getFigures(),'tables':test.getTables(),
+            'distTables':test.getDistTables(),'distFigures':test.getDistFigures()}
+
+class PlotWorker(object):
+    '''
+    Hands every finished test to a worker process rendering its plots, the
+    device doesn't wait for matplotlib. The worker loads the test from its
+    xml like a test loaded with -xml. Its figures and tables are collected
+    into the tests once all tests are run, the report is assembled then.
+    Inside a worker process, e.g. of a MultiPerfTest, the plots are rendered
+    when collected.
+    '''
+
+    def __init__(self,mode,testname):
+        '''
+        Constructor
+        @param mode The test mode, ssd or hdd.
+        @param testname Name of the performance test.
+        '''
+        ## The test mode
+        self.__mode = mode
+        ## Name of the performance test
+        self.__testname = testname
+        ## The pool of the worker process, created on the first test
+        self.__pool = None
+        ## Pending results per test key
+        self.__results = {}
+
+    def getResults(self): return self.__results
+
+    def submit(self,key,test):
+        '''
+        Render the plots of a finished test in the background.
+        @param key The key of the test.
+        @param test The finished DeviceTest.
+        '''
+        #daemonic processes can't have children, render when collected
+        if multiprocessing.current_process().daemon:
+            return
+        root = etree.Element(self.__testname)
+        test.getDevice().toXml(root)
+        root.append(test.toXml(key))
+        job = {'key':key,'mode':self.__mode,'testname':self.__testname,
+               'testClass':type(test),'xml':etree.tostring(root)}
+        if self.__pool == None:
+            self.__pool = multiprocessing.Pool(1,initWorker)
+        self.__results[key] = self.__pool.apply_async(renderTest,(job,))
+        logging.info("# Rendering plots of " + key + " test in the background")
+
+    def collect(self,tests):
+        '''
+        Wait for the worker and set the figures and tables to the tests.
+        Tests without background result, e.g. if the worker failed, are
+        rendered now.
+        @param tests The dictionary of the tests {key:DeviceTest}.
+        '''
+        try:
+            for k,v in list(tests.items()):
+                res = None
+                if k in self.__results:
+                    try:
+                        res = self.__results[k].get()
+                    except Exception as e:
+                        logging.warning("# Rendering plots of " + k + " test in the background failed: "
+                                        + type(e).__name__ + ': ' + str(e))
+                if res == None:
+                    logging.info("# Generating plots for " + k + " test")
+                    v.genPlots()
+                    continue
+                v.setFigures(res['figures'])
+                for tb in res['tables']:
+                    v.addTable(tb)
+                v.getDistTables().extend(res['distTables'])
+                v.getDistFigures().extend(res['distFigures'])
+        finally:
+            self.close()
+
+    def close(self):
+        ''' Stop the worker process, pending plots are discarded. '''
+        if self.__pool != None:
+            self.__pool.terminate()
+            self.__pool.join()
+            self.__pool = None
+        self.__results = {}
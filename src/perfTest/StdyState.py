@@ -13,8 +13,8 @@ class StdyState(object):
     '''
     Used to define a stable state of a device
     '''
-    ## Always use a sliding window of 4 to measure performance values.
-    testMesWindow = 4
+    ## Default number of rounds of the sliding measurement window.
+    testMesWindow = 5
 
     def __init__(self):
         '''
@@ -32,6 +32,8 @@ class StdyState(object):
         self.__stdySlope = []
         ##States if the steady state has been reached or not
         self.__reachStdyState = None
+        ## Number of rounds of the measurement window
+        self.__window = StdyState.testMesWindow
 
     def getRnds(self): return self.__rounds
     def getStdyRnds(self): return self.__stdyRnds
@@ -41,6 +43,8 @@ class StdyState(object):
     def getTestRnds(self): return self.__testRnds
     def setTestRnds(self,rnds): self.__testRnds = rnds
 
+    def getWindow(self): return self.__window
+    def setWindow(self,w): self.__window = w
     def setReachStdyState(self,s): self.__reachStdyState = s
 
     def isSteady(self):
@@ -79,9 +83,9 @@ class StdyState(object):
         #calculate k*x+d
         k, d = np.linalg.lstsq(A, y, rcond=-1)[0]
 
-        #as we have a measurement window of 4, we calculate
-        #the slope excursion in  the window
-        slopeExc = k * self.testMesWindow
+        #calculate the slope excursion over the rounds spanned by the window,
+        #4 for the default window of 5 rounds
+        slopeExc = k * (self.__window - 1)
         if slopeExc < 0:
             slopeExc *= -1
         maxSlopeExc = avg * 0.10 #allowed are 10% of avg
@@ -127,6 +131,10 @@ class StdyState(object):
         e = etree.SubElement(r,'rndnr')
         e.text = data
 
+        data = json.dumps(self.__window)
+        e = etree.SubElement(r,'stdywindow')
+        e.text = data
+
     def fromXml(self,root):
         '''
         Loads the information about a steady state from XML.
@@ -139,6 +147,8 @@ class StdyState(object):
         self.__stdyAvg = json.loads(root.findtext('stdyavg'))
         self.__reachStdyState = json.loads(root.findtext('reachstdystate'))
         self.__rounds = json.loads(root.findtext('rndnr'))
+        if root.findtext('stdywindow'):
+            self.__window = json.loads(root.findtext('stdywindow'))
         logging.info("########### Loading steady state from xml ###########")
         self.toLog()
 
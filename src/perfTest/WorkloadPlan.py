@@ -0,0 +1,193 @@
+'''
+A plan file defining the workload matrices of the tests, loaded from json or yaml.
+'''
+
+import logging
+import json
+import copy
+import re
+
+class WorkloadPlan(object):
+    '''
+    Defines per test the block sizes, the workload mixes, the rounds, the
+    fio runtime and the steady state tracking cell and window, instead of
+    the defaults of the test classes. A plan file is a json (or, if PyYAML
+    is installed, yaml) dictionary keyed by the test keys, e.g.:
+
+    {"iops": {"bs": ["128k","8k","4k"], "mixes": [100,65,0],
+              "rounds": 15, "track": {"mix": 0, "bs": "4k"}, "window": 5},
+     "tp": {"bs": ["128k","4k"], "runtime": 30}}
+
+    Tests not in the plan keep their defaults. The plan is validated
+    against the tests it is applied to.
+    '''
+    ## Keys of a test in the plan file.
+    fields = ['bs','mixes','rounds','runtime','track','window']
+
+    def __init__(self,plan,path=None):
+        '''
+        Constructor
+        @param plan A dictionary {test key:{field:value}}.
+        @param path The file the plan was loaded from, None if not loaded from a file.
+        '''
+        ## The plan per test key
+        self.__plan = plan
+        ## The file the plan was loaded from
+        self.__path = path
+
+    def getPlan(self): return self.__plan
+    def getPath(self): return self.__path
+
+    @staticmethod
+    def load(path):
+        '''
+        Load a plan file, files ending with .yaml or .yml are read as yaml.
+        @param path The path of the plan file.
+        @return A WorkloadPlan.
+        @exception RuntimeError if the file can't be read or parsed.
+        '''
+        try:
+            with open(path) as f:
+                content = f.read()
+        except (IOError,OSError) as e:
+            logging.error("# Error: could not read plan file " + path + ": " + str(e))
+            raise RuntimeError("plan file not readable")
+        loads = json.loads
+        errors = (ValueError,)
+        if path.endswith('.yaml') or path.endswith('.yml'):
+            try:
+                import yaml
+            except ImportError:
+                logging.error("# Error: PyYAML is required to read " + path + ", use a json plan file")
+                raise RuntimeError("yaml plan files need PyYAML")
+            loads = yaml.safe_load
+            errors = (yaml.YAMLError,)
+        try:
+            plan = loads(content)
+        except errors as e:
+            logging.error("# Error: could not parse plan file " + path + ": " + str(e))
+            raise RuntimeError("plan file not parseable")
+        if not isinstance(plan,dict):
+            logging.error("# Error: plan file " + path + " must contain a dictionary of tests")
+            raise RuntimeError("plan file not valid")
+        return WorkloadPlan(plan,path)
+
+    @staticmethod
+    def isBsLabel(bs):
+        ''' Check if a block size is a fio block size label, e.g. "4k" or "512". '''
+        return isinstance(bs,str) and re.match(r'^[1-9]\d*k?$',bs) != None
+
+    def invalid(self,key,msg):
+        '''
+        Log an error about the plan of a test and raise it.
+        @exception RuntimeError always.
+        '''
+        logging.error("# Error: plan of test " + key + ": " + msg)
+        raise RuntimeError("plan file not valid: " + key + ": " + msg)
+
+    def settings(self,key,test):
+        '''
+        Validate the plan of a test and complete it with the defaults of the test.
+        @param key The key of the test.
+        @param test The DeviceTest the plan is applied to.
+        @return A dictionary with all fields the test supports.
+        @exception RuntimeError if the plan doesn't fit the test.
+        '''
+        plan = self.__plan[key]
+        if not isinstance(plan,dict):
+            self.invalid(key,"must be a dictionary")
+        for f in plan:
+            if f not in WorkloadPlan.fields:
+                self.invalid(key,"unknown field " + str(f) + ", valid are " + ', '.join(WorkloadPlan.fields))
+        s = {'runtime':test.getOptions().getRuntime() if test.getOptions() != None else None}
+        hasStdy = hasattr(test,'getStdyState')
+        if hasattr(test,'setBsLabels'):
+            s['bs'] = list(test.getBsLabels())
+        if len(test.getMixWlds()) > 0:
+            s['mixes'] = list(test.getMixWlds())
+        if test.getTrackCell() != None:
+            s['track'] = {'mix':test.getTrackCell()[0],'bs':test.getTrackCell()[1]}
+        if hasStdy:
+            s['window'] = test.getStdyState().getWindow()
+            s['rounds'] = test.getOptions().getTestRnds()
+        else:
+            s['rounds'] = test.getMaxRnds()
+        for f in plan:
+            if f not in s:
+                self.invalid(key,"field " + f + " is not supported by the test")
+        if 'bs' in plan:
+            if not isinstance(plan['bs'],list) or len(plan['bs']) == 0 \
+                or not all(WorkloadPlan.isBsLabel(b) for b in plan['bs']) or len(set(plan['bs'])) != len(plan['bs']):
+                self.invalid(key,"bs must be a list of distinct block sizes like \"4k\" or \"512\"")
+            s['bs'] = list(plan['bs'])
+            #tests without mixes run the tracked block size first, the others stop at its rounds
+            if len(test.getMixWlds()) == 0 and 'track' in s and 'track' not in plan:
+                s['track'] = {'mix':s['track']['mix'],'bs':s['bs'][0]}
+        if 'mixes' in plan:
+            if not isinstance(plan['mixes'],list) or len(plan['mixes']) == 0 \
+                or not all(isinstance(m,int) and 0 <= m <= 100 for m in plan['mixes']) \
+                or len(set(plan['mixes'])) != len(plan['mixes']):
+                self.invalid(key,"mixes must be a list of distinct read percentages from 0 to 100")
+            s['mixes'] = list(plan['mixes'])
+        for f in ['rounds','runtime','window']:
+            if f in plan and (not isinstance(plan[f],int) or isinstance(plan[f],bool) or plan[f] < 1):
+                self.invalid(key,f + " must be a positive number")
+            if f in plan:
+                s[f] = plan[f]
+        if 'window' in s and s['window'] < 2:
+            self.invalid(key,"window must have at least 2 rounds")
+        if 'window' in s and s['rounds'] < s['window']:
+            self.invalid(key,"rounds must be at least the steady state window of " + str(s['window']))
+        if 'track' in plan:
+            if not isinstance(plan['track'],dict) or sorted(plan['track'].keys()) != ['bs','mix']:
+                self.invalid(key,"track must be a dictionary {\"mix\": read percentage, \"bs\": block size}")
+            s['track'] = dict(plan['track'])
+        if 'track' in s:
+            if s['track']['bs'] not in s['bs']:
+                self.invalid(key,"tracked block size " + str(s['track']['bs']) + " is not in the block sizes")
+            if 'mixes' in s and s['track']['mix'] not in s['mixes']:
+                self.invalid(key,"tracked mix " + str(s['track']['mix']) + " is not in the mixes")
+            if 'mixes' not in s:
+                if s['track']['mix'] != test.getTrackCell()[0]:
+                    self.invalid(key,"only the mix " + str(test.getTrackCell()[0]) + " can be tracked")
+                if s['track']['bs'] != s['bs'][0]:
+                    self.invalid(key,"the tracked block size must be the first block size")
+        return s
+
+    def apply(self,perfTest):
+        '''
+        Validate the plan against the tests of a performance test and set
+        it to them. Tests get their own options if the plan changes rounds
+        or runtime. Call it before the tests are initialized.
+        @param perfTest The PerfTest to apply the plan to.
+        @exception RuntimeError if the plan doesn't fit the tests.
+        '''
+        tests = perfTest.getTests()
+        for key in self.__plan:
+            if key not in tests:
+                logging.error("# Error: plan file contains test " + str(key) + " which is not run, tests are "
+                              + ', '.join(tests.keys()))
+                raise RuntimeError("plan file not valid: unknown test " + str(key))
+        #validate all tests before anything is changed
+        settings = dict((k,self.settings(k,tests[k])) for k in self.__plan)
+        for k,s in settings.items():
+            test = tests[k]
+            if 'bs' in s:
+                test.setBsLabels(s['bs'])
+            if 'mixes' in s:
+                test.setMixWlds(s['mixes'])
+            if 'track' in s:
+                test.setTrackCell([s['track']['mix'],s['track']['bs']])
+            if 'window' in s:
+                test.getStdyState().setWindow(s['window'])
+            options = test.getOptions()
+            if options.getRuntime() != s['runtime'] or ('window' in s and options.getTestRnds() != s['rounds']):
+                options = copy.copy(options)
+                options.setRuntime(s['runtime'])
+                if 'window' in s:
+                    options.setTestRnds(s['rounds'])
+                test.setOptions(options)
+            if 'window' not in s:
+                test.setMaxRnds(s['rounds'])
+            logging.info("# Plan of test " + k + ": " + json.dumps(s))
+        perfTest.setWorkloadPlan(self.__plan)
@@ -4,11 +4,42 @@ Created on Oct 3, 2013
 @author: gschoenb
 '''
 
+import logging
 import plots.genPlots as pgp
 import matplotlib.pyplot as plt
 
 __colorTable__ = ['#0000FF','#32cd32','#ffff00','#00ffff','#b22222','#9932cc','#ff4500']
 
+def msmtCell(test,row,bs):
+    """
+    Return the column of a block size in a row of the measurement table of a
+    test. A test run with a plan file may miss the block size.
+
+    Keyword arguments:
+    test -- a test with a measurement table
+    row -- a row of the table
+    bs -- the block size label
+    """
+    if bs not in test.getBsLabels():
+        logging.error("# Error: " + test.getTestname() + " has no results for block size " + bs)
+        raise RuntimeError("block size not compareable")
+    return row[test.getBsLabels().index(bs)]
+
+def msmtMixRow(test,table,mix):
+    """
+    Return the row of a workload in the measurement table of a test. A test
+    run with a plan file may miss the workload.
+
+    Keyword arguments:
+    test -- a test with a measurement table
+    table -- the table, one row per workload
+    mix -- the read percentage of the workload
+    """
+    if mix not in test.getMixWlds():
+        logging.error("# Error: " + test.getTestname() + " has no results for workload " + str(mix))
+        raise RuntimeError("workload not compareable")
+    return table[test.getMixWlds().index(mix)]
+
 def compWriteSatIOPSPlt(testsToPlot, subfolder=None):
     """
     Compare multiple tests and create a write saturation IOPS plot.
@@ -71,9 +102,9 @@ def compILPlt(testsToPlot, mode, subfolder=None):
             pgp.calcMsmtTable(test, 'avg-LAT')
         mixWLds = test.getTables()[0]
         if mode == "IOPS":
-            testVal = [mixWLds[0][6],mixWLds[3][6],mixWLds[6][6]]
+            testVal = [msmtCell(test,msmtMixRow(test,mixWLds,m),'4k') for m in [100,50,0]]
         if mode == "LAT":
-            testVal = [mixWLds[0][1],mixWLds[1][1],mixWLds[2][1]]
+            testVal = [msmtCell(test,msmtMixRow(test,mixWLds,m),'4k') for m in [100,65,0]]
         plt.bar(x, testVal, width,label=test.getTestname(),color = __colorTable__[i])
         x = [v + width for v in x]
         if max(testVal) > max_y:
@@ -123,7 +154,7 @@ def compTPPlt(testsToPlot, subfolder=None):
         test = tests.getTests()['tp']
         pgp.calcMsmtTPTable(test)
         wlds = test.getTables()[0]
-        testRTP = [wlds[0][2],wlds[0][1],wlds[0][0]]
+        testRTP = [msmtCell(test,wlds[0],bs) for bs in labelsy]
         ax.barh(y, testRTP, height, label=test.getTestname(),color = __colorTable__[i])
         y = [v + height for v in y]
         if max(testRTP) > max_x:
@@ -142,7 +173,7 @@ def compTPPlt(testsToPlot, subfolder=None):
     for i,tests in enumerate(testsToPlot):
         test = tests.getTests()['tp']
         wlds = test.getTables()[0]
-        testRTP = [wlds[1][2],wlds[1][1],wlds[1][0]]
+        testRTP = [msmtCell(test,wlds[1],bs) for bs in labelsy]
         ax.barh(y, testRTP, height, label=test.getTestname(),color = __colorTable__[i])
         y = [v + height for v in y]
     plt.xlabel("Write Bandwidth (MB/s)")
@@ -73,9 +73,9 @@ def stdyStConvPlt(toPlot,mode):
     Generate a steady state convergence plot.
     The plot consists of:
     IOPS:
-        -Measured IOPS of pure random write
+        -Measured IOPS of the workload of the tracking cell, pure random write per default
     LAT:
-        -Avg latency of read, mixed, write
+        -Avg latency of every workload, read, mixed and write per default
     -All lines are the different block sizes
     -IOPS/Latencies of all the rounds are plotted
     The figure is saved as SsdTest.Testname-stdyStConvPlt.png.
@@ -91,26 +91,22 @@ def stdyStConvPlt(toPlot,mode):
         lines = []
         for i in range(bsLens):
             lines.append([])
+        track = toPlot.getTrackIndex()[0]
         for rndMat in matrices:
-            row = rndMat[-1]#last row is random write
+            row = rndMat[track]#row of the tracking cell, random write per default
             for i in range(len(row)):
                 lines[i].append(row[i])#switch from row to column wise ordering of values
     
     if mode == "LAT":
-        readLines = []
-        writeLines = []
-        mixLines = []
-        for i in range(bsLens):
-            readLines.append([])
-            writeLines.append([])
-            mixLines.append([])
+        #one list of lines per workload, one line per block size
+        wldLines = []
+        for m in range(len(toPlot.getMixWlds())):
+            wldLines.append([[] for i in range(bsLens)])
         for rndMat in matrices:
-            #take read mat len, every elem has the same len
-            for i in range(len(rndMat[0])):
-                #also convert it from us to ms
-                readLines[i].append((rndMat[0][i][2]) / 1000)#mean latency
-                mixLines[i].append((rndMat[1][i][2]) / 1000)#mean latency
-                writeLines[i].append((rndMat[2][i][2]) / 1000)#mean latency
+            for m,row in enumerate(rndMat):
+                for i in range(len(row)):
+                    #also convert it from us to ms
+                    wldLines[m][i].append((row[i][2]) / 1000)#mean latency
     
     plt.clf()#clear
 
@@ -123,15 +119,16 @@ def stdyStConvPlt(toPlot,mode):
             min_y,max_y = getMinMax(lines[i], min_y, max_y)
             plt.plot(x,lines[i],'o-',label='bs='+toPlot.getBsLabels()[i])
     if mode == "LAT":
-        for i in range(len(readLines)):
-            min_y,max_y = getMinMax(readLines[i], min_y, max_y)
-            plt.plot(x,readLines[i],'s-',label='bs='+toPlot.getBsLabels()[i]+' read')
-        for i in range(len(mixLines)):
-            min_y,max_y = getMinMax(mixLines[i], min_y, max_y)
-            plt.plot(x,mixLines[i],'^-',label='bs='+toPlot.getBsLabels()[i]+' mixed')
-        for i in range(len(writeLines)):
-            min_y,max_y = getMinMax(writeLines[i], min_y, max_y)
-            plt.plot(x,writeLines[i],'o-',label='bs='+toPlot.getBsLabels()[i]+' write')
+        for m,lines in enumerate(wldLines):
+            mix = toPlot.getMixWlds()[m]
+            style,name = '^-','mixed ' + str(mix) + '/' + str(100 - mix)
+            if mix == 100:
+                style,name = 's-','read'
+            if mix == 0:
+                style,name = 'o-','write'
+            for i in range(len(lines)):
+                min_y,max_y = getMinMax(lines[i], min_y, max_y)
+                plt.plot(x,lines[i],style,label='bs='+toPlot.getBsLabels()[i]+' '+name)
     
     plt.xticks(x)
     plt.suptitle(mode+" Steady State Convergence Plot",fontweight='bold')
@@ -163,17 +160,12 @@ def mes2DPlt(toPlot,mode):
     '''
     # Generate the measurement table
     calcMsmtTable(toPlot, mode)
-    if mode == "IOPS":
-        wlds = dt.SsdIopsTest.mixWlds
-        bsLabels = toPlot.getBsLabels()
+    wlds = toPlot.getMixWlds()
+    bsLabels = toPlot.getBsLabels()
+    if mode == "IOPS" or mode == "avg-LAT":
         mixWLds = toPlot.getTables()[0]
-    if mode == "avg-LAT" or mode == "max-LAT":
-        wlds = dt.SsdLatencyTest.mixWlds
-        bsLabels = toPlot.getBsLabels()
-        if mode == "avg-LAT":
-            mixWLds = toPlot.getTables()[0]
-        if mode == "max-LAT":
-            mixWLds = toPlot.getTables()[1]
+    if mode == "max-LAT":
+        mixWLds = toPlot.getTables()[1]
 
     plt.clf()#clear plot
     if mode == "IOPS":
@@ -223,7 +215,7 @@ def mes3DPlt(toPlot,mode):
         for row in matrix:
             row.reverse()
         bsLabels = list(toPlot.getBsLabels())
-        mixWlds = list(dt.SsdIopsTest.mixWlds)
+        mixWlds = list(toPlot.getMixWlds())
     
     #define positions for bars
     ypos = np.array([0.25] * len(bsLabels)) 
@@ -242,7 +234,7 @@ def mes3DPlt(toPlot,mode):
     else:
         ax = Axes3D(fig)
     for j,wl in enumerate(matrix):
-        ax.bar3d(xpos,ypos,zpos, dx, dy, wl, color=pltm.colorConverter.to_rgba_array(colorTable[j]))
+        ax.bar3d(xpos,ypos,zpos, dx, dy, wl, color=pltm.colorConverter.to_rgba_array(colorTable[j % len(colorTable)]))
         for pos in range(len(ypos)):
             ypos[pos] += 1
             
@@ -274,7 +266,7 @@ def latMes3DPlt(toPlot):
     @param toPlot A SsdTest object.
     '''
     colorTable = ['#0000FF','#008080','#00FFFF']
-    mixWlds = list(dt.SsdLatencyTest.mixWlds)
+    mixWlds = list(toPlot.getMixWlds())
     bsLabels = list(toPlot.getBsLabels())
 
     avgMatrix = deepcopy(toPlot.getTables()[0])
@@ -298,7 +290,7 @@ def latMes3DPlt(toPlot):
         rect = fig.add_subplot(2, 1, 1).get_position()
         ax = Axes3D(fig, rect)
     for j,wl in enumerate(avgMatrix):
-        ax.bar3d(xpos,ypos,zpos, dx, dy, wl, color=pltm.colorConverter.to_rgba_array(colorTable[j]))
+        ax.bar3d(xpos,ypos,zpos, dx, dy, wl, color=pltm.colorConverter.to_rgba_array(colorTable[j % len(colorTable)]))
         for pos in range(len(ypos)):
             ypos[pos] += 1
     ax.xaxis.set_ticks([]) 
@@ -314,7 +306,7 @@ def latMes3DPlt(toPlot):
     #reset ypos
     ypos = np.array([0.25] * len(bsLabels)) 
     for j,wl in enumerate(maxMatrix):
-        ax.bar3d(xpos,ypos,zpos, dx, dy, wl, color=pltm.colorConverter.to_rgba_array(colorTable[j]))
+        ax.bar3d(xpos,ypos,zpos, dx, dy, wl, color=pltm.colorConverter.to_rgba_array(colorTable[j % len(colorTable)]))
         for pos in range(len(ypos)):
             ypos[pos] += 1
             
@@ -385,6 +377,89 @@ def writeSatLatPlt(toPlot):
     plt.savefig(toPlot.getTestname()+'-writeSatLatPlt.png',dpi=300)
     toPlot.addFigure(toPlot.getTestname()+'-writeSatLatPlt.png')
     
+def intervalPlt(toPlot,log):
+    '''
+    Plot the timeline of the fio interval logs over all rounds. For the
+    IOPS test the steady state tracking cell (4k random write per default)
+    is plotted, for write saturation the single cell of every round.
+    @param toPlot A test with collected interval samples.
+    @param log The interval log to plot, 'bw', 'iops' or 'lat'.
+    '''
+    rnds = toPlot.getIntervals()
+    if isinstance(toPlot,dt.SsdIopsTest):
+        mix,bs = toPlot.getTrackIndex()
+        rnds = [r[mix][bs] for r in rnds]
+    x = []
+    y = []
+    bounds = []
+    offset = 0.0
+    for rnd in rnds:
+        for t,r,w in rnd[log]:
+            x.append(offset + t / 1000.0)
+            if log == 'lat':
+                #average the directions which were sampled
+                vals = [v for v in [r,w] if v > 0]
+                y.append(sum(vals) / len(vals) if len(vals) > 0 else 0)
+            else:
+                y.append(r + w)
+        if len(rnd[log]) > 0:
+            offset += rnd[log][-1][0] / 1000.0
+        bounds.append(offset)
+    labels = {'bw':'Bandwidth (KB/s)','iops':'IOPS','lat':'Latency (us)'}
+
+    plt.clf()#clear plot
+    plt.plot(x,y,'-',linewidth=0.5,label='Interval '+labels[log])
+    #mark the end of every round
+    for b in bounds[:-1]:
+        plt.axvline(b,color='grey',linestyle=':',linewidth=0.3)
+    if len(y) > 0:
+        plt.ylim(0,max(y)*1.25)
+    plt.suptitle("Interval Timeline",fontweight='bold')
+    plt.xlabel("Time (s)")
+    plt.ylabel(labels[log])
+    plt.legend(loc='upper center', bbox_to_anchor=(0.5, 1.07),
+               ncol=1, fancybox=True, shadow=True,prop={'size':12})
+    plt.savefig(toPlot.getTestname()+'-'+log+'-intervalPlt.png',dpi=300)
+    toPlot.addFigure(toPlot.getTestname()+'-'+log+'-intervalPlt.png')
+
+def distPlt(toPlot,wlds,rnds):
+    '''
+    Generate the measurement tables and plots of the random distributions
+    of an IOPS test. For every distribution the IOPS are averaged over the
+    given rounds, the plot has a line per workload over the block sizes.
+    The figures are saved as Testname-IOPS-dist<index>-mes2DPlt.png.
+    @param toPlot An IOPS test with random distribution matrices.
+    @param wlds The read percentages of the mixed workloads.
+    @param rnds The rounds to average, e.g. the measurement window.
+    '''
+    bsLabels = toPlot.getBsLabels()
+    matrices = toPlot.getDistMatrices()
+    del toPlot.getDistTables()[:]
+    del toPlot.getDistFigures()[:]
+    for d,dist in enumerate(toPlot.getDistributions()):
+        mats = np.array([matrices[j][d] for j in rnds],dtype=float)
+        table = mats.mean(axis=0).tolist()
+        toPlot.getDistTables().append(table)
+
+        plt.clf()#clear plot
+        x = getBS(bsLabels)
+        max_y = 0
+        min_y = 0
+        for i in range(len(table)):
+            min_y,max_y = getMinMax(table[i], min_y, max_y)
+            plt.plot(x,table[i],'o-',label=str(wlds[i])+'/'+str(100-wlds[i]))
+        plt.yscale('log')
+        plt.xscale('log')
+        plt.ylabel("IOPS")
+        plt.legend(prop={'size':12})
+        plt.xlabel("Block Size (Byte)")
+        plt.ylim((min_y*0.75,max_y*1.15))
+        plt.xticks(x,bsLabels)
+        plt.suptitle("IOPS Measurement Plot, random_distribution=" + dist,fontweight='bold')
+        filename = toPlot.getTestname()+'-IOPS-dist'+str(d)+'-mes2DPlt.png'
+        plt.savefig(filename,dpi=300)
+        toPlot.getDistFigures().append(filename)
+
 def tpRWStdyStConvPlt(toPlot):
     '''
     Generate one steady state convergence plot for throughput read and write measurements.
@@ -498,7 +573,7 @@ def TPplot(toPlot):
     '''
     #As the values are converted to KB, copy the matrices
     matrices = deepcopy(toPlot.getRndMatrices())
-    rnds = dt.HddTPTest.maxRnds
+    rnds = toPlot.getMaxRnds()
     bsLabels = toPlot.getBsLabels()
     
     #values for scaling the axes
@@ -520,7 +595,8 @@ def TPplot(toPlot):
         min_y,max_y = getMinMax(rndMat[1], min_y, max_y)
         plt.plot(x,rndMat[1],'o-',label='write bs='+bsLabels[i])
     
-    x = list(range(0,rnds+1,16))
+    #a tick every eighth of the device, 16 rounds per default
+    x = list(range(0,rnds+1,max(1,rnds // 8)))
     plt.xticks(x)
     plt.suptitle("TP Measurement Plot",fontweight='bold')    
     plt.xlabel("Area of Device (in rounds)")
@@ -535,14 +611,14 @@ def TPplot(toPlot):
 def IOPSplot(toPlot):
     '''
     Generate the IOPS plot for a hdd performance test. The plot consists
-    of plotting the IOPS results from the 128 rounds that have been carried
+    of plotting the IOPS results from the rounds (128 per default) that have been carried
     out. In each round the mixed workloads and all block sizes are plotted.
     @param toPlot An hdd IopsTest object.
     '''
-    rnds = dt.HddIopsTest.maxRnds
+    rnds = toPlot.getMaxRnds()
     matrices = toPlot.getRndMatrices()
     
-    wlds = dt.HddIopsTest.mixWlds
+    wlds = toPlot.getMixWlds()
     bsLabels = toPlot.getBsLabels()
     
     #each row will be a workload percentage
@@ -564,24 +640,16 @@ def IOPSplot(toPlot):
     x = list(range(rnds))
     max_y = 0
     min_y = 0
+    colors = ['blue','green','red','cyan','magenta','yellow','black']
+    styles = ['s-','o-','^-','v-','D-','p-','*-']
     for i in range(len(mixWLds)):
-        if i == 0:
-            lc = 'blue'
-        if i == 1:
-            lc = 'green'
-        if i == 2:
-            lc = 'red'
+        lc = colors[i % len(colors)]
         for j in range(len(mixWLds[i])):
-            if j == 0:
-                ls = 's-'
-            if j == 1:
-                ls = 'o-'
-            if j == 2:
-                ls = '^-'
+            ls = styles[j % len(styles)]
             min_y,max_y = getMinMax(mixWLds[i][j], min_y, max_y)
             plt.plot(x,mixWLds[i][j],ls,color=lc,
                   label=str(wlds[i])+'/bs=' + bsLabels[j])
-    x = list(range(0,rnds + 1,16))
+    x = list(range(0,rnds + 1,max(1,rnds // 8)))
     plt.xticks(x)
     plt.suptitle("IOPS Measurement Plot",fontweight='bold')
     plt.xlabel("Area of Device (in rounds)")
@@ -650,16 +718,18 @@ def calcMsmtTable(toPlot,mode):
     an overview over the average values in the measurement window. For latency
     the values are converted from us to ms also.
     @param toPlot A SsdTest object.
-    @param mode A string representing the test mode (IOPS|max-LAT|avg-LAT)
+    @param mode A string representing the test mode (IOPS|max-LAT|avg-LAT),
+    for latency percentiles use pctMode to get the mode.
     '''
     mixWLds = []
     mesWin = toPlot.getStdyState().getStdyRnds() #get measurement window, only include these values
-    if mode == "IOPS":
-        wlds = dt.SsdIopsTest.mixWlds
-        bsLabels = toPlot.getBsLabels()
-    if mode == "avg-LAT" or mode == "max-LAT":
-        wlds = dt.SsdLatencyTest.mixWlds
-        bsLabels = toPlot.getBsLabels()
+    wlds = toPlot.getMixWlds()
+    bsLabels = toPlot.getBsLabels()
+    #position of the averaged value in a latency cell
+    pos = 2
+    if mode.startswith('p') and mode.endswith("-LAT"):
+        pos = 3 + toPlot.getPercentiles().index(float(mode[1:-4]))
+        mode = "avg-LAT"
 
     #each row will be a workload percentage
     for i in range(len(wlds)):
@@ -690,7 +760,7 @@ def calcMsmtTable(toPlot,mode):
                         if mode == "IOPS":
                             mixWLds[i][bs] += row[bs]#IOPS
                         if mode == "avg-LAT":
-                            mixWLds[i][bs] += row[bs][2]#mean latency
+                            mixWLds[i][bs] += row[bs][pos]#mean latency
                         mixWLds[i][bs] = (mixWLds[i][bs]) / (k+1)
                 else:
                     if mode == "IOPS":
@@ -698,7 +768,7 @@ def calcMsmtTable(toPlot,mode):
                     if mode == "max-LAT":
                         mixWLds[i][bs] = row[bs][1]#max latency
                     if mode == "avg-LAT":
-                        mixWLds[i][bs] = row[bs][2]#mean latency
+                        mixWLds[i][bs] = row[bs][pos]#mean latency
         k += 1
     #for latency convert to ms
     for i in range(len(mixWLds)):
@@ -744,6 +814,14 @@ def calcMsmtTPTable(toPlot):
             wlds[i][v] = (wlds[i][v]) / 1024
     toPlot.addTable(wlds)
 
+def pctMode(pct):
+    '''
+    Get the mode string of a latency percentile measurement table.
+    @param pct The percentile, e.g. 99.9
+    @return The mode string, e.g. p99.9-LAT
+    '''
+    return 'p' + ('%g' % pct) + "-LAT"
+
 def getBS(bsLabels):
     '''
     Convert a list of string block size labels to a list of integers.
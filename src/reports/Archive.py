@@ -0,0 +1,130 @@
+'''
+A content addressed archive of the raw fio outputs of a performance test.
+'''
+import hashlib
+import tempfile
+import logging
+import json
+import gzip
+import os
+import shutil
+
+class Archive(object):
+    '''
+    A content addressed store of the raw fio outputs of a performance test,
+    kept next to its xml file. Every output is stored gzip compressed under
+    its sha256 digest, an index file maps (test,round,mix,bs) to the digest.
+    '''
+    ## Name of the index file, one json entry per line.
+    indexName = 'index.jsonl'
+
+    def __init__(self,testname):
+        '''
+        Constructor
+        @param testname Name of the performance test, the archive is
+        stored in the directory 'testname.archive'.
+        '''
+        ## Directory of the archive
+        self.__path = testname + '.archive'
+        ## Index entries, loaded on first use
+        self.__index = None
+        ## Number of entries per (test,mix,bs), the next round of a cell
+        self.__rounds = {}
+
+    def getPath(self): return self.__path
+
+    def exists(self):
+        ''' Check if the archive has an index. '''
+        return os.path.isfile(os.path.join(self.__path,Archive.indexName))
+
+    def clear(self):
+        ''' Remove the outputs of a previous run, a new run starts its rounds at 0. '''
+        if os.path.isdir(self.__path):
+            shutil.rmtree(self.__path)
+        self.__index = None
+        self.__rounds = {}
+
+    def getIndex(self):
+        '''
+        Return the index entries, dictionaries with the keys
+        test,round,mix,bs and sha.
+        '''
+        if self.__index == None:
+            self.__index = []
+            if self.exists():
+                with open(os.path.join(self.__path,Archive.indexName)) as f:
+                    for line in f:
+                        if line.strip() != '':
+                            self.__index.append(json.loads(line))
+            for e in self.__index:
+                key = (e['test'],e['mix'],e['bs'])
+                self.__rounds[key] = max(self.__rounds.get(key,0),e['round'] + 1)
+        return self.__index
+
+    def objPath(self,digest):
+        ''' Return the file of an archived output. '''
+        return os.path.join(self.__path,'objects',digest[:2],digest + '.gz')
+
+    def add(self,test,mix,bs,fioOut,rnd=None):
+        '''
+        Archive a raw fio output. Equal outputs are stored only once.
+        @param test The key of the test, e.g. the test class name.
+        @param mix The workload of the cell, e.g. the rwmixread value.
+        @param bs The block size of the cell.
+        @param fioOut The raw fio output.
+        @param rnd The round number, None to use the next round of the cell.
+        @return The sha256 digest of the output.
+        '''
+        index = self.getIndex()
+        key = (test,mix,bs)
+        if rnd == None:
+            rnd = self.__rounds.get(key,0)
+        self.__rounds[key] = max(self.__rounds.get(key,0),rnd + 1)
+        data = fioOut.encode()
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.objPath(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path),exist_ok=True)
+            fd,tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd,'wb') as f:
+                f.write(gzip.compress(data))
+            os.replace(tmp,path)
+        entry = {'test':test,'round':rnd,'mix':mix,'bs':bs,'sha':digest}
+        with open(os.path.join(self.__path,Archive.indexName),'a') as f:
+            f.write(json.dumps(entry) + '\n')
+        index.append(entry)
+        return digest
+
+    def get(self,digest):
+        '''
+        Load an archived output.
+        @param digest The sha256 digest of the output.
+        @return The raw fio output.
+        @exception RuntimeError if the output is missing or corrupt.
+        '''
+        try:
+            with gzip.open(self.objPath(digest),'rb') as f:
+                data = f.read()
+        except (OSError,EOFError) as e:
+            logging.error("# Error: could not read archived fio output " + digest + ": " + str(e))
+            raise RuntimeError("archive read error")
+        if hashlib.sha256(data).hexdigest() != digest:
+            logging.error("# Error: archived fio output " + digest + " is corrupt")
+            raise RuntimeError("archive checksum error")
+        return data.decode()
+
+    def getRounds(self,test):
+        '''
+        Return the archived outputs of a test per round, later entries of
+        the same cell replace former ones.
+        @param test The key of the test.
+        @return A list of dictionaries {(mix,bs):output}, one per round.
+        '''
+        rounds = {}
+        for e in self.getIndex():
+            if e['test'] == test:
+                rounds.setdefault(e['round'],{})[(e['mix'],e['bs'])] = e['sha']
+        res = []
+        for rnd in sorted(rounds.keys()):
+            res.append(dict((k,self.get(v)) for k,v in rounds[rnd].items()))
+        return res
@@ -0,0 +1,64 @@
+'''
+An append only log of the finished test rounds, one json record per line.
+'''
+
+import logging
+import json
+import os
+import datetime
+
+class RoundLog(object):
+    '''
+    Appends every finished round of a performance test to the file
+    'testname.rounds.jsonl' as soon as it is done. The file is written line
+    by line and flushed after each round, the progress of a running test can
+    be followed with e.g. tail -f. Nothing is kept in memory.
+    '''
+
+    def __init__(self,testname):
+        '''
+        Constructor
+        @param testname Name of the performance test, the log is 'testname.rounds.jsonl'.
+        '''
+        ## Path of the log file
+        self.__path = testname + '.rounds.jsonl'
+
+    def getPath(self): return self.__path
+
+    def clear(self):
+        ''' Remove the rounds of a previous run. '''
+        if os.path.exists(self.__path):
+            os.remove(self.__path)
+
+    def append(self,record):
+        '''
+        Append a record, the current time is added as 'time'. Errors are only
+        logged, the round log must not stop a test.
+        @param record A dictionary, e.g. {test,round,values,counters}.
+        '''
+        record = dict(record)
+        record['time'] = datetime.datetime.now().isoformat(timespec='seconds')
+        try:
+            with open(self.__path,'a') as f:
+                f.write(json.dumps(record) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+        except (OSError,IOError) as e:
+            logging.warning("# Could not append to round log " + self.__path + ": " + str(e))
+
+    def read(self):
+        '''
+        Read the records of the log. An incomplete last line, e.g. of a crash
+        while writing, is skipped.
+        @return A list of dictionaries.
+        '''
+        records = []
+        if not os.path.exists(self.__path):
+            return records
+        with open(self.__path) as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    logging.warning("# Skipping incomplete line of round log " + self.__path)
+        return records
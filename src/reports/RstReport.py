@@ -12,6 +12,7 @@ import logging
 
 import perfTest.DeviceTests as dt
 from perfTest.StdyState import StdyState
+from perfTest.Plan import Plan
 
 class RstReport(object):
     '''
@@ -63,26 +64,36 @@ class RstReport(object):
             str += '\n'
         print(str, file=self.__rst)
     
-    def addFigure(self,filename,testtype,perftype,index):
+    def addFigure(self,filename,testtype,perftype,index,test=None):
         '''
         Adds a figure to the restructured text.
         @param filename The filename of the figure.
         @param testtype The type of the performance test (ssd,hdd)
         @param type The type of the test (iops,tp etc)
         @param index The index of the caption to insert after the figure.
+        @param test The test of the figure, None for the default steady state tracking cell.
         '''
         print(".. figure:: "+filename, file=self.__rst) 
         print("\t:scale: 65%", file=self.__rst)
         print("\t:figwidth: 85%\n", file=self.__rst)
         caption = ''
+        track = "4k random writes"
+        tpTrack = "1024k"
+        if test != None and test.getTrackCell() != None:
+            track = RstReport.trackDesc(test)
+            tpTrack = test.getTrackCell()[1]
+        #hdd tests divide the device in parts, one per round
+        parts = "128"
+        if test != None and test.getMaxRnds() != None:
+            parts = str(test.getMaxRnds())
         if testtype == 'ssd':
             if perftype == 'iops':
                 if index == 0:
                     caption= "\tThe Steady State Convergence Plot shows the reached IOPS for "
-                    caption += "all block sizes of random writes over all rounds."
+                    caption += "all block sizes of the workload of the dependent variable over all rounds."
                 if index == 1:
-                    caption= "\tThe Steady State Verification Plot shows the measured IOPS of 4k "
-                    caption += "random writes, the 20% average window and the slope of the linear best fit line "
+                    caption= "\tThe Steady State Verification Plot shows the measured IOPS of " + track + ", "
+                    caption += "the 20% average window and the slope of the linear best fit line "
                     caption += "in the measurement window."
                 if index == 2:
                     caption= "\tThe Measurement Plot shows the average of IOPS in the measurement window. For every "
@@ -90,13 +101,19 @@ class RstReport(object):
                 if index == 3:
                     caption= "\tThe Measurement 3D Plot shows the average of IOPS in the measurement window. For every "
                     caption += "workload the IOPS of all block sizes are plotted."
+                if index == 4:
+                    caption= "\tThe Interval Timeline shows the IOPS of " + track + " sampled by fio within "
+                    caption += "the rounds, dotted lines mark the end of a round."
+            if perftype == 'iops-dist':
+                caption= "\tThe Measurement Plot shows the average of IOPS in the measurement window for a skewed "
+                caption += "access distribution. For every workload the IOPS of all block sizes are plotted."
             if perftype == 'tp':
                 if index == 0:
                     caption= "\tThe Read/Write Steady State Convergence Plot shows the bandwidth for "
                     caption += "all block sizes of seq. reads over all rounds. On the top the write throughput is plotted, below "
                     caption += "the throughput for read."
                 if index == 1:
-                    caption= "\tThe Steady State Verification Plot shows the bandwidth of 1024k "
+                    caption= "\tThe Steady State Verification Plot shows the bandwidth of " + tpTrack + " "
                     caption += "seq. writes, the 20% average window and the slope of the linear best fit line "
                     caption += "in the measurement window."
                 if index == 2:
@@ -105,10 +122,10 @@ class RstReport(object):
             if perftype == 'lat':
                 if index == 0:
                     caption= "\tThe Steady State Convergence Plot shows the mean latency for "
-                    caption += "all block sizes of random read, mixed workload and write."
+                    caption += "all block sizes of all workloads."
                 if index == 1:
-                    caption= "\tThe Steady State Verification Plot shows the mean latency of 4k "
-                    caption += "random writes, the 20% average window and the slope of the linear best fit line "
+                    caption= "\tThe Steady State Verification Plot shows the mean latency of " + track + ", "
+                    caption += "the 20% average window and the slope of the linear best fit line "
                     caption += "in the measurement window."
                 if index == 4:
                     caption = "\tThe Latency Measurement 3D Plot shows the average latency on top and the max latency below it. "
@@ -120,14 +137,20 @@ class RstReport(object):
                 if index == 1:
                     caption= "\tThe Write Saturation Latency Plot shows the mean latency of 4k random "
                     caption += "writes over all rounds."
+                if index == 2:
+                    caption= "\tThe Interval Timeline shows the IOPS of 4k random writes sampled by fio within "
+                    caption += "the rounds, dotted lines mark the end of a round."
         if testtype == 'hdd':
             if perftype == 'iops':
                 if index == 0:
-                    caption= "\tThe Measurement Plot shows the IOPS of each one-128th part of the disk. For every "
+                    caption= "\tThe Measurement Plot shows the IOPS of each one-" + parts + "th part of the disk. For every "
                     caption += "workload the IOPS of all block sizes are plotted."
+            if perftype == 'iops-dist':
+                caption= "\tThe Measurement Plot shows the average of IOPS over all parts of the disk for a skewed "
+                caption += "access distribution. For every workload the IOPS of all block sizes are plotted."
             if perftype == 'tp':
                 if index == 0:
-                    caption= "\tThe Measurement Plot shows the bandwidth of reads and writes in each one-128th part "
+                    caption= "\tThe Measurement Plot shows the bandwidth of reads and writes in each one-" + parts + "th part "
                     caption += "of the disk. For all block sizes the seq. read and write bandwidth is plotted."
                 if index == 1:
                     caption= "\tThe Boxplot shows minimum, lower quartile, median, upper quartile and maximum. "
@@ -135,25 +158,56 @@ class RstReport(object):
                     
         self.addString(caption)
         
-    def addTable(self,table,labels,perftype):
+    @staticmethod
+    def mixLabels(mixes):
+        ''' Return the read/write labels of workloads, e.g. "65/35". '''
+        return [str(m) + '/' + str(100 - m) for m in mixes]
+
+    @staticmethod
+    def trackDesc(test):
+        ''' Return the steady state tracking cell of a test as text, e.g. "4k block size, random write". '''
+        mix,bs = test.getTrackCell()
+        if mix == 0:
+            wld = "random write"
+        elif mix == 100:
+            wld = "random read"
+        else:
+            wld = RstReport.mixLabels([mix])[0] + " read/write mix"
+        return bs + " block size, " + wld
+
+    def addTable(self,table,labels,perftype,title=None,mixes=None):
         '''
         Adds a table to the restructured text.
         @param table The table to insert into the report.
         @param type The type of performance test.
+        @param title The title of the table, None for the default of the type.
+        @param mixes The workloads of the table rows, None for the defaults of the type.
         '''
         #copy labels and values, don't want to change them
         l = list(labels)
         t = deepcopy(table)
+        if mixes == None:
+            mixes = {'iops':dt.SsdIopsTest.mixWlds,'hdd-iops':dt.HddIopsTest.mixWlds}.get(perftype,dt.SsdLatencyTest.mixWlds)
+        wlds = ', '.join(RstReport.mixLabels(mixes))
+        #latency tables start with the last workload
+        latWlds = ', '.join(reversed(RstReport.mixLabels(mixes)))
         
         if perftype == 'iops':
             val = StringIO()
-            print(".. csv-table:: Average IOPS vs. Block Size and R/W Mix %", file=self.__rst)
-            print("\t:header: \"Block Size\ |darr|\", \"Wld. |rarr| \" 100/0, 95/5, 65/35, 50/50, 35/65, 5/95, 0/100\n", file=self.__rst)
+            print(".. csv-table:: " + (title or "Average IOPS vs. Block Size and R/W Mix %"), file=self.__rst)
+            print("\t:header: \"Block Size\ |darr|\", \"Wld. |rarr| \" " + wlds + "\n", file=self.__rst)
             #reverse the block size in each table row, to start with 512B
             for row in t:
                 row.reverse()
             #also reverse labels
             l.reverse()
+        if perftype == 'hdd-iops':
+            val = StringIO()
+            print(".. csv-table:: " + (title or "Average IOPS vs. Block Size and R/W Mix %"), file=self.__rst)
+            print("\t:header: \"Block Size\ |darr|\", \"Wld. |rarr| \" " + wlds + "\n", file=self.__rst)
+            for row in t:
+                row.reverse()
+            l.reverse()
         if perftype == 'tp':
             val = StringIO()
             print(".. csv-table:: Average MB/s vs. Block Size and R/W", file=self.__rst)
@@ -162,15 +216,22 @@ class RstReport(object):
         if perftype == 'avg-lat':
             val = StringIO()
             print(".. csv-table:: Average Latency (ms) vs. Block Size and R/W Mix %", file=self.__rst)
-            print("\t:header: \"Block Size\ |darr|\", \"Wld. |rarr| \" 0/100, 65/35, 100/0\n", file=self.__rst)
-            #reverse to start with 0/100
+            print("\t:header: \"Block Size\ |darr|\", \"Wld. |rarr| \" " + latWlds + "\n", file=self.__rst)
+            #reverse to start with the last workload, 0/100 per default
             t.reverse()
         
         if perftype == 'max-lat':
             val = StringIO()
             print(".. csv-table:: Max Latency (ms) vs. Block Size and R/W Mix %", file=self.__rst)
-            print("\t:header: \"Block Size\ |darr|\", \"Wld. |rarr| \" 0/100, 65/35, 100/0\n", file=self.__rst)
-            #reverse to start with 0/100
+            print("\t:header: \"Block Size\ |darr|\", \"Wld. |rarr| \" " + latWlds + "\n", file=self.__rst)
+            #reverse to start with the last workload, 0/100 per default
+            t.reverse()
+
+        if perftype.startswith('p') and perftype.endswith('-lat'):
+            val = StringIO()
+            print(".. csv-table:: " + perftype[1:-4] + "th Percentile Completion Latency (ms) vs. Block Size and R/W Mix %", file=self.__rst)
+            print("\t:header: \"Block Size\ |darr|\", \"Wld. |rarr| \" " + latWlds + "\n", file=self.__rst)
+            #reverse to start with the last workload, 0/100 per default
             t.reverse()
             
         for i in range(len(l)):
@@ -186,6 +247,41 @@ class RstReport(object):
         val.close()
                 
     
+    def addLoadTable(self,loadMatrix,labels,percentiles,mixes=None):
+        '''
+        Adds a table of an open loop latency round to the restructured text.
+        @param loadMatrix The matrix of one offered load, a cell is [offered
+        IOPS,achieved IOPS,min,max,mean latency,percentiles...].
+        @param labels The block sizes.
+        @param percentiles The percentiles following the latencies in a cell.
+        @param mixes The workloads of the matrix rows, None for the latency defaults.
+        '''
+        t = list(loadMatrix)
+        #reverse to start with the last workload as the latency tables
+        t.reverse()
+        mixes = list(reversed(RstReport.mixLabels(mixes or dt.SsdLatencyTest.mixWlds)))
+        pos = 5 + percentiles.index(99.0) if 99.0 in percentiles else None
+        val = StringIO()
+        print(".. csv-table:: Achieved IOPS and Latency (ms) at " + str(t[0][0][0]) + " offered IOPS vs. Block Size and R/W Mix %", file=self.__rst)
+        header = "\t:header: \"Block Size\ |darr|\""
+        for m in mixes:
+            header += ", \"" + m + " IOPS\", \"" + m + " avg\""
+            if pos != None:
+                header += ", \"" + m + " p99\""
+        print(header + "\n", file=self.__rst)
+        for i in range(len(labels)):
+            val.write("\t")
+            val.write(labels[i])
+            for row in t:
+                cell = row[i]
+                val.write(", " + str(cell[1]) + ", " + str(round(cell[4] / 1000,3)))
+                if pos != None:
+                    p = cell[pos] if len(cell) > pos else None
+                    val.write(", " + ("n.a." if p == None else str(round(p / 1000,3))))
+            val.write("\n")
+        self.addString(val.getvalue())
+        val.close()
+
     def toRstFile(self):
         f = open(self.__testname+'.rst','w')
         f.write(self.__rst.getvalue())
@@ -221,6 +317,27 @@ class RstReport(object):
         print("Used command line:", file=self.__rst)
         print(" - " + cmdLineStr, file=self.__rst)
         
+    def addBudget(self,budget):
+        '''
+        Add the time budget and what was reduced or skipped to keep it.
+        @param budget The Budget of the tests.
+        '''
+        print("Time budget:", file=self.__rst)
+        used = Plan.fmtTime(budget.getUsed()) if budget.getUsed() != None else 'n.a.'
+        print(" - Budget: " + Plan.fmtTime(budget.getSeconds()) + ", used: " + used, file=self.__rst)
+        if len(budget.getReductions()) == 0 and len(budget.getSkipped()) == 0:
+            print(" - All tests were run in full", file=self.__rst)
+        for k,changes in budget.getReductions().items():
+            for c in changes:
+                print(" - Test " + k + ": " + c['what'] + " reduced from " + str(c['from'])
+                      + " to " + str(c['to']), file=self.__rst)
+        for k in budget.getSkipped():
+            print(" - Test " + k + ": skipped", file=self.__rst)
+        for r in budget.getReplans():
+            #in seconds, rounded minutes would hide what the planning saw
+            print(" - Planned before " + r['phase'] + " after " + str(r['elapsed']) + "s: "
+                  + str(r['remaining']) + "s left, estimated " + str(r['estimate']) + "s", file=self.__rst)
+
     def addSetupInfo(self,ioVer,fioVer,dateStr):
         '''
         Add info about the version of Fio to the report.
@@ -232,15 +349,39 @@ class RstReport(object):
         print(" - Fio Version: " + fioVer, file=self.__rst)
         print(" - Date of test run: " + dateStr, file=self.__rst)
         
-    def addFioJobInfo(self,nj,iod):
+    def addFioJobInfo(self,nj,iod,options=None):
         '''
         Write information about Fio number of jobs and iodepth to report.
         @param nj The number of jobs.
         @param iod The number of outstanding ios (iodepth).
+        @param options The Options of the test, to add the ioengine and its probe.
         ''' 
         info = StringIO()
         info.write(" - Number of jobs: " + str(nj) + "\n")
         info.write(" - Number of outstanding IOs (iodepth): " + str(iod))
+        if options != None and options.getIoEngine() != None:
+            info.write("\n - IO engine: " + options.getIoEngine())
+            if options.getEngineTuning():
+                info.write(" (" + ", ".join(options.getEngineTuning()) + ")")
+            if options.getProbeResults():
+                info.write(", selected by a 4k random read probe")
+                if options.getProbeReason():
+                    info.write(" (" + options.getProbeReason() + ")")
+                info.write(":")
+                for name,res in sorted(options.getProbeResults().items()):
+                    info.write("\n\n   - " + name + ": " + str(res[0]) + " IOPS, "
+                               + str(round(res[2])) + " IOPS per core")
+        if options != None and options.getPinInfo() != None:
+            pin = options.getPinInfo()
+            if pin['cpus'] == None:
+                info.write("\n - CPU pinning (" + pin['mode'] + "): no locality known, not pinned")
+            else:
+                info.write("\n - CPU pinning (" + pin['mode'] + "): cpus " + pin['cpus']
+                           + " of NUMA node " + str(pin['node']))
+            if len(pin['irqs']) > 0:
+                info.write(", queue interrupts handled by:")
+                for queue,cpus in sorted(pin['irqs'].items()):
+                    info.write("\n\n   - " + queue + ": cpus " + cpus)
         self.addString(info.getvalue())
         info.close()
         
@@ -252,10 +393,11 @@ class RstReport(object):
             if 'lsb' in OSDict:
                 print(" - " + OSDict['lsb'], file=self.__rst)
         
-    def addGeneralInfo(self,testtype,testrounds):
+    def addGeneralInfo(self,testtype,test=None):
         '''
         Defines some general used words.
         @param testtype The type of the performance test (ssd,hdd)
+        @param test A test giving the measurement window and the rounds, None for the defaults.
         ''' 
         info = StringIO()
         self.addChapter("General Information")
@@ -271,11 +413,15 @@ class RstReport(object):
         self.addString(info.getvalue())
         info.close()
         if testtype == 'ssd':
+            window = StdyState.testMesWindow
+            testrounds = test.getOptions().getTestRnds() if test != None else 'n.a.'
+            if test != None and hasattr(test,'getStdyState'):
+                window = test.getStdyState().getWindow()
             info = StringIO()
             self.addSection("Steady State")
             info.write("The Steady State is to determine if a test has reached a steady performance level. ")
             info.write("Each test has a different dependence variable to check if the state has already been reached. ")
-            info.write("To check for the steady state the performance values of a test measurement window are taken (the last 5 rounds).\n")
+            info.write("To check for the steady state the performance values of a test measurement window are taken (the last " + str(window) + " rounds).\n")
             info.write("The steady state is reached if:\n\n")
             info.write("- The maximum data excursion is less than 20% of the average in the measurement window.\n")
             info.write("- The slope of the linear best fit line is less than 10% of the average in the measurement window\n\n")
@@ -284,7 +430,7 @@ class RstReport(object):
             info.write("Therefore the test can be stopped and the performance values of the measurement window can be taken ")
             info.write("for the measurement plots. If the steady state has not been reached after a maximum number of rounds the test ")
             info.write("can be stopped as well. The numbers for these two variables are:\n\n")
-            print("- Measurement Window: " + str(StdyState.testMesWindow), file=info)
+            print("- Measurement Window: " + str(window), file=info)
             print("- Max. number of rounds: " + str(testrounds) + '\n', file=info)
             self.addString(info.getvalue())
             info.close()
@@ -312,6 +458,17 @@ class RstReport(object):
         stdyStr.write("Average in stdy measurement window:\n")
         stdyStr.write(" - ")
         print(test.getStdyState().getStdyAvg(), file=stdyStr)  
+
+        stdyStr.write("Measurement window and max. number of rounds:\n")
+        stdyStr.write(" - ")
+        print(str(test.getStdyState().getWindow()) + ", " + str(test.getOptions().getTestRnds()), file=stdyStr)
+
+        if len(test.getTrackRnds()) > 0:
+            stdyStr.write("Tracking cell fast path, rounds of the " + RstReport.trackDesc(test) + " alone:\n")
+            stdyStr.write(" - ")
+            print(str(len(test.getTrackRnds())) + " rounds, values " + str(test.getTrackRnds()), file=stdyStr)
+            stdyStr.write("\n**Note:** Only the tracking cell was run until it was steady or just a measurement window of rounds was left, the full matrix was ")
+            stdyStr.write("run afterwards. The rounds above and in the plots count the full rounds only.\n")
         
         self.addString(stdyStr.getvalue())
         stdyStr.close()
@@ -334,16 +491,18 @@ class RstReport(object):
                 print("\tWorkload Ind. Preconditioning", file=desc)
                 print("\tWhile not Steady State", file=desc)
                 print("\t\tFor workloads ", end=' ', file=desc)
-                print(dt.SsdIopsTest.mixWlds, file=desc)
+                print(test.getMixWlds(), file=desc)
                 desc.write('\t\t\t')
                 print("For block sizes", end=' ', file=desc)
                 print(test.getBsLabels(), file=desc)
-                desc.write("\nEach combination of workload and block size is carried out for 60 seconds using direct IO. ")
-                desc.write("The average number of read and write IOPS is measured and summed up, therefore 56 values are ")
+                desc.write("\nEach combination of workload and block size is carried out for " + str(test.getOptions().getRuntime()))
+                desc.write(" seconds using direct IO. ")
+                desc.write("The average number of read and write IOPS is measured and summed up, therefore ")
+                desc.write(str(len(test.getMixWlds()) * len(test.getBsLabels())) + " values are ")
                 desc.write("the result of the two loops.\n")
                 desc.write("After these loops are finished one test round has been carried out. To detect the steady state ")
-                desc.write("the IOPS of 4k random write are taken.\n\n")
-                print("- Dependent Variable: 4k block size, random write", file=desc)
+                desc.write("the IOPS of " + RstReport.trackDesc(test) + " are taken.\n\n")
+                print("- Dependent Variable: " + RstReport.trackDesc(test), file=desc)
                 self.addString(desc.getvalue())
                 desc.close()
                 self.addSteadyInfo(test)
@@ -361,11 +520,12 @@ class RstReport(object):
                 print("Sequential read", file=desc)
                 desc.write('\t\t\t')
                 print("Sequential write", file=desc)
-                desc.write("\nFor each block size sequential read and write is carried out for 60 seconds using direct IO. ")
+                desc.write("\nFor each block size sequential read and write is carried out for " + str(test.getOptions().getRuntime()))
+                desc.write(" seconds using direct IO. ")
                 desc.write("The number of kilobytes for read and write is measured, therefore 2 values are ")
                 desc.write("the result of one round.\n")
-                desc.write("To detect the steady state the throughput of 1024k sequential write is taken.\n\n")
-                print("- Dependent Variable: 1024k block size, sequential write", file=desc)
+                desc.write("To detect the steady state the throughput of " + test.getTrackCell()[1] + " sequential write is taken.\n\n")
+                print("- Dependent Variable: " + test.getTrackCell()[1] + " block size, sequential write", file=desc)
                 self.addString(desc.getvalue())
                 desc.close()
                 self.addSteadyInfo(test)
@@ -377,16 +537,21 @@ class RstReport(object):
                 print("\tWorkload Ind. Preconditioning", file=desc)
                 print("\tWhile not Steady State", file=desc)
                 print("\t\tFor workloads ", end=' ', file=desc)
-                print(dt.SsdLatencyTest.mixWlds, file=desc)
+                print(test.getMixWlds(), file=desc)
                 desc.write('\t\t\t')
                 print("For block sizes", end=' ', file=desc)
                 print(test.getBsLabels(), file=desc)
-                desc.write("\nFor all block sizes random read, a 65/35 read/write mixed workload and random write is carried out for 60 ") 
-                desc.write("seconds using direct IO. ")
+                desc.write("\nFor all block sizes the read/write workloads " + ', '.join(RstReport.mixLabels(test.getMixWlds())))
+                desc.write(" are carried out for " + str(test.getOptions().getRuntime()) + " seconds using direct IO. ")
                 desc.write("For every combination the Min, Max and Mean Latency is measured. ")
+                if test.hasPercentiles():
+                    desc.write("Additionally the completion latency percentiles ")
+                    desc.write(str(test.getPercentiles()) + " are measured. ")
+                    desc.write("For the mixed workload min and max are taken over reads and writes, the mean and the ")
+                    desc.write("percentiles are weighted by the number of reads and writes. ")
                 desc.write("After these loops are finished one test round has been carried out. To detect the steady state ")
-                desc.write("the mean latency of 4k random write is taken.\n\n")
-                print("- Dependent Variable: 4k block size, random write mean latency", file=desc)
+                desc.write("the mean latency of " + RstReport.trackDesc(test) + " is taken.\n\n")
+                print("- Dependent Variable: " + RstReport.trackDesc(test) + " mean latency", file=desc)
                 self.addString(desc.getvalue())
                 desc.close()
                 self.addSteadyInfo(test)
@@ -396,10 +561,11 @@ class RstReport(object):
                 desc.write('\n::\n\n\t')
                 print("Make Secure Erase", file=desc)
                 print("\tWhile not written 4x User Capacity or 24h", file=desc)
-                print("\t\tCarry out random write, 4k block size for 1 minute.", file=desc)
-                desc.write("\nFor 4k block size random write is carried out for 60 ") 
+                rt = str(test.getOptions().getRuntime())
+                print("\t\tCarry out random write, 4k block size for " + rt + " seconds.", file=desc)
+                desc.write("\nFor 4k block size random write is carried out for " + rt + " ") 
                 desc.write("seconds using direct IO. ")
-                desc.write("For each round (60 second window) the write IOPS and latencies are measured. Also the total written ")
+                desc.write("For each round (" + rt + " second window) the write IOPS and latencies are measured. Also the total written ")
                 desc.write("IO is measured to check if 4x capacity has been written.\n\n")
                 desc.write("As no steady state detection is necessary there is no dependence variable.\n\n")
                 self.addString(desc.getvalue())
@@ -410,14 +576,15 @@ class RstReport(object):
                 desc = StringIO()
                 desc.write("The IOPS test consists of looping over the following parameters:\n")
                 desc.write('\n::\n\n\t')
-                print("Divide device in " + str(dt.HddIopsTest.maxRnds) + " parts", file=desc)
-                print("\tFor range(" + str(dt.HddIopsTest.maxRnds) + ")", file=desc)
+                print("Divide device in " + str(test.getMaxRnds()) + " parts", file=desc)
+                print("\tFor range(" + str(test.getMaxRnds()) + ")", file=desc)
                 print("\t\tFor workloads ", end=' ', file=desc)
-                print(dt.HddIopsTest.mixWlds, file=desc)
+                print(test.getMixWlds(), file=desc)
                 desc.write('\t\t\t')
                 print("For block sizes", end=' ', file=desc)
                 print(test.getBsLabels(), file=desc)
-                desc.write("\nEach combination of workload and block size is carried out for 60 seconds using direct IO. ")
+                desc.write("\nEach combination of workload and block size is carried out for " + str(test.getOptions().getRuntime()))
+                desc.write(" seconds using direct IO. ")
                 desc.write("The IOPS of one round are an indicator for the random performance of the corresponding area.")
                 self.addString(desc.getvalue())
                 desc.close()
@@ -428,7 +595,7 @@ class RstReport(object):
                 print("For block sizes ", end=' ', file=desc)
                 print(test.getBsLabels(), file=desc)
                 desc.write('\t\t')
-                print("For range(" + str(dt.HddTPTest.maxRnds) + ")", file=desc)
+                print("For range(" + str(test.getMaxRnds()) + ")", file=desc)
                 desc.write('\t\t\t')
                 print("Sequential read", file=desc)
                 desc.write('\t\t\t')
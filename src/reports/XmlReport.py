@@ -31,6 +31,22 @@ class XmlReport(object):
         et = etree.ElementTree(self.__xml)
         et.write(testname + '.xml')
         
+    def streamToFile(self,testname,elements):
+        '''
+        Write the root tag with its children and further elements to
+        the xml file. The further elements are written one at a time,
+        only the one being written has to be kept in memory.
+        @param testname The name of the xml file without extension.
+        @param elements An iterable of elements, e.g. a generator
+        creating the xml of one test after the other.
+        '''
+        with etree.xmlfile(testname + '.xml') as xf:
+            with xf.element(self.__xml.tag):
+                for child in self.__xml:
+                    xf.write(child)
+                for e in elements:
+                    xf.write(e)
+
     def fileToXml(self,testname):
         et = etree.parse(testname + '.xml')
         self.__xml = et.getroot()
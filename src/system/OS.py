@@ -12,6 +12,8 @@ from os import lstat
 from stat import S_ISBLK
 from time import sleep
 
+from system.Tools import ToolRegistry
+
 class RAIDtec(object, metaclass=ABCMeta):
     '''
     Representing a RAID technology, used from the OS.
@@ -81,13 +83,7 @@ class Mdadm(RAIDtec):
         '''
         Checks for mdadm and sets the util path.
         '''
-        mdadm = subprocess.Popen(['which', 'mdadm'],stdout=subprocess.PIPE,stderr=subprocess.PIPE,universal_newlines=True)
-        stdout = mdadm.communicate()[0]
-        if mdadm.returncode != 0:
-            logging.error("# Error: command 'which mdadm' returned an error code.")
-            raise RuntimeError("which mdadm command error")
-        else:
-            self.setUtil(stdout.rstrip("\n"))
+        self.setUtil(ToolRegistry.getPath('mdadm'))
 
     def checkRaidPath(self):
         logging.info("# Checking for device "+self.getDevPath())
@@ -184,16 +180,7 @@ class Storcli(RAIDtec):
         '''
         Checks for the storcli executable and sets the path of storcli.
         '''
-        storcli = subprocess.Popen(['which', 'storcli'],stdout=subprocess.PIPE,stderr=subprocess.PIPE,universal_newlines=True)
-        stdout = storcli.communicate()[0]
-        if storcli.returncode != 0:
-            storcli = subprocess.Popen(['which', 'storcli64'],stdout=subprocess.PIPE,stderr=subprocess.PIPE,universal_newlines=True)
-            stdout = storcli.communicate()[0]
-        if storcli.returncode != 0:
-            logging.error("# Error: command 'which storcli' returned an error code.")
-            raise RuntimeError("which storcli command error")
-        else:
-            self.setUtil(stdout.rstrip("\n"))
+        self.setUtil(ToolRegistry.getPath('storcli'))
 
     def checkRaidPath(self):
         '''
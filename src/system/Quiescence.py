@@ -0,0 +1,147 @@
+'''
+Waits until a block device is quiescent, read from the block layer
+statistics in sysfs and the md resync state in procfs.
+'''
+
+import logging
+import os
+import re
+import time
+
+class Quiescence(object):
+    '''
+    Detects if a block device is idle: no I/Os in flight, no completed I/Os
+    or sectors between two samples of /sys/class/block/<dev>/stat and, for
+    an md raid, no resync, recovery, reshape or check in /proc/mdstat. A wait
+    ends as soon as the device has been idle for the hold time, but at the
+    latest after the maximum wait. The sysfs and procfs roots can be changed
+    to run against synthetic files.
+    '''
+    ## Seconds the device has to be idle.
+    holdTime = 5
+
+    ## Maximum seconds to wait for an idle device, None to wait without limit.
+    maxWait = 300
+
+    ## Seconds between two samples.
+    interval = 1
+
+    ## Seconds between two checks if the device is ready, these may call external tools.
+    readyInterval = 30
+
+    ## Root of sysfs.
+    sysRoot = '/sys'
+
+    ## Root of procfs.
+    procRoot = '/proc'
+
+    def __init__(self,devPath,sysRoot=None,procRoot=None):
+        '''
+        Constructor
+        @param devPath The path of the block device, e.g. /dev/sdb or /dev/md0.
+        @param sysRoot The sysfs root, None for Quiescence.sysRoot.
+        @param procRoot The procfs root, None for Quiescence.procRoot.
+        '''
+        ## Path of the block device
+        self.__devPath = devPath
+        ## Name of the block device, partitions have their own statistics
+        self.__name = os.path.basename(os.path.realpath(devPath)) if devPath != None else None
+        ## Root of sysfs
+        self.__sys = sysRoot or Quiescence.sysRoot
+        ## Root of procfs
+        self.__proc = procRoot or Quiescence.procRoot
+
+    def getName(self): return self.__name
+
+    def readStat(self):
+        '''
+        Read the block layer statistics of the device.
+        @return A list of the counters, the in flight I/Os are at index 8.
+        None if the device has no statistics, e.g. it doesn't exist yet.
+        '''
+        if self.__name == None:
+            return None
+        try:
+            with open(os.path.join(self.__sys,'class','block',self.__name,'stat')) as f:
+                stat = [int(v) for v in f.read().split()]
+        except (OSError,IOError,ValueError):
+            return None
+        if len(stat) < 11:
+            return None
+        return stat
+
+    def getMdTask(self):
+        '''
+        Return the running md task of the device, e.g. "resync" or "recovery".
+        @return The name of the task, None if none is running or the device is no md raid.
+        '''
+        try:
+            with open(os.path.join(self.__proc,'mdstat')) as f:
+                mdstat = f.read()
+        except (OSError,IOError):
+            return None
+        for block in mdstat.split('\n\n'):
+            #the first block starts with the Personalities line
+            match = re.search('^' + re.escape(str(self.__name)) + r' :.*',block,re.M | re.S)
+            if match == None:
+                continue
+            block = match.group(0)
+            #a running task shows its progress, a pending one e.g. resync=PENDING
+            match = re.search(r'\b(resync|recovery|reshape|check)\s*=',block)
+            if match != None:
+                return match.group(1)
+        return None
+
+    def wait(self,phase,ready=None,maxWait=-1):
+        '''
+        Wait until the device is quiescent. A device without statistics is
+        waited for the hold time.
+        @param phase The phase the device is waited for, logged with the time.
+        @param ready A function returning False as long as the device is not
+        ready, e.g. while a raid is initialized, None if not needed.
+        @param maxWait Maximum seconds to wait, None to wait without limit,
+        -1 for Quiescence.maxWait.
+        @return The waited seconds.
+        '''
+        if maxWait == -1:
+            maxWait = Quiescence.maxWait
+        start = time.time()
+        last = None
+        idleSince = None
+        isReady = None
+        readyChecked = None
+        while True:
+            stat = self.readStat()
+            task = self.getMdTask()
+            now = time.time()
+            #check every readyInterval until the device is ready
+            if ready != None and not isReady and (readyChecked == None
+                                                  or now - readyChecked >= Quiescence.readyInterval):
+                isReady = ready()
+                readyChecked = now
+            busy = task != None or (ready != None and not isReady)
+            if stat == None and last == None and ready == None and task == None:
+                #nothing to watch, fall back to the hold time
+                logging.info("# No block layer statistics for " + str(self.__devPath) + ", waiting "
+                             + str(Quiescence.holdTime) + " seconds before " + phase)
+                time.sleep(Quiescence.holdTime)
+                return Quiescence.holdTime
+            if stat != None and (stat[8] != 0 or stat != last):
+                busy = True
+            last = stat
+            if busy:
+                idleSince = None
+            elif idleSince == None:
+                idleSince = now
+            if idleSince != None and now - idleSince >= Quiescence.holdTime:
+                waited = round(now - start,1)
+                logging.info("# " + str(self.__devPath) + " quiescent before " + phase
+                             + ", waited " + str(waited) + " seconds")
+                return waited
+            if maxWait != None and now - start >= maxWait:
+                waited = round(now - start,1)
+                logging.warning("# " + str(self.__devPath) + " still busy before " + phase + " after "
+                                + str(waited) + " seconds" + ("" if task == None else ", md " + task + " running")
+                                + ", continuing")
+                return waited
+            time.sleep(Quiescence.interval)
@@ -0,0 +1,175 @@
+'''
+A process wide registry of the external tools used by TKperf.
+'''
+
+import subprocess
+import logging
+import threading
+import tempfile
+import shutil
+import json
+import os
+
+class ToolRegistry(object):
+    '''
+    Resolves the external tools (fio, hdparm, nvme, storcli, mdadm) once per
+    process. Path, version and capabilities of a tool are cached on disk,
+    keyed by the modification time of its executable, so also new processes
+    do not have to spawn the tools again.
+    '''
+    ## Executable names of the tools, the first one found is used.
+    tools = {'fio':['fio'],
+             'hdparm':['hdparm'],
+             'nvme':['nvme'],
+             'storcli':['storcli','storcli64'],
+             'mdadm':['mdadm']}
+
+    ## Arguments letting a tool print its version.
+    versionArgs = {'fio':['--version'],
+                   'hdparm':['-V'],
+                   'nvme':['version'],
+                   'storcli':['-v'],
+                   'mdadm':['--version']}
+
+    ## Fio ioengines reported as capability 'engine:<name>'.
+    fioEngines = ['libaio','io_uring','sync','psync','pvsync2','posixaio','mmap']
+
+    ## Path of the on-disk cache.
+    cachePath = os.path.join(os.environ.get('XDG_CACHE_HOME',os.path.expanduser('~/.cache')),
+                             'tkperf','tools.json')
+
+    ## Resolved tools of this process: {name:{path,mtime,version,caps}}
+    resolved = {}
+
+    ## Lock protecting the resolved tools
+    lock = threading.Lock()
+
+    @staticmethod
+    def resolve(name):
+        '''
+        Resolve a tool, the result is shared by all objects of the process.
+        @param name The name of the tool, a key of ToolRegistry.tools.
+        @return A dictionary {path,mtime,version,caps}.
+        @exception RuntimeError if the tool cannot be found.
+        '''
+        with ToolRegistry.lock:
+            tool = ToolRegistry.resolved.get(name)
+            if tool != None and ToolRegistry.isCurrent(tool):
+                return tool
+            path = None
+            for exe in ToolRegistry.tools[name]:
+                path = shutil.which(exe)
+                if path != None:
+                    break
+            if path == None:
+                logging.error("# Error: command 'which " + name + "' returned an error code.")
+                raise RuntimeError("which " + name + " command error")
+            path = os.path.realpath(path)
+            cache = ToolRegistry.loadCache()
+            tool = cache.get(name)
+            #a cache written with another list of probed engines is outdated
+            stale = name == 'fio' and tool != None and tool.get('engines') != ToolRegistry.fioEngines
+            if tool == None or tool['path'] != path or not ToolRegistry.isCurrent(tool) or stale:
+                tool = ToolRegistry.probe(name,path)
+                cache[name] = tool
+                ToolRegistry.storeCache(cache)
+            else:
+                logging.info("# Using cached " + name + " at " + path)
+            ToolRegistry.resolved[name] = tool
+            return tool
+
+    @staticmethod
+    def getPath(name): return ToolRegistry.resolve(name)['path']
+
+    @staticmethod
+    def getVersion(name): return ToolRegistry.resolve(name)['version']
+
+    @staticmethod
+    def hasCap(name,cap):
+        '''
+        Check if a tool has a capability, e.g. hasCap('fio','json+') or
+        hasCap('fio','engine:io_uring').
+        @return True if the tool has the capability, False if not or if the
+        tool is not available.
+        '''
+        try:
+            return cap in ToolRegistry.resolve(name)['caps']
+        except RuntimeError:
+            return False
+
+    @staticmethod
+    def isCurrent(tool):
+        ''' Check if the executable of a resolved tool is unchanged. '''
+        try:
+            return os.stat(tool['path']).st_mtime == tool['mtime']
+        except OSError:
+            return False
+
+    @staticmethod
+    def probe(name,path):
+        '''
+        Spawn a tool to fetch its version and capabilities.
+        @param name The name of the tool.
+        @param path The path of the executable.
+        @return A dictionary {path,mtime,version,caps}.
+        '''
+        logging.info("# Probing " + name + " at " + path)
+        tool = {'path':path,'mtime':os.stat(path).st_mtime,'version':'','caps':[]}
+        tool['version'] = ToolRegistry.call([path] + ToolRegistry.versionArgs[name])
+        if name == 'fio':
+            help = ToolRegistry.call([path,'--help'])
+            if 'json' in help:
+                tool['caps'].append('json')
+            if 'json+' in help:
+                tool['caps'].append('json+')
+            engines = ToolRegistry.call([path,'--enghelp']).split()
+            for e in ToolRegistry.fioEngines:
+                if e in engines:
+                    tool['caps'].append('engine:' + e)
+            tool['engines'] = ToolRegistry.fioEngines
+        return tool
+
+    @staticmethod
+    def call(args):
+        '''
+        Run a tool and return its output, some tools print their version
+        to the standard error.
+        @return The standard output, or the standard error if the former is empty.
+        '''
+        try:
+            out = subprocess.Popen(args,stdout=subprocess.PIPE,stderr=subprocess.PIPE,universal_newlines=True)
+            (stdout,stderr) = out.communicate()
+        except OSError as e:
+            logging.error("# Error: could not run " + str(args) + ": " + str(e))
+            return ''
+        if stdout == '':
+            return stderr
+        return stdout
+
+    @staticmethod
+    def loadCache():
+        ''' Load the on-disk cache, an unreadable cache is ignored. '''
+        try:
+            with open(ToolRegistry.cachePath) as f:
+                return json.load(f)
+        except (OSError,ValueError):
+            return {}
+
+    @staticmethod
+    def storeCache(cache):
+        ''' Atomically replace the on-disk cache, errors are only logged. '''
+        try:
+            cacheDir = os.path.dirname(ToolRegistry.cachePath)
+            os.makedirs(cacheDir,exist_ok=True)
+            fd,path = tempfile.mkstemp(dir=cacheDir,prefix='.tools-')
+            with os.fdopen(fd,'w') as f:
+                json.dump(cache,f)
+            os.replace(path,ToolRegistry.cachePath)
+        except OSError as e:
+            logging.warning("# Could not write tool cache " + ToolRegistry.cachePath + ": " + str(e))
+
+    @staticmethod
+    def clear():
+        ''' Forget the tools resolved by this process, the disk cache is kept. '''
+        with ToolRegistry.lock:
+            ToolRegistry.resolved = {}
@@ -0,0 +1,165 @@
+'''
+The NUMA and interrupt locality of a block device, read from sysfs and procfs.
+'''
+
+import logging
+import glob
+import os
+import re
+
+class Topology(object):
+    '''
+    Reads the NUMA node of a block device, the CPUs of the node and the
+    CPUs handling the interrupts of its (NVMe) queues. The sysfs and procfs
+    roots can be changed to run against a fake tree.
+    '''
+    ## Root of sysfs.
+    sysRoot = '/sys'
+
+    ## Root of procfs.
+    procRoot = '/proc'
+
+    def __init__(self,devPath,sysRoot=None,procRoot=None):
+        '''
+        Constructor
+        @param devPath The path of the block device, e.g. /dev/nvme0n1.
+        @param sysRoot The sysfs root, None for Topology.sysRoot.
+        @param procRoot The procfs root, None for Topology.procRoot.
+        '''
+        ## Name of the block device, the parent device of a partition
+        self.__name = os.path.basename(os.path.realpath(devPath))
+        ## Root of sysfs
+        self.__sys = sysRoot or Topology.sysRoot
+        ## Root of procfs
+        self.__proc = procRoot or Topology.procRoot
+        if not os.path.isdir(os.path.join(self.__sys,'block',self.__name)):
+            for d in glob.glob(os.path.join(self.__sys,'block','*',self.__name)):
+                self.__name = os.path.basename(os.path.dirname(d))
+
+    def getName(self): return self.__name
+
+    @staticmethod
+    def parseCpuList(cpuList):
+        '''
+        Parse a kernel cpu list, e.g. "0-3,8,10-11".
+        @return A sorted list of cpu numbers.
+        '''
+        cpus = set()
+        for part in cpuList.strip().split(','):
+            if part == '':
+                continue
+            if '-' in part:
+                lo,hi = part.split('-')
+                cpus.update(range(int(lo),int(hi) + 1))
+            else:
+                cpus.add(int(part))
+        return sorted(cpus)
+
+    @staticmethod
+    def toCpuList(cpus):
+        '''
+        Format cpu numbers as kernel and fio cpu list, e.g. "0-3,8".
+        @param cpus An iterable of cpu numbers.
+        '''
+        parts = []
+        for c in sorted(set(cpus)):
+            if len(parts) > 0 and parts[-1][1] == c - 1:
+                parts[-1][1] = c
+            else:
+                parts.append([c,c])
+        return ','.join(str(lo) if lo == hi else str(lo) + '-' + str(hi) for lo,hi in parts)
+
+    def read(self,*path):
+        ''' Return the stripped content of a file, None if it cannot be read. '''
+        try:
+            with open(os.path.join(*path)) as f:
+                return f.read().strip()
+        except (OSError,IOError):
+            return None
+
+    def getNumaNode(self):
+        '''
+        Return the NUMA node of the device, None if the kernel does not
+        know it. For NVMe namespaces the node is the one of the PCI device
+        of the controller.
+        '''
+        dev = os.path.join(self.__sys,'block',self.__name,'device')
+        for path in [os.path.join(dev,'numa_node'),os.path.join(dev,'device','numa_node')]:
+            node = self.read(path)
+            if node != None and node.lstrip('-').isdigit():
+                if int(node) < 0:
+                    return None
+                return int(node)
+        return None
+
+    def getNodeCpus(self,node):
+        '''
+        Return the CPUs of a NUMA node.
+        @param node The number of the node.
+        @return A list of cpu numbers, empty if the node is unknown.
+        '''
+        cpuList = self.read(self.__sys,'devices','system','node','node' + str(node),'cpulist')
+        if cpuList == None:
+            return []
+        return Topology.parseCpuList(cpuList)
+
+    def getController(self):
+        ''' Return the NVMe controller of the device, e.g. nvme0, None for other devices. '''
+        match = re.match(r'(nvme\d+)(c\d+)?n\d+$',self.__name)
+        if match == None:
+            return None
+        return match.group(1)
+
+    def getIrqMap(self):
+        '''
+        Return the interrupts of the NVMe IO queues of the device and the
+        CPUs handling them, read from /proc/interrupts and /proc/irq.
+        @return A dictionary {queue name:[cpus]}, empty for non NVMe devices.
+        '''
+        ctrl = self.getController()
+        irqMap = {}
+        if ctrl == None:
+            return irqMap
+        interrupts = self.read(self.__proc,'interrupts')
+        if interrupts == None:
+            return irqMap
+        for line in interrupts.splitlines():
+            fields = line.split()
+            if len(fields) < 2 or not fields[0].rstrip(':').isdigit():
+                continue
+            queue = fields[-1]
+            #q0 is the admin queue, not used by the IOs
+            if re.match(ctrl + r'q[1-9]\d*$',queue) == None:
+                continue
+            irq = fields[0].rstrip(':')
+            cpuList = self.read(self.__proc,'irq',irq,'effective_affinity_list')
+            if cpuList == None:
+                cpuList = self.read(self.__proc,'irq',irq,'smp_affinity_list')
+            if cpuList != None:
+                irqMap[queue] = Topology.parseCpuList(cpuList)
+        return irqMap
+
+    def getPinning(self,mode):
+        '''
+        Calculate the CPUs the fio jobs are pinned to.
+        @param mode 'numa' for the CPUs of the device's node, 'irq' for the
+        CPUs handling the queue interrupts (restricted to the node if known).
+        @return A dictionary {mode,node,cpus,irqs}, cpus is a cpu list and
+        None if no locality is known.
+        '''
+        node = self.getNumaNode()
+        nodeCpus = self.getNodeCpus(node) if node != None else []
+        irqs = self.getIrqMap()
+        cpus = list(nodeCpus)
+        if mode == 'irq':
+            irqCpus = set(c for l in irqs.values() for c in l)
+            if len(nodeCpus) > 0:
+                irqCpus &= set(nodeCpus)
+            if len(irqCpus) > 0:
+                cpus = sorted(irqCpus)
+            else:
+                logging.info("# No queue interrupts found for " + self.__name + ", using the NUMA node")
+        pin = {'mode':mode,'node':node,'cpus':None,'irqs':dict((k,Topology.toCpuList(v)) for k,v in irqs.items())}
+        if len(cpus) > 0:
+            pin['cpus'] = Topology.toCpuList(cpus)
+        return pin